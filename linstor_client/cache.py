@@ -0,0 +1,439 @@
+# -*- coding: utf-8 -*-
+"""
+On disk cache for the responses of read-only rest requests, enabled with --cache-ttl.
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import time
+
+import linstor
+
+try:
+    from urllib.parse import unquote, urlparse
+except ImportError:
+    from urlparse import urlparse
+    from urllib import unquote
+
+MUTATING_METHODS = ["POST", "PUT", "PATCH", "DELETE"]
+
+# list requests whose responses are cached, all other requests like downloads, error reports or sync status are
+# always sent to the controller
+_CACHEABLE_PATHS = [re.compile(x) for x in [
+    r"^/v1/controller/(version|properties)$",
+    r"^/v1/nodes$",
+    r"^/v1/nodes/[^/]+/net-interfaces$",
+    r"^/v1/node-connections$",
+    r"^/v1/view/(storage-pools|resources|snapshots)$",
+    r"^/v1/storage-pool-definitions$",
+    r"^/v1/resource-groups$",
+    r"^/v1/resource-groups/[^/]+/volume-groups$",
+    r"^/v1/resource-definitions$",
+    r"^/v1/resource-definitions/[^/]+/(volume-definitions|resource-connections|snapshots)$",
+    r"^/v1/remotes$",
+    r"^/v1/schedules$",
+    r"^/v1/key-value-store$"
+]]
+
+ALL = "*"
+
+# object type -> object types whose list data can change with it, mutations of unknown types invalidate everything
+_CASCADE = {
+    "nodes": {ALL},
+    "controller": set(),
+    "storage-pool-definitions": {"storage-pools"},
+    "storage-pools": {"storage-pool-definitions"},
+    "resource-groups": {"volume-groups", "resource-definitions", "resources", "storage-pools"},
+    "volume-groups": {"resource-groups"},
+    "resource-definitions": {"volume-definitions", "resources", "snapshots", "storage-pools"},
+    "volume-definitions": {"resource-definitions", "resources", "storage-pools"},
+    "resources": {"resource-definitions", "storage-pools"},
+    "volumes": {"resources", "storage-pools"},
+    "snapshots": {"resource-definitions", "resources", "storage-pools"},
+    "resource-connections": {"resources"},
+    "node-connections": {"nodes"},
+    "remotes": set(),
+    "schedules": set(),
+    "key-value-store": set()
+}
+
+
+def object_types(path):
+    """
+    Returns the object collections a rest path refers to, e.g. resource-definitions and resources for
+    /v1/resource-definitions/rsc1/resources.
+
+    :param str path: rest path, may contain a query string
+    :rtype: set[str]
+    """
+    parts = [unquote(x) for x in urlparse(path).path.split("/")[2:] if x]  # strip the /v1 prefix
+    if parts and parts[0] == "view":
+        parts = parts[1:]
+    return set(parts[::2])
+
+
+def cacheable(path):
+    """
+    :param str path: rest path of a GET request, may contain a query string
+    :return: True if the path is a list request whose response may be cached
+    :rtype: bool
+    """
+    url_path = urlparse(path).path
+    return any(x.match(url_path) for x in _CACHEABLE_PATHS)
+
+
+def invalidated_types(path):
+    """
+    :param str path: rest path of a mutating request
+    :return: the object types whose cached lists are outdated afterwards
+    :rtype: set[str]
+    """
+    types = object_types(path)
+    if not types:
+        return {ALL}
+    result = set(types)
+    for obj_type in types:
+        result |= _CASCADE.get(obj_type, {ALL})
+    return result
+
+
+def controller_dir_name(controller):
+    """
+    :param str controller: controller uri
+    :return: host and port of the controller as a file name, e.g. localhost_3370
+    """
+    url = urlparse(controller)
+    return re.sub(r"[^A-Za-z0-9._-]", "_", url.netloc or controller)
+
+
+def cache_directory(controller):
+    """
+    :param str controller: controller uri
+    :return: the cache directory for the controller, ~/.cache/linstor/<controller>/ by default
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "linstor", controller_dir_name(controller))
+
+
+class _Cache(object):
+    """
+    State shared by the cache variants for the command that is currently executed.
+    """
+    def __init__(self):
+        self.mutated = False  # a mutation was sent, entries are revalidated until the command ends
+        self.revalidate = False  # the command polls for changes, entries are always revalidated
+
+    def begin_command(self, revalidate=False):
+        """
+        Called before every command, mutations of earlier commands of an interactive session are already reflected
+        by the invalidated entries.
+
+        :param bool revalidate: revalidate all entries during the command, set for commands that wait for changes
+        """
+        self.mutated = False
+        self.revalidate = revalidate
+
+
+class ResponseCache(_Cache):
+    """
+    Stores response bodies per request path in one file each. The file name starts with the object types of the
+    path, so a mutation can drop the affected entries without reading them. Entries are served for ttl seconds,
+    mutations by other clients are only noticed then. Expired entries are kept to revalidate them.
+    """
+    def __init__(self, directory, ttl):
+        """
+
+        :param str directory: cache directory, created on first store
+        :param float ttl: seconds a response is served from the cache
+        """
+        super(ResponseCache, self).__init__()
+        self._directory = directory
+        self._ttl = ttl
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def _file_name(self, key, path):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return "{t}.{d}.json".format(t="+".join(sorted(object_types(path))) or "_", d=digest)
+
+    def lookup(self, key, path, stale=False):
+        """
+        :param str key: request key, includes the path and everything else the response depends on
+        :param str path: rest path of the request
+        :param bool stale: also return expired entries
+        :return: (headers, body) of the cached response or None
+        :rtype: Optional[(dict[str, str], bytes)]
+        """
+        try:
+            with io.open(os.path.join(self._directory, self._file_name(key, path)), "rb") as cache_file:
+                header = json.loads(cache_file.readline().decode("utf-8"))
+                if header["key"] != key or (not stale and time.time() - header["time"] >= self._ttl):
+                    return None
+                return header["headers"], cache_file.read()
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+
+    def store(self, key, path, headers, body):
+        """
+        Writes the entry to a temporary file and renames it, concurrent readers see either the old or new entry.
+        Failures are ignored, the cache is only an optimization.
+        """
+        file_path = os.path.join(self._directory, self._file_name(key, path))
+        tmp_path = "{p}.{pid}.tmp".format(p=file_path, pid=os.getpid())
+        try:
+            if not os.path.isdir(self._directory):
+                os.makedirs(self._directory, 0o700)
+            with io.open(tmp_path, "wb") as cache_file:
+                header = {"key": key, "time": time.time(), "headers": headers}
+                cache_file.write(json.dumps(header).encode("utf-8") + b"\n")
+                cache_file.write(body)
+            os.rename(tmp_path, file_path)
+        except (IOError, OSError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def invalidate(self, path):
+        """
+        Drops all entries whose object types are affected by a mutating request to path.
+        """
+        self.mutated = True
+        types = invalidated_types(path)
+        try:
+            file_names = os.listdir(self._directory)
+        except (IOError, OSError):
+            return
+        for file_name in file_names:
+            entry_types = set(file_name.split(".", 1)[0].split("+"))
+            if ALL in types or entry_types & types:
+                try:
+                    os.remove(os.path.join(self._directory, file_name))
+                except (IOError, OSError):
+                    pass
+
+
+class SessionCache(_Cache):
+    """
+    In memory variant of ResponseCache for long running clients. Entries are served for ttl seconds, earlier if a
+    mutation of this client affects them or the refresh command marks them stale. Stale entries are revalidated.
+    """
+    # seconds an interactive session serves a list without asking the controller
+    INTERACTIVE_TTL = 10.0
+
+    def __init__(self, ttl):
+        """
+
+        :param float ttl: seconds a response is served without revalidation
+        """
+        super(SessionCache, self).__init__()
+        self._ttl = ttl
+        self._entries = {}  # key -> [object types, time stored or None if stale, headers, body]
+
+    def lookup(self, key, path, stale=False):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not stale and (entry[1] is None or time.time() - entry[1] >= self._ttl):
+            return None
+        return entry[2], entry[3]
+
+    def store(self, key, path, headers, body):
+        self._entries[key] = [object_types(path), time.time(), headers, body]
+
+    def invalidate(self, path):
+        self.mutated = True
+        types = invalidated_types(path)
+        for entry in list(self._entries.values()):
+            if ALL in types or entry[0] & types:
+                entry[1] = None
+
+    def clear(self):
+        """
+        Marks all entries stale.
+        """
+        for entry in list(self._entries.values()):
+            entry[1] = None
+
+
+class _CachedResponse(object):
+    """
+    Replays a stored response to the linstor api.
+    """
+    def __init__(self, headers, body):
+        self.status = 200
+        self._headers = headers
+        self._body = body
+        self._stream = io.BytesIO(body)
+
+    @property
+    def body(self):
+        return self._body
+
+    def read(self, amt=None):
+        return self._stream.read(amt)
+
+    def getheader(self, name, default=None):
+        return self._headers.get(name.lower(), default)
+
+    def close(self):
+        pass
+
+
+class CachedLinstor(linstor.Linstor):
+    """
+    linstor.Linstor object that serves the list requests accepted by cacheable() from a ResponseCache or
+    SessionCache, all other requests are passed on unchanged. The controller is only contacted for list requests
+    that miss the cache, mutating requests invalidate the affected entries. Once the current command sent a
+    mutation, and during commands that poll for changes like wait-sync or watch, cached entries are revalidated
+    before they are used, so these commands see current data.
+
+    Revalidation sends the ETag and Last-Modified validators of the cached response, if the controller answers
+    304 the cached body is used. Independent of the validators the decoded replies of a path are reused as long
+    as the response body does not change, last_unchanged tells callers like watch loops that nothing changed.
+    """
+    # headers the linstor api evaluates and validators
+    HEADERS = ["content-type", "content-encoding", "etag", "last-modified"]
+
+    def __init__(self, ctrl_host, cache, **kwargs):
+        """
+
+        :param str ctrl_host: controller uri
+        :param Union[ResponseCache, SessionCache] cache: cache to use
+        """
+        super(CachedLinstor, self).__init__(ctrl_host, **kwargs)
+        self._cache = cache
+        self._lazy = False
+        self._pending = None  # response handed to the base class for decoding
+        self._decoded = {}  # path -> (body digest, decoded replies)
+        self._last_unchanged = False
+        self._change_count = 0
+
+    @property
+    def cache(self):
+        return self._cache
+
+    @property
+    def change_count(self):
+        """
+        Number of GET requests that returned a different body than the previous request to the same path.
+        """
+        return self._change_count
+
+    @property
+    def last_unchanged(self):
+        """
+        True if the last GET request returned the same body as the previous request to that path.
+        """
+        return self._last_unchanged
+
+    def _key(self, path):
+        return json.dumps([path, self.username])
+
+    def connect(self):
+        """
+        Defers connecting until a request misses the cache, if the controller version is cached.
+        """
+        if not self.curl:
+            version = self._cache.lookup(self._key("/v1/controller/version"), "/v1/controller/version", stale=True)
+            if version is not None:
+                self._ctrl_version = linstor.responses.ControllerVersion(json.loads(version[1].decode("utf-8")))
+                self._connected = True
+                self._lazy = True
+                return True
+        return super(CachedLinstor, self).connect()
+
+    def _conditional_request(self, apicall, path, cached, reconnect):
+        """
+        GET request with the validators of the cached response.
+
+        :return: response and whether the controller confirmed the cached response
+        """
+        conditions = {}
+        if cached is not None:
+            if "etag" in cached[0]:
+                conditions["If-None-Match"] = cached[0]["etag"]
+            if "last-modified" in cached[0]:
+                conditions["If-Modified-Since"] = cached[0]["last-modified"]
+        self._http_headers.update(conditions)
+        try:
+            response = super(CachedLinstor, self)._rest_request_base(apicall, "GET", path, None, reconnect)
+        finally:
+            for name in conditions:
+                self._http_headers.pop(name, None)
+
+        if response.status == 304 and cached is not None:
+            response.read()
+            response.close()
+            return None, True
+        return response, False
+
+    def _rest_request_base(self, apicall, method, path, body=None, reconnect=True):
+        if self._pending is not None:
+            response, self._pending = self._pending, None
+            return response
+
+        if self.curl or (method == "GET" and not cacheable(path)):
+            if self._lazy:
+                self._lazy = False
+                super(CachedLinstor, self).connect()
+            return super(CachedLinstor, self)._rest_request_base(apicall, method, path, body, reconnect)
+
+        key = self._key(path)
+        if method == "GET" and not self._cache.mutated and not self._cache.revalidate:
+            cached = self._cache.lookup(key, path)
+            if cached is not None:
+                return _CachedResponse(*cached)
+
+        if self._lazy:
+            self._lazy = False
+            super(CachedLinstor, self).connect()
+
+        if method != "GET":
+            try:
+                return super(CachedLinstor, self)._rest_request_base(apicall, method, path, body, reconnect)
+            finally:
+                if method in MUTATING_METHODS:
+                    self._cache.invalidate(path)
+
+        cached = self._cache.lookup(key, path, stale=True)
+        response, confirmed = self._conditional_request(apicall, path, cached, reconnect)
+        if confirmed:
+            headers, body = cached
+        elif response.status != 200:
+            return response
+        else:
+            headers = {name: response.getheader(name) for name in self.HEADERS if response.getheader(name)}
+            body = response.read()
+            response.close()
+        self._cache.store(key, path, headers, body)
+        return _CachedResponse(headers, body)
+
+    def _rest_request(self, apicall, method, path, body=None, reconnect=True, raise_error=False):
+        if method != "GET" or self.curl:
+            return super(CachedLinstor, self)._rest_request(apicall, method, path, body, reconnect, raise_error)
+        if not cacheable(path):
+            self._last_unchanged = False
+            self._change_count += 1
+            return super(CachedLinstor, self)._rest_request(apicall, method, path, body, reconnect, raise_error)
+
+        response = self._rest_request_base(apicall, method, path, body, reconnect)
+        if not isinstance(response, _CachedResponse):
+            self._last_unchanged = False
+            self._change_count += 1
+            self._pending = response
+            return super(CachedLinstor, self)._rest_request(apicall, method, path, body, reconnect, raise_error)
+
+        digest = hashlib.sha256(response.body).digest()
+        previous = self._decoded.get(path)
+        self._last_unchanged = previous is not None and previous[0] == digest
+        if self._last_unchanged:
+            return previous[1]
+        self._change_count += 1
+
+        self._pending = response
+        replies = super(CachedLinstor, self)._rest_request(apicall, method, path, body, reconnect, raise_error)
+        self._decoded[path] = (digest, replies)
+        return replies
@@ -1,4 +1,5 @@
 from .commands import DefaultState, Commands, MiscCommands, ArgumentError
+from .commands import TransactionOperation, TransactionStage, TransactionState
 from .drbd_setup_cmds import DrbdOptions
 from .controller_cmds import ControllerCommands
 from .node_cmds import NodeCommands
@@ -23,3 +24,9 @@ from .remote_cmds import RemoteCommands
 from .file_cmds import FileCommands
 from .schedule import ScheduleCommands
 from .key_value_store import KeyValueStoreCommands
+from .apply_cmds import ApplyCommands
+from .export_cmds import ExportCommands
+from .top_cmds import TopCommands
+from .events_cmds import EventsCommands
+from .jobs_cmds import JobsCommands
+from .transaction_cmds import TransactionCommands
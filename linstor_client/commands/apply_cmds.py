@@ -0,0 +1,641 @@
+import collections
+import inspect
+import json
+import sys
+
+import linstor
+import linstor.sharedconsts as apiconsts
+
+import linstor_client
+import linstor_client.argparse.argparse as argparse
+from linstor_client.commands import Commands
+from linstor_client.commands.controller_cmds import ControllerCommands
+from linstor_client.commands.node_cmds import NodeCommands
+from linstor_client.consts import ExitCode
+from linstor_client.utils import LinstorClientError
+
+DEFAULT_RSC_GRP = "DfltRscGrp"
+
+ClusterState = collections.namedtuple(
+    'ClusterState',
+    ('controller_props', 'nodes', 'storage_pools', 'resource_groups', 'volume_groups', 'resource_definitions')
+)
+
+
+class _Stage(object):
+    """
+    Execution order of the planned actions, all actions of a stage are independent of each other.
+    """
+    NODES = 0
+    STORAGE_POOLS = 1
+    RESOURCE_GROUPS = 2
+    VOLUME_GROUPS = 3
+    RESOURCE_DEFINITIONS = 4
+    RESOURCE_DEFINITION_PROPS = 5
+    DELETE_RESOURCE_DEFINITIONS = 6
+    DELETE_VOLUME_GROUPS = 7
+    DELETE_STORAGE_POOLS = 8
+    DELETE_RESOURCE_GROUPS = 9
+    DELETE_NODES = 10
+
+
+class _Action(object):
+    def __init__(self, stage, verb, obj_type, obj_name, changes, call):
+        """
+
+        :param int stage: execution stage, see _Stage
+        :param str verb: create, modify or delete
+        :param str obj_type: object type
+        :param str obj_name: object name
+        :param list[str] changes: human readable description of the changes
+        :param Callable[[linstor.Linstor], list[ApiCallResponse]] call: executes the action
+        """
+        self.stage = stage
+        self.verb = verb
+        self.obj_type = obj_type
+        self.obj_name = obj_name
+        self.changes = changes
+        self.call = call
+
+    @property
+    def data(self):
+        return {
+            "stage": self.stage,
+            "action": self.verb,
+            "type": self.obj_type,
+            "name": self.obj_name,
+            "changes": self.changes
+        }
+
+
+class Manifest(object):
+    """
+    Desired cluster configuration, all sections are optional. Properties set to null are deleted, properties not
+    mentioned are left untouched. DRBD options are properties relative to the DrbdOptions namespace.
+
+    {
+      "controller": {"props": {}, "drbd_options": {}},
+      "nodes": [{"name": "", "address": "", "type": "Satellite", "port": 3366, "props": {}}],
+      "storage_pools": [{"node": "", "name": "", "provider_kind": "LVM_THIN", "driver_pool_name": "",
+                         "shared_space": "", "external_locking": false, "props": {}}],
+      "resource_groups": [{"name": "", "description": "", "place_count": 2, "storage_pool": [], "layer_list": [],
+                           "provider_list": [], "diskless_on_remaining": false, "props": {}, "drbd_options": {},
+                           "volume_groups": [{"number": 0, "props": {}, "drbd_options": {}}]}],
+      "resource_definitions": [{"name": "", "resource_group": "", "props": {}, "drbd_options": {}}]
+    }
+    """
+    SECTIONS = {
+        "controller": {"props", "drbd_options"},
+        "nodes": {"name", "address", "type", "port", "communication_type", "props"},
+        "storage_pools": {
+            "node", "name", "provider_kind", "driver_pool_name", "shared_space", "external_locking", "props"
+        },
+        "resource_groups": {
+            "name", "description", "place_count", "storage_pool", "layer_list", "provider_list",
+            "diskless_on_remaining", "props", "drbd_options", "volume_groups"
+        },
+        "resource_definitions": {"name", "resource_group", "props", "drbd_options"}
+    }
+    VOLUME_GROUP_KEYS = {"number", "props", "drbd_options"}
+
+    def __init__(self, data, source=None):
+        if not isinstance(data, dict):
+            raise self._error(source, "expected an object with the sections " + ", ".join(sorted(self.SECTIONS)))
+        unknown = set(data) - set(self.SECTIONS)
+        if unknown:
+            raise self._error(source, "unknown sections: " + ", ".join(sorted(unknown)))
+
+        self.sections = set(data)
+        self.controller = self._check_entry(
+            source, "controller", data.get("controller", {}), self.SECTIONS["controller"])
+        self.nodes = self._check_entries(source, data, "nodes", ("name",))
+        self.storage_pools = self._check_entries(source, data, "storage_pools", ("node", "name"))
+        self.resource_groups = self._check_entries(source, data, "resource_groups", ("name",))
+        self.resource_definitions = self._check_entries(source, data, "resource_definitions", ("name",))
+        for rsc_grp in self.resource_groups.values():
+            if "volume_groups" in rsc_grp:
+                if not isinstance(rsc_grp["volume_groups"], list):
+                    raise self._error(source, "resource group '{n}': volume_groups has to be a list".format(
+                        n=rsc_grp["name"]))
+                for idx, vlm_grp in enumerate(rsc_grp["volume_groups"]):
+                    self._check_entry(source, "volume_groups", vlm_grp, self.VOLUME_GROUP_KEYS)
+                    vlm_grp.setdefault("number", idx)
+
+    @classmethod
+    def load(cls, stream):
+        """
+        Parses a json or yaml (by file extension .yaml/.yml) manifest.
+
+        :param stream: opened manifest file
+        :rtype: Manifest
+        """
+        name = getattr(stream, "name", "")
+        try:
+            if name.endswith((".yaml", ".yml")):
+                try:
+                    import yaml
+                except ImportError:
+                    raise LinstorClientError(
+                        "Reading yaml manifests requires the python yaml module (PyYAML)",
+                        ExitCode.OPTION_NOT_SUPPORTED
+                    )
+                data = yaml.safe_load(stream)
+            else:
+                data = json.load(stream)
+        except ValueError as err:
+            raise cls._error(name, str(err))
+        return cls(data, name)
+
+    @classmethod
+    def _error(cls, source, msg):
+        source = " " + source if source else ""
+        return LinstorClientError("Invalid manifest{s}: {m}".format(s=source, m=msg), ExitCode.ARGPARSE_ERROR)
+
+    @classmethod
+    def _check_entry(cls, source, section, entry, allowed_keys):
+        if not isinstance(entry, dict):
+            raise cls._error(source, "entries of '{s}' have to be objects".format(s=section))
+        unknown = set(entry) - allowed_keys
+        if unknown:
+            raise cls._error(source, "unknown keys in '{s}': {k}".format(s=section, k=", ".join(sorted(unknown))))
+        for props_key in ("props", "drbd_options"):
+            if not isinstance(entry.get(props_key, {}), dict):
+                raise cls._error(source, "'{p}' in '{s}' has to be an object".format(p=props_key, s=section))
+        return entry
+
+    @classmethod
+    def _check_entries(cls, source, data, section, key_fields):
+        entries = data.get(section, [])
+        if not isinstance(entries, list):
+            raise cls._error(source, "section '{s}' has to be a list".format(s=section))
+        result = collections.OrderedDict()
+        for entry in entries:
+            cls._check_entry(source, section, entry, cls.SECTIONS[section])
+            missing = [x for x in key_fields if not entry.get(x)]
+            if missing:
+                raise cls._error(source, "entry in '{s}' without {m}".format(s=section, m=", ".join(missing)))
+            for field in key_fields:
+                if not isinstance(entry[field], str):
+                    raise cls._error(source, "'{f}' in '{s}' has to be a string, got {v}".format(
+                        f=field, s=section, v=entry[field]))
+            key = tuple(entry[x].lower() for x in key_fields)
+            if key in result:
+                raise cls._error(source, "duplicate entry in '{s}': {k}".format(s=section, k="/".join(key)))
+            result[key] = entry
+        return result
+
+
+def _prop_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _desired_props(entry):
+    """
+    :return: properties of the manifest entry including the DRBD options, None values mark deleted properties
+    :rtype: dict[str, Optional[str]]
+    """
+    props = {k: None if v is None else _prop_value(v) for k, v in entry.get("props", {}).items()}
+    for key, value in entry.get("drbd_options", {}).items():
+        props[apiconsts.NAMESPC_DRBD_OPTIONS + '/' + key] = None if value is None else _prop_value(value)
+    return props
+
+
+def _props_diff(current, desired):
+    """
+    :param dict[str, str] current: current properties of the object
+    :param dict[str, Optional[str]] desired: desired properties, None values are deleted
+    :return: properties to set, property keys to delete and the description of the changes
+    :rtype: (dict[str, str], list[str], list[str])
+    """
+    mod_props = {k: v for k, v in desired.items() if v is not None and current.get(k) != v}
+    del_props = sorted(k for k, v in desired.items() if v is None and k in current)
+    changes = ["{k}={v}".format(k=k, v=mod_props[k]) for k in sorted(mod_props)]
+    changes += ["-" + k for k in del_props]
+    return mod_props, del_props, changes
+
+
+def _same_names(current, desired):
+    return [x.lower() for x in current or []] == [x.lower() for x in desired or []]
+
+
+def _fmt(value):
+    return ",".join(value) if isinstance(value, list) else str(value)
+
+
+def _as_list(value):
+    if value is None:
+        return None
+    return value if isinstance(value, list) else [value]
+
+
+def _plan_controller(manifest, state):
+    mod_props, del_props, changes = _props_diff(state.controller_props, _desired_props(manifest.controller))
+    if not changes:
+        return []
+    return [_Action(
+        _Stage.NODES, "modify", "controller", "controller", changes,
+        lambda lapi: ControllerCommands._controller_modify_props(lapi, mod_props, del_props)
+    )]
+
+
+def _plan_nodes(manifest, state, prune):
+    actions = []
+    for key, entry in manifest.nodes.items():
+        name = entry["name"]
+        node = state.nodes.get(key[0])
+        desired_props = _desired_props(entry)
+        if node is None:
+            if not entry.get("address"):
+                raise Manifest._error(None, "node '{n}' does not exist and has no address".format(n=name))
+            node_type = entry.get("type", apiconsts.VAL_NODE_TYPE_STLT)
+            props = {k: v for k, v in desired_props.items() if v is not None}
+            actions.append(_Action(
+                _Stage.NODES, "create", "node", name,
+                ["address=" + entry["address"], "type=" + node_type] + _props_diff({}, props)[2],
+                lambda lapi, entry=entry, node_type=node_type, props=props: lapi.node_create(
+                    entry["name"],
+                    node_type,
+                    entry["address"],
+                    entry.get("communication_type", apiconsts.VAL_NETCOM_TYPE_PLAIN),
+                    entry.get("port"),
+                    property_dict=props)
+            ))
+            continue
+
+        mod_props, del_props, changes = _props_diff(node.properties, desired_props)
+        node_type = entry.get("type")
+        if node_type and node_type.lower() != node.type.lower():
+            changes.insert(0, "type: {c} -> {d}".format(c=node.type, d=node_type))
+        else:
+            node_type = None
+        if changes:
+            actions.append(_Action(
+                _Stage.NODES, "modify", "node", name, changes,
+                lambda lapi, name=name, node_type=node_type, mod_props=mod_props, del_props=del_props:
+                    lapi.node_modify(name, node_type=node_type, property_dict=mod_props, delete_props=del_props)
+            ))
+
+    if prune and "nodes" in manifest.sections:
+        for key, node in state.nodes.items():
+            if key not in {k[0] for k in manifest.nodes}:
+                actions.append(_Action(
+                    _Stage.DELETE_NODES, "delete", "node", node.name, [],
+                    lambda lapi, name=node.name: lapi.node_delete(name)
+                ))
+    return actions
+
+
+def _plan_storage_pools(manifest, state, prune):
+    actions = []
+    for key, entry in manifest.storage_pools.items():
+        obj_name = entry["node"] + "/" + entry["name"]
+        storage_pool = state.storage_pools.get(key)
+        desired_props = _desired_props(entry)
+        provider_kind = entry.get("provider_kind", "").upper()
+        if storage_pool is None:
+            if provider_kind not in linstor.StoragePoolDriver.list():
+                raise Manifest._error(None, "storage pool '{n}' needs a provider_kind out of {p}".format(
+                    n=obj_name, p=", ".join(linstor.StoragePoolDriver.list())))
+            props = {k: v for k, v in desired_props.items() if v is not None}
+            changes = ["provider_kind=" + provider_kind]
+            if entry.get("driver_pool_name"):
+                changes.append("driver_pool_name=" + entry["driver_pool_name"])
+            actions.append(_Action(
+                _Stage.STORAGE_POOLS, "create", "storage pool", obj_name, changes + _props_diff({}, props)[2],
+                lambda lapi, entry=entry, provider_kind=provider_kind, props=props: lapi.storage_pool_create(
+                    entry["node"],
+                    entry["name"],
+                    provider_kind,
+                    entry.get("driver_pool_name"),
+                    shared_space=entry.get("shared_space"),
+                    property_dict=props,
+                    external_locking=entry.get("external_locking", False))
+            ))
+            continue
+
+        if provider_kind and provider_kind != storage_pool.provider_kind:
+            raise Manifest._error(None, "storage pool '{n}': provider_kind cannot be changed ({c} -> {d})".format(
+                n=obj_name, c=storage_pool.provider_kind, d=provider_kind))
+        mod_props, del_props, changes = _props_diff(storage_pool.properties, desired_props)
+        if changes:
+            actions.append(_Action(
+                _Stage.STORAGE_POOLS, "modify", "storage pool", obj_name, changes,
+                lambda lapi, entry=entry, mod_props=mod_props, del_props=del_props: lapi.storage_pool_modify(
+                    entry["node"], entry["name"], mod_props, del_props)
+            ))
+
+    if prune and "storage_pools" in manifest.sections:
+        for key, storage_pool in state.storage_pools.items():
+            if key not in manifest.storage_pools and storage_pool.name != NodeCommands.DISKLESS_STORAGE_POOL:
+                actions.append(_Action(
+                    _Stage.DELETE_STORAGE_POOLS, "delete", "storage pool",
+                    storage_pool.node_name + "/" + storage_pool.name, [],
+                    lambda lapi, sp=storage_pool: lapi.storage_pool_delete(sp.node_name, sp.name)
+                ))
+    return actions
+
+
+def _rsc_grp_changes(rsc_grp, entry):
+    """
+    :return: resource_group_modify arguments and the description of the changed select filter fields
+    :rtype: (dict[str, Any], list[str])
+    """
+    select_filter = rsc_grp.select_filter
+    current = {
+        "description": rsc_grp.description or "",
+        "place_count": select_filter.place_count,
+        "storage_pool": select_filter.storage_pool_list,
+        "layer_list": select_filter.layer_stack,
+        "provider_list": select_filter.provider_list,
+        "diskless_on_remaining": select_filter.diskless_on_remaining
+    }
+    kwargs = {}
+    changes = []
+    for field, current_value in current.items():
+        if field not in entry:
+            continue
+        desired_value = entry[field]
+        if field in ("storage_pool", "layer_list", "provider_list"):
+            desired_value = _as_list(desired_value)
+            changed = not _same_names(current_value, desired_value)
+        else:
+            changed = current_value != desired_value
+        if changed:
+            kwargs[field] = desired_value
+            changes.append("{f}: {c} -> {d}".format(f=field, c=_fmt(current_value), d=_fmt(desired_value)))
+    return kwargs, sorted(changes)
+
+
+def _plan_resource_groups(manifest, state, prune):
+    actions = []
+    for key, entry in manifest.resource_groups.items():
+        name = entry["name"]
+        rsc_grp = state.resource_groups.get(key[0])
+        desired_props = _desired_props(entry)
+        if rsc_grp is None:
+            props = {k: v for k, v in desired_props.items() if v is not None}
+            kwargs = {
+                field: _as_list(entry[field]) if field in ("storage_pool", "layer_list", "provider_list")
+                else entry[field]
+                for field in ("description", "place_count", "storage_pool", "layer_list", "provider_list",
+                              "diskless_on_remaining") if field in entry
+            }
+            changes = ["{f}={v}".format(f=f, v=_fmt(v)) for f, v in sorted(kwargs.items())]
+            actions.append(_Action(
+                _Stage.RESOURCE_GROUPS, "create", "resource group", name, changes + _props_diff({}, props)[2],
+                lambda lapi, name=name, kwargs=kwargs, props=props: lapi.resource_group_create(
+                    name, property_dict=props, **kwargs)
+            ))
+        else:
+            kwargs, changes = _rsc_grp_changes(rsc_grp, entry)
+            mod_props, del_props, prop_changes = _props_diff(rsc_grp.properties, desired_props)
+            if changes or prop_changes:
+                actions.append(_Action(
+                    _Stage.RESOURCE_GROUPS, "modify", "resource group", name, changes + prop_changes,
+                    lambda lapi, name=name, kwargs=kwargs, mod_props=mod_props, del_props=del_props:
+                        lapi.resource_group_modify(name, property_dict=mod_props, delete_props=del_props, **kwargs)
+                ))
+
+        if "volume_groups" in entry:
+            actions += _plan_volume_groups(entry, state.volume_groups.get(key[0], {}), prune)
+
+    if prune and "resource_groups" in manifest.sections:
+        for key, rsc_grp in state.resource_groups.items():
+            if key not in {k[0] for k in manifest.resource_groups} and rsc_grp.name != DEFAULT_RSC_GRP:
+                actions.append(_Action(
+                    _Stage.DELETE_RESOURCE_GROUPS, "delete", "resource group", rsc_grp.name, [],
+                    lambda lapi, name=rsc_grp.name: lapi.resource_group_delete(name)
+                ))
+    return actions
+
+
+def _plan_volume_groups(rsc_grp_entry, current_vlm_grps, prune):
+    """
+    :param dict rsc_grp_entry: resource group manifest entry
+    :param dict[int, linstor.responses.VolumeGroup] current_vlm_grps: existing volume groups by number
+    :param bool prune: delete volume groups not in the manifest
+    :rtype: list[_Action]
+    """
+    rsc_grp_name = rsc_grp_entry["name"]
+    actions = []
+    desired_numbers = set()
+    for entry in rsc_grp_entry["volume_groups"]:
+        number = entry["number"]
+        desired_numbers.add(number)
+        obj_name = "{r}/{n}".format(r=rsc_grp_name, n=number)
+        desired_props = _desired_props(entry)
+        vlm_grp = current_vlm_grps.get(number)
+        if vlm_grp is None:
+            props = {k: v for k, v in desired_props.items() if v is not None}
+            actions.append(_Action(
+                _Stage.VOLUME_GROUPS, "create", "volume group", obj_name, _props_diff({}, props)[2],
+                lambda lapi, number=number, props=props: lapi.volume_group_create(
+                    rsc_grp_name, volume_nr=number, property_dict=props)
+            ))
+            continue
+
+        mod_props, del_props, changes = _props_diff(vlm_grp.properties, desired_props)
+        if changes:
+            actions.append(_Action(
+                _Stage.VOLUME_GROUPS, "modify", "volume group", obj_name, changes,
+                lambda lapi, number=number, mod_props=mod_props, del_props=del_props: lapi.volume_group_modify(
+                    rsc_grp_name, number, property_dict=mod_props, delete_props=del_props)
+            ))
+
+    if prune:
+        for number in sorted(set(current_vlm_grps) - desired_numbers):
+            actions.append(_Action(
+                _Stage.DELETE_VOLUME_GROUPS, "delete", "volume group", "{r}/{n}".format(r=rsc_grp_name, n=number), [],
+                lambda lapi, number=number: lapi.volume_group_delete(rsc_grp_name, number)
+            ))
+    return actions
+
+
+def _plan_resource_definitions(manifest, state, prune):
+    actions = []
+    for key, entry in manifest.resource_definitions.items():
+        name = entry["name"]
+        rsc_dfn = state.resource_definitions.get(key[0])
+        rsc_grp = entry.get("resource_group")
+        if rsc_dfn is None:
+            actions.append(_Action(
+                _Stage.RESOURCE_DEFINITIONS, "create", "resource definition", name,
+                ["resource_group=" + rsc_grp] if rsc_grp else [],
+                lambda lapi, name=name, rsc_grp=rsc_grp: lapi.resource_dfn_create(name, resource_group=rsc_grp)
+            ))
+            # properties can only be set once the resource definition exists
+            stage, current_props, current_rsc_grp = _Stage.RESOURCE_DEFINITION_PROPS, {}, rsc_grp
+        else:
+            stage, current_props, current_rsc_grp = \
+                _Stage.RESOURCE_DEFINITIONS, rsc_dfn.properties, rsc_dfn.resource_group_name
+
+        mod_props, del_props, changes = _props_diff(current_props, _desired_props(entry))
+        if rsc_grp and current_rsc_grp and rsc_grp.lower() != current_rsc_grp.lower():
+            changes.insert(0, "resource_group: {c} -> {d}".format(c=current_rsc_grp, d=rsc_grp))
+        else:
+            rsc_grp = None
+        if changes:
+            actions.append(_Action(
+                stage, "modify", "resource definition", name, changes,
+                lambda lapi, name=name, mod_props=mod_props, del_props=del_props, rsc_grp=rsc_grp:
+                    lapi.resource_dfn_modify(name, mod_props, del_props, resource_group=rsc_grp)
+            ))
+
+    if prune and "resource_definitions" in manifest.sections:
+        for key, rsc_dfn in state.resource_definitions.items():
+            if key not in {k[0] for k in manifest.resource_definitions}:
+                actions.append(_Action(
+                    _Stage.DELETE_RESOURCE_DEFINITIONS, "delete", "resource definition", rsc_dfn.name, [],
+                    lambda lapi, name=rsc_dfn.name: lapi.resource_dfn_delete(name)
+                ))
+    return actions
+
+
+def plan(manifest, state, prune=False):
+    """
+    Computes the actions needed to get from the current state to the manifest.
+
+    :param Manifest manifest: desired configuration
+    :param ClusterState state: current configuration, objects keyed by lower case name
+    :param bool prune: also delete objects missing in the manifest sections
+    :return: actions sorted by stage
+    :rtype: list[_Action]
+    """
+    actions = _plan_controller(manifest, state)
+    actions += _plan_nodes(manifest, state, prune)
+    actions += _plan_storage_pools(manifest, state, prune)
+    actions += _plan_resource_groups(manifest, state, prune)
+    actions += _plan_resource_definitions(manifest, state, prune)
+    actions.sort(key=lambda x: x.stage)  # stable, keeps the manifest order within a stage
+    return actions
+
+
+class ApplyCommands(Commands):
+    _plan_headers = [
+        linstor_client.TableHeader("Stage"),
+        linstor_client.TableHeader("Action"),
+        linstor_client.TableHeader("Type"),
+        linstor_client.TableHeader("Name"),
+        linstor_client.TableHeader("Changes")
+    ]
+
+    def __init__(self):
+        super(ApplyCommands, self).__init__()
+
+    def setup_commands(self, parser):
+        p_apply = parser.add_parser(
+            Commands.APPLY,
+            formatter_class=argparse.RawTextHelpFormatter,
+            description="Applies a declarative cluster configuration (json or yaml).\n"
+                        "Only the differences to the current state are sent to the controller, independent\n"
+                        "changes are executed concurrently.\n\n" + inspect.cleandoc(Manifest.__doc__)
+        )
+        p_apply.add_argument(
+            '-f', '--file',
+            type=argparse.FileType('r'),
+            required=True,
+            help="Manifest file, '.yaml' or '.yml' files are read as yaml, everything else as json"
+        )
+        p_apply.add_argument('--dry-run', action='store_true', help="Only print the planned actions")
+        p_apply.add_argument(
+            '--prune',
+            action='store_true',
+            help="Delete objects that are missing in the given manifest sections"
+        )
+        p_apply.add_argument('-p', '--pastable', action="store_true", help='Generate pastable output')
+        self.add_parallel_argument(p_apply)
+        p_apply.set_defaults(func=self.apply)
+
+    def _fetch_state(self, manifest):
+        """
+        Fetches the current state of all object types used in the manifest with concurrent list requests.
+
+        :param Manifest manifest:
+        :rtype: ClusterState
+        """
+        sections = manifest.sections
+        calls = [
+            lambda lapi: lapi.controller_props()[0].properties if "controller" in sections else {},
+            lambda lapi: lapi.node_list_raise().nodes if "nodes" in sections else [],
+            lambda lapi: lapi.storage_pool_list_raise().storage_pools if "storage_pools" in sections else [],
+            lambda lapi: lapi.resource_group_list_raise().resource_groups if "resource_groups" in sections else [],
+            lambda lapi: lapi.resource_dfn_list_raise(query_volume_definitions=False).resource_definitions
+            if "resource_definitions" in sections else []
+        ]
+        ctrl_props, nodes, storage_pools, rsc_grps, rsc_dfns = self.run_concurrent(calls)
+
+        rsc_grps = {x.name.lower(): x for x in rsc_grps}
+        vlm_grp_rgs = [key[0] for key, entry in manifest.resource_groups.items()
+                       if "volume_groups" in entry and key[0] in rsc_grps]
+        vlm_grps = self.run_concurrent(
+            [lambda lapi, rg=rsc_grps[rg].name: lapi.volume_group_list_raise(rg).volume_groups for rg in vlm_grp_rgs]
+        )
+
+        return ClusterState(
+            ctrl_props,
+            {x.name.lower(): x for x in nodes},
+            {(x.node_name.lower(), x.name.lower()): x for x in storage_pools},
+            rsc_grps,
+            {rg: {x.number: x for x in vgs} for rg, vgs in zip(vlm_grp_rgs, vlm_grps)},
+            {x.name.lower(): x for x in rsc_dfns}
+        )
+
+    def _show_plan(self, args, actions, stage_numbers):
+        if args.machine_readable:
+            data = []
+            for action in actions:
+                action_data = action.data
+                action_data["stage"] = stage_numbers[action.stage]
+                data.append(action_data)
+            print(json.dumps(data, indent=2))
+            return
+
+        if not actions:
+            print("No changes.")
+            return
+
+        tbl = linstor_client.Table(utf8=not args.no_utf8, colors=not args.no_color, pastable=args.pastable)
+        tbl.add_headers(ApplyCommands._plan_headers)
+        for action in actions:
+            tbl.add_row([
+                stage_numbers[action.stage], action.verb, action.obj_type, action.obj_name, "\n".join(action.changes)
+            ])
+        tbl.show()
+
+    def apply(self, args):
+        manifest = Manifest.load(args.file)
+        actions = plan(manifest, self._fetch_state(manifest), args.prune)
+        stage_numbers = {stage: idx + 1 for idx, stage in enumerate(sorted({x.stage for x in actions}))}
+
+        if args.dry_run:
+            self._show_plan(args, actions, stage_numbers)
+            return ExitCode.OK
+
+        if not actions:
+            if not args.machine_readable:
+                print("No changes.")
+            return ExitCode.OK
+
+        rc = ExitCode.OK
+        all_replies = []
+        for stage in sorted(stage_numbers):
+            stage_actions = [x for x in actions if x.stage == stage]
+            replies = self.fan_out(args, [x.call for x in stage_actions])
+            all_replies += replies
+            if not args.machine_readable:
+                stage_rc = self.handle_replies(args, replies)
+                if stage_rc != ExitCode.OK:
+                    rc = stage_rc
+            if any(reply.is_error() for reply in replies):
+                skipped = len([x for x in actions if x.stage > stage])
+                if skipped:
+                    sys.stderr.write("Stage {s} failed, skipped {n} remaining actions.\n".format(
+                        s=stage_numbers[stage], n=skipped))
+                rc = ExitCode.API_ERROR
+                break
+
+        if args.machine_readable:
+            self.handle_replies(args, all_replies)
+        return rc
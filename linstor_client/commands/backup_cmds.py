@@ -329,6 +329,7 @@ class BackupCommands(Commands):
             action="store_true",
             help="Inverts the table by listing the backups and on which nodes they are queued instead of"
                  "the nodes with all backups queued on them")
+        self.add_watch_arguments(p_lstqueue)
         p_lstqueue.set_defaults(func=self.queue_list)
 
         # ship backup
@@ -611,14 +612,19 @@ class BackupCommands(Commands):
         return self.output_list(args, lstmsg, BackupCommands.show_backups, machine_readable_raw=True)
 
     def queue_list(self, args):
-        lstmsg = self.get_linstorapi().backup_queue_list(
-            nodes=args.nodes,
-            snaps=args.snaps,
-            rscs=args.rscs,
-            remotes=args.remotes,
-            snap_to_node=args.snap_to_node
-        )
-        return self.output_list(args, lstmsg, BackupCommands.show_queue, machine_readable_raw=True)
+        def fetch():
+            return self.get_linstorapi().backup_queue_list(
+                nodes=args.nodes,
+                snaps=args.snaps,
+                rscs=args.rscs,
+                remotes=args.remotes,
+                snap_to_node=args.snap_to_node
+            )
+        if args.watch is not None:
+            # rows are keyed by node or by resource, snapshot and remote
+            key_columns = 3 if args.snap_to_node else 1
+            return self.watch_list(args, fetch, BackupCommands.show_queue, key_columns, machine_readable_raw=True)
+        return self.output_list(args, fetch(), BackupCommands.show_queue, machine_readable_raw=True)
 
     @classmethod
     def show_queue(cls, args, lstmsg):
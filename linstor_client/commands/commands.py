@@ -1,8 +1,11 @@
 import linstor_client.argparse.argparse as argparse
+import contextlib
 import getpass
+import io
 import json
 import re
 import sys
+import time
 from datetime import datetime, timedelta
 
 import linstor
@@ -10,7 +13,11 @@ import linstor.sharedconsts as apiconsts
 from linstor.properties import properties
 from linstor import SizeCalc, Config
 import linstor_client
-from linstor_client.utils import LinstorClientError, Output
+from linstor_client.export import JsonStream, is_export, json_input_file
+from linstor_client.jobs import Journal, journal_path
+from linstor_client.parallel import ConnectionPool
+from linstor_client.utils import LinstorClientError, Output, Progress, ReportAggregator, rangecheck
+from linstor_client.watch import TableWatch
 from linstor_client.consts import ExitCode, Color
 from linstor.sharedconsts import KEY_STOR_POOL_MAX_OVERSUBSCRIPTION_RATIO
 
@@ -38,6 +45,71 @@ class DefaultState(object):
         return False
 
 
+class TransactionStage(object):
+    """
+    Commit order of the queued operations, the operations of a stage only depend on earlier stages.
+    """
+    RESOURCE_DEFINITIONS = 0
+    NODE_PROPS = 0
+    VOLUME_DEFINITIONS = 1
+    RESOURCE_DEFINITION_PROPS = 1
+    VOLUME_DEFINITION_PROPS = 2
+    RESOURCES = 3
+    RESOURCE_PROPS = 4
+    SNAPSHOTS = 5
+
+
+class TransactionOperation(object):
+    def __init__(self, stage, verb, obj_type, obj_name, call, resource_definition=None):
+        """
+
+        :param int stage: commit stage, see TransactionStage
+        :param str verb: e.g. create or set-property
+        :param str obj_type: object type
+        :param str obj_name: object name
+        :param Callable[[linstor.Linstor], list[ApiCallResponse]] call: executes the operation
+        :param Optional[str] resource_definition: resource definition the operation changes, operations on the same
+            resource definition are executed in queue order
+        """
+        self.stage = stage
+        self.verb = verb
+        self.obj_type = obj_type
+        self.obj_name = obj_name
+        self.call = call
+        self.resource_definition = resource_definition
+
+
+class TransactionState(object):
+    """
+    Collects create, set-property and snapshot commands until the transaction is committed. Commands that
+    support transactions check for this state and queue their request instead of sending it.
+    """
+    def __init__(self, terminate_on_error):
+        self.operations = []
+        self._terminate_on_error = terminate_on_error
+
+    @property
+    def name(self):
+        return 'Transaction'
+
+    @property
+    def prompt(self):
+        return self.name
+
+    @property
+    def terminate_on_error(self):
+        return self._terminate_on_error
+
+    def queue(self, operation):
+        """
+        :param TransactionOperation operation: operation to execute on commit
+        :return: exit code for the queuing command
+        """
+        self.operations.append(operation)
+        print("{v} {t} {n} added to transaction".format(v=operation.verb, t=operation.obj_type, n=operation.obj_name))
+        return ExitCode.OK
+
+
 class Commands(object):
     CONTROLLER = 'controller'
     CRYPT = 'encryption'
@@ -49,6 +121,7 @@ class Commands(object):
     LIST_COMMANDS = 'list-commands'
     NODE = 'node'
     NODE_CONN = 'node-connection'
+    REFRESH = 'refresh'
     RESOURCE = 'resource'
     VOLUME = 'volume'
     RESOURCE_CONN = 'resource-connection'
@@ -69,6 +142,12 @@ class Commands(object):
     FILE = "file"
     SCHEDULE = "schedule"
     KEY_VALUE_STORE = "key-value-store"
+    APPLY = "apply"
+    EXPORT = "export"
+    TOP = "top"
+    EVENTS = "events"
+    JOBS = "jobs"
+    TRANSACTION = "transaction"
 
     MainList = [
         CONTROLLER,
@@ -97,12 +176,19 @@ class Commands(object):
         REMOTE,
         FILE,
         SCHEDULE,
-        KEY_VALUE_STORE
+        KEY_VALUE_STORE,
+        APPLY,
+        EXPORT,
+        TOP,
+        EVENTS,
+        JOBS,
+        TRANSACTION
     ]
     Hidden = [
         DMMIGRATE,
         EXIT,
-        GEN_ZSH_COMPLETER
+        GEN_ZSH_COMPLETER,
+        REFRESH
     ]
 
     EFFECTIVE_PROPS_TYPES = {
@@ -117,6 +203,10 @@ class Commands(object):
         self._linstor = None  # type: Optional[linstor.Linstor]
         # _linstor_completer is just here as a cache for completer calls
         self._linstor_completer = None  # type: Optional[linstor.Linstor]
+        # set by the cli after connecting, used to issue independent requests concurrently
+        self._linstor_pool = None  # type: Optional[linstor_client.parallel.ConnectionPool]
+        # set by the cli, commands that support transactions check its state
+        self._state_service = None
 
     class Subcommands(object):
 
@@ -180,6 +270,10 @@ class Commands(object):
             LONG = "set-property"
             SHORT = "sp"
 
+        class SetPropertyBulk(object):
+            LONG = "set-property-bulk"
+            SHORT = "spb"
+
         class EnterPassphrase(object):
             LONG = "enter-passphrase"
             SHORT = "ep"
@@ -228,6 +322,10 @@ class Commands(object):
             LONG = "set-size"
             SHORT = "size"
 
+        class SetSizeBulk(object):
+            LONG = "set-size-bulk"
+            SHORT = "ssb"
+
         class QueryMaxVlmSize(object):
             LONG = "query-max-volume-size"
             SHORT = "qmvs"
@@ -340,6 +438,14 @@ class Commands(object):
             LONG = "set-log-level"
             SHORT = "setloglevel"
 
+        class Status(object):
+            LONG = "status"
+            SHORT = "st"
+
+        class Wait(object):
+            LONG = "wait"
+            SHORT = "w"
+
         @staticmethod
         def generate_desc(subcommands):
             """
@@ -805,6 +911,281 @@ class Commands(object):
         self._linstor_completer.connect()
         return self._linstor_completer
 
+    def run_concurrent(self, calls, max_workers=None):
+        """
+        Executes independent api calls concurrently, each call gets a linstor.Linstor object as only argument.
+        Without a connection pool the calls are executed one after another.
+
+        :param list[Callable[[linstor.Linstor], Any]] calls: calls to execute
+        :param Optional[int] max_workers: maximal number of concurrent requests
+        :return: results of the calls in call order
+        :rtype: list[Any]
+        """
+        if self._linstor_pool:
+            return self._linstor_pool.run(calls, max_workers)
+        lapi = self.get_linstorapi()
+        return [call(lapi) for call in calls]
+
+    @classmethod
+    def load_from_file(cls, stream, section):
+        """
+        Reads the data given with --from-file, either the raw list data of a machine readable list command or
+        the matching section of a cluster export.
+
+        :param stream: opened --from-file argument
+        :param str section: export section holding the data of the command
+        :return: raw list data
+        """
+        return cls._load_from_file(JsonStream(stream), section)
+
+    @classmethod
+    def _load_from_file(cls, json_stream, section):
+        try:
+            data = json_stream.load()
+        except ValueError as err:
+            raise LinstorClientError("Unable to parse --from-file data: {e}".format(e=err), ExitCode.ARGPARSE_ERROR)
+        if is_export(data):
+            if section not in data["data"]:
+                raise LinstorClientError(
+                    "Export does not contain section '{s}'".format(s=section), ExitCode.OBJECT_NOT_FOUND)
+            return data["data"][section]
+        return data
+
+    @classmethod
+    def _print_machine_readable_items(cls, items):
+        """
+        Prints the items in the format _print_machine_readable uses for a single v1 list reply, but one item at
+        a time as they are decoded.
+        """
+        sep = "[\n  [\n"
+        for item in items:
+            sys.stdout.write(sep + "\n".join("    " + line for line in cls._to_json(item).splitlines()))
+            sep = ",\n"
+        print("[\n  []\n]" if sep.startswith("[") else "\n  ]\n]")
+
+    def output_from_file(self, args, section, response_class, output_func):
+        """
+        output_list for the data given with --from-file. Top level arrays are printed while they are read if
+        v1 machine readable output is requested, otherwise the list is built before it is passed to output_func.
+
+        :param args: parsed arguments with a from_file stream
+        :param str section: export section holding the data of the command
+        :param response_class: linstor.responses class wrapping the raw list data
+        :param output_func: show function of the command
+        """
+        json_stream = JsonStream(args.from_file)
+        if args.machine_readable and args.output_version == "v1" and json_stream.is_array():
+            try:
+                self._print_machine_readable_items(json_stream)
+            except ValueError as err:
+                raise LinstorClientError(
+                    "Unable to parse --from-file data: {e}".format(e=err), ExitCode.ARGPARSE_ERROR)
+            return ExitCode.OK
+        return self.output_list(args, [response_class(self._load_from_file(json_stream, section))], output_func)
+
+    @classmethod
+    def add_watch_arguments(cls, parser):
+        parser.add_argument(
+            '--watch',
+            nargs='?',
+            const=2.0,
+            type=float,
+            metavar='INTERVAL',
+            help='Repeat the list every INTERVAL seconds (default: 2) and mark the rows that changed'
+        )
+        parser.add_argument(
+            '--changes-only',
+            action="store_true",
+            help='With --watch only print the rows that were added (+), removed (-) or changed (~)'
+        )
+
+    def watch_list(self, args, fetch, output_func, key_columns, **kwargs):
+        """
+        output_list repeated every --watch seconds on the same connection, the output is redrawn incrementally.
+        Ticks that fetched unchanged data are not rendered again.
+
+        :param args: parsed arguments with watch and changes_only
+        :param Callable[[], list] fetch: returns the replies to show
+        :param output_func: show function of the command
+        :param int key_columns: number of leading table columns that identify a row
+        :param kwargs: additional output_list arguments
+        """
+        if args.machine_readable or args.curl or getattr(args, "from_file", None):
+            raise ArgumentError("--watch can not be combined with machine readable output, --curl or --from-file")
+        if args.watch <= 0:
+            raise ArgumentError("--watch interval has to be greater than 0")
+
+        lapi = self.get_linstorapi()
+        watch = TableWatch(
+            "Every {i:g}s".format(i=args.watch),
+            key_columns,
+            changes_only=args.changes_only,
+            colors=not args.no_color
+        )
+        last_change_count = None
+        try:
+            while True:
+                replies = fetch()
+                change_count = getattr(lapi, "change_count", None)
+                if change_count is None or change_count != last_change_count:
+                    out = io.StringIO()
+                    with contextlib.redirect_stdout(out):
+                        self.output_list(args, replies, output_func, **kwargs)
+                    watch.update(out.getvalue())
+                    last_change_count = change_count
+                time.sleep(args.watch)
+        except KeyboardInterrupt:
+            sys.stdout.write("\n")
+        return ExitCode.OK
+
+    @classmethod
+    def add_parallel_argument(cls, parser):
+        parser.add_argument(
+            '--parallel',
+            type=rangecheck(1, 256),
+            metavar='N',
+            help='Maximal number of requests sent to the controller at the same time (default: {d})'.format(
+                d=ConnectionPool.DEFAULT_SIZE)
+        )
+
+    def fan_out(self, args, calls):
+        """
+        Executes one api call per object concurrently, limited by the --parallel argument.
+
+        :param args: argparse arguments
+        :param list[Callable[[linstor.Linstor], list[ApiCallResponse]]] calls: calls to execute
+        :return: replies of all calls flattened, in call order
+        :rtype: list[ApiCallResponse]
+        """
+        results = self.run_concurrent(calls, getattr(args, 'parallel', None))
+        return [reply for replies in results for reply in replies]
+
+    def open_transaction(self):
+        """
+        :return: the transaction commands are queued in, None if no transaction is open
+        :rtype: Optional[TransactionState]
+        """
+        current_state = self._state_service.get_state() if self._state_service else DefaultState()
+        return current_state if current_state.__class__ == TransactionState else None
+
+    def send_or_queue(self, args, operation):
+        """
+        Queues the operation if a transaction is open, otherwise sends it and prints the replies.
+
+        :param args: argparse arguments
+        :param TransactionOperation operation: the request of the command
+        :return: exit code
+        """
+        transaction = self.open_transaction()
+        if transaction:
+            return transaction.queue(operation)
+        return self.handle_replies(args, operation.call(self.get_linstorapi()))
+
+    def record_jobs(self, args, submitted):
+        """
+        Adds the operations of an --async submission that the controller accepted to the local job journal.
+        Operations sent in the same request are paired with the same replies. A journal that can't be written only
+        causes a warning, the operations are submitted already.
+
+        :param args: argparse arguments
+        :param list[(linstor_client.jobs.Job, list[ApiCallResponse])] submitted: operations with the replies of
+            their request
+        """
+        if args.curl:
+            return
+        jobs = [job for job, replies in submitted if linstor.Linstor.all_api_responses_no_error(replies)]
+        if not jobs:
+            return
+        journal = Journal(journal_path(self.get_linstorapi().controller_host()))
+        try:
+            journal.add(jobs)
+        except (IOError, OSError) as err:
+            sys.stderr.write("Warning: could not record the job(s) in {p}: {e}\n".format(p=journal.path, e=err))
+
+    @classmethod
+    def add_bulk_select_arguments(cls, parser, property_object):
+        """
+        Adds the key/value and the selector arguments shared by all set-property-bulk commands.
+        """
+        Commands.add_parser_keyvalue(parser, property_object)
+        parser.add_argument(
+            '--name-regex',
+            type=str,
+            help='Select objects whose name fully matches the regular expression (case insensitive)'
+        )
+        parser.add_argument(
+            '--props',
+            nargs='+',
+            type=str,
+            help='Select objects by their properties (KEY or KEY=VALUE)'
+        )
+        cls.add_parallel_argument(parser)
+
+    @classmethod
+    def filter_by_name_regex(cls, names, name_regex):
+        """
+        :param list[str] names: object names
+        :param Optional[str] name_regex: regular expression the names have to match, None selects all names
+        :return: the matching names
+        :rtype: list[str]
+        """
+        if name_regex is None:
+            return names
+        try:
+            pattern = re.compile(name_regex, re.IGNORECASE)
+        except re.error as err:
+            raise ArgumentError("Invalid --name-regex '{r}': {e}".format(r=name_regex, e=err))
+        return [name for name in names if pattern.fullmatch(name)]
+
+    def bulk_modify(self, args, obj_names, modify_call, obj_type):
+        """
+        Applies a modification to all selected objects concurrently, limited by the --parallel argument.
+
+        Success replies are only counted, all other replies are printed once per distinct message together
+        with the objects that reported them.
+
+        :param args: argparse arguments
+        :param list[str] obj_names: names of the selected objects
+        :param Callable[[linstor.Linstor, str], list[ApiCallResponse]] modify_call: modifies a single object
+        :param str obj_type: plural object type used in the output, e.g. "resource definitions"
+        :return: exit code
+        :rtype: int
+        """
+        if not obj_names:
+            sys.stderr.write("No {t} matched the selection.\n".format(t=obj_type))
+            return ExitCode.OK
+
+        progress = Progress(obj_type, len(obj_names)) if not args.machine_readable else None
+
+        def modify(lapi, obj_name):
+            replies = modify_call(lapi, obj_name)
+            if progress:
+                progress.step()
+            return replies
+
+        results = self.run_concurrent(
+            [lambda lapi, obj_name=obj_name: modify(lapi, obj_name) for obj_name in obj_names],
+            args.parallel
+        )
+        if progress:
+            progress.finish()
+
+        if args.machine_readable:
+            return self.handle_replies(args, [reply for replies in results for reply in replies])
+
+        reports = ReportAggregator()
+        failed = 0
+        for obj_name, replies in zip(obj_names, results):
+            if any(reply.is_error() for reply in replies):
+                failed += 1
+            for reply in replies:
+                if not reply.is_success():
+                    reports.add(reply, obj_name)
+
+        rc = reports.print_reports(args.no_color, args.warn_as_error, sys.stdout)
+        print("Modified {m} of {t} {o}.".format(m=len(obj_names) - failed, t=len(obj_names), o=obj_type))
+        return rc
+
     def node_completer(self, prefix, **kwargs):
         lapi = self.get_linstorapi(**kwargs)
         possible = set()
@@ -1063,7 +1444,37 @@ class Commands(object):
 
         return size
 
-    def _show_query_max_volume(self, args, lstmsg):
+    def _query_max_volume_size(self, args, qmvs_call):
+        """
+        Executes the given max volume size query concurrently with the storage pool definition list
+        needed to show the oversubscription ratio of the candidates.
+
+        :param args: argparse arguments
+        :param Callable[[linstor.Linstor], list] qmvs_call: call issuing the max volume size query
+        :return: the qmvs replies and storage pool definitions indexed by name
+        :rtype: (list, dict[str, StoragePoolDefinition])
+        """
+        if args.machine_readable or args.curl:
+            # the storage pool definitions are only needed for the table
+            return qmvs_call(self.get_linstorapi()), {}
+
+        replies, storage_pool_dfn_replies = self.run_concurrent([
+            qmvs_call,
+            lambda lapi: lapi.storage_pool_dfn_list()
+        ])
+        storage_pool_dfns = {}
+        if storage_pool_dfn_replies and not self.check_for_api_replies(storage_pool_dfn_replies):
+            storage_pool_dfns = {x.name: x for x in storage_pool_dfn_replies[0].storage_pool_definitions}
+        return replies, storage_pool_dfns
+
+    @classmethod
+    def _show_query_max_volume(cls, args, lstmsg, storage_pool_dfns):
+        """
+
+        :param args: argparse arguments
+        :param lstmsg: max volume size response
+        :param dict[str, StoragePoolDefinition] storage_pool_dfns: storage pool definitions by name
+        """
         tbl = linstor_client.Table(utf8=not args.no_utf8, colors=not args.no_color, pastable=args.pastable)
         tbl.add_column("StoragePool")
         tbl.add_column("MaxVolumeSize", just_txt='>')
@@ -1082,12 +1493,11 @@ class Commands(object):
 
             return s
 
-        storage_pool_dfns = self.get_linstorapi().storage_pool_dfn_list()[0].storage_pool_definitions
-
         for candidate in lstmsg.candidates:
             max_vlm_size = SizeCalc.approximate_size_string(candidate.max_volume_size)
 
-            storage_pool_props = [x for x in storage_pool_dfns if x.name == candidate.storage_pool][0].properties
+            storage_pool_dfn = storage_pool_dfns.get(candidate.storage_pool)
+            storage_pool_props = storage_pool_dfn.properties if storage_pool_dfn else {}
             max_oversubscription_ratio = float(storage_pool_props.get(
                 KEY_STOR_POOL_MAX_OVERSUBSCRIPTION_RATIO, lstmsg.default_max_oversubscription_ratio))
 
@@ -1272,7 +1682,7 @@ class MiscCommands(Commands):
         )
         c_spc_report_query.add_argument(
             '--from-file',
-            type=argparse.FileType('r'),
+            type=json_input_file,
             help="Read data to display from the given json file",
         )
         c_spc_report_query.set_defaults(func=self.cmd_spc_report_query)
@@ -1363,7 +1773,6 @@ class MiscCommands(Commands):
 
     def cmd_spc_report_query(self, args):
         if args.from_file:
-            reply = [linstor.responses.SpaceReport(json.load(args.from_file))]
-        else:
-            reply = self.get_linstorapi().space_reporting_query()
+            return self.output_from_file(args, None, linstor.responses.SpaceReport, self.show_space_report)
+        reply = self.get_linstorapi().space_reporting_query()
         return self.output_list(args, reply, self.show_space_report)
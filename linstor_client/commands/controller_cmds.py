@@ -8,6 +8,7 @@ from linstor_client.commands import Commands, DrbdOptions
 
 class ControllerCommands(Commands):
     OBJECT_NAME = 'controller'
+    PROPS_BATCH_API_VERSION = "1.2.0"
 
     def __init__(self):
         super(ControllerCommands, self).__init__()
@@ -52,6 +53,7 @@ class ControllerCommands(Commands):
             formatter_class=argparse.RawTextHelpFormatter,
             description='Set a controller config property.')
         Commands.add_parser_keyvalue(c_set_ctrl_props, "controller")
+        self.add_parallel_argument(c_set_ctrl_props)
         c_set_ctrl_props.set_defaults(func=self.set_props)
 
         c_drbd_opts = con_subp.add_parser(
@@ -60,6 +62,7 @@ class ControllerCommands(Commands):
             description=DrbdOptions.description("drbd")
         )
         DrbdOptions.add_arguments(c_drbd_opts, self.OBJECT_NAME)
+        self.add_parallel_argument(c_drbd_opts)
         c_drbd_opts.set_defaults(func=self.cmd_controller_drbd_opts)
 
         # Controller - set-log-level
@@ -171,16 +174,70 @@ class ControllerCommands(Commands):
 
         return self.output_props_list(args, lstmsg, self._props_list)
 
+    @classmethod
+    def _modify_props_calls(cls, lapi, mod_props, del_props):
+        """
+        Returns the requests that set and delete the given controller properties.
+
+        All changes are sent in one request, controllers with a rest api older than PROPS_BATCH_API_VERSION
+        get one request per key.
+
+        :param linstor.Linstor lapi: linstor api object used to check the rest api version
+        :param dict[str, str] mod_props: properties to set
+        :param list[str] del_props: property keys to delete
+        :return: calls that each send one request
+        :rtype: list[Callable[[linstor.Linstor], list[ApiCallResponse]]]
+        """
+        if not mod_props and not del_props:
+            return []
+
+        if not lapi.api_version_smaller(cls.PROPS_BATCH_API_VERSION):
+            body = {}
+            if mod_props:
+                body["override_props"] = mod_props
+            if del_props:
+                body["delete_props"] = del_props
+            return [lambda lapi: lapi._rest_request(
+                linstor.consts.API_SET_CTRL_PROP, "POST", "/v1/controller/properties", body)]
+
+        calls = [lambda lapi, key=key, val=val: lapi.controller_set_prop(key, val) for key, val in mod_props.items()]
+        calls += [lambda lapi, key=key: lapi.controller_del_prop(key) for key in del_props]
+        return calls
+
+    @classmethod
+    def _controller_modify_props(cls, lapi, mod_props, del_props):
+        """
+        Sets and deletes the given controller properties, see _modify_props_calls.
+
+        :param linstor.Linstor lapi: linstor api object
+        :param dict[str, str] mod_props: properties to set
+        :param list[str] del_props: property keys to delete
+        :return: replies of all requests
+        :rtype: list[ApiCallResponse]
+        """
+        replies = []
+        for call in cls._modify_props_calls(lapi, mod_props, del_props):
+            replies += call(lapi)
+        return replies
+
+    def _modify_props(self, args, mod_props, del_props):
+        """
+        Sets and deletes the given controller properties, the per-key requests of older controllers are sent
+        concurrently.
+
+        :param args: argparse arguments
+        :param dict[str, str] mod_props: properties to set
+        :param list[str] del_props: property keys to delete
+        :return: replies of all requests
+        :rtype: list[ApiCallResponse]
+        """
+        return self.fan_out(args, self._modify_props_calls(self.get_linstorapi(), mod_props, del_props))
+
     def set_props(self, args):
         args = self._attach_aux_prop(args)
         props = Commands.parse_key_value_pairs([(args.key, args.value)])
 
-        replies = []
-        for prop_key, prop_value in props['pairs'].items():
-            replies.extend(self._linstor.controller_set_prop(prop_key, prop_value))
-        for prop_key in props['delete']:
-            replies.extend(self._linstor.controller_del_prop(prop_key))
-
+        replies = self._modify_props(args, props['pairs'], props['delete'])
         return self.handle_replies(args, replies)
 
     def cmd_controller_drbd_opts(self, args):
@@ -188,13 +245,7 @@ class ControllerCommands(Commands):
 
         mod_props, del_props = DrbdOptions.parse_opts(a, self.OBJECT_NAME)
 
-        replies = []
-        for prop, val in mod_props.items():
-            replies.extend(self._linstor.controller_set_prop(prop, val))
-
-        for delkey in del_props:
-            replies.extend(self._linstor.controller_del_prop(delkey))
-
+        replies = self._modify_props(args, mod_props, del_props)
         return self.handle_replies(args, replies)
 
     def cmd_controller_set_log_level(self, args):
@@ -215,21 +266,25 @@ class ControllerCommands(Commands):
                 print("linstor controller " + version_info[2] + "; GIT-hash: " + version_info[3])
 
     def query_max_volume_size(self, args):
-        replies = self.get_linstorapi().storage_pool_dfn_max_vlm_sizes(
-            args.replica_count,
-            args.storage_pool,
-            args.do_not_place_with,
-            args.do_not_place_with_regex,
-            [linstor.consts.NAMESPC_AUXILIARY + '/' + x for x in args.replicas_on_same],
-            [linstor.consts.NAMESPC_AUXILIARY + '/' + x for x in args.replicas_on_different],
-            self.prepare_argparse_dict_str_int(args.x_replicas_on_different, linstor.consts.NAMESPC_AUXILIARY + '/')
+        replies, storage_pool_dfns = self._query_max_volume_size(
+            args,
+            lambda lapi: lapi.storage_pool_dfn_max_vlm_sizes(
+                args.replica_count,
+                args.storage_pool,
+                args.do_not_place_with,
+                args.do_not_place_with_regex,
+                [linstor.consts.NAMESPC_AUXILIARY + '/' + x for x in args.replicas_on_same],
+                [linstor.consts.NAMESPC_AUXILIARY + '/' + x for x in args.replicas_on_different],
+                self.prepare_argparse_dict_str_int(
+                    args.x_replicas_on_different, linstor.consts.NAMESPC_AUXILIARY + '/')
+            )
         )
 
         api_responses = self.get_linstorapi().filter_api_call_response(replies)
         if api_responses:
             return self.handle_replies(args, api_responses)
 
-        return self.output_list(args, replies, self._show_query_max_volume)
+        return self.output_list(args, replies, lambda a, m: self._show_query_max_volume(a, m, storage_pool_dfns))
 
     def which_controller(self, args):
         ctrl_uri = self.get_linstorapi().controller_host()
@@ -0,0 +1,169 @@
+import queue
+import socket
+import sys
+import threading
+
+import linstor
+
+import linstor_client.argparse.argparse as argparse
+from linstor_client.commands import ArgumentError, Commands
+from linstor_client.consts import ExitCode
+from linstor_client.events import DEFAULT_RETRY_MS, STREAMS, event_matches, event_record, parse_sse, to_ndjson
+
+try:
+    from http.client import HTTPException
+except ImportError:
+    from httplib import HTTPException
+
+
+class EventsCommands(Commands):
+    # seconds without any data until a quiet stream is requested again, replaces the request timeout
+    STREAM_READ_TIMEOUT = 3600
+
+    def __init__(self):
+        super(EventsCommands, self).__init__()
+
+    def setup_commands(self, parser):
+        p_events = parser.add_parser(
+            Commands.EVENTS,
+            description="Subscribes to the event streams of the controller and prints every event as one json\n"
+                        "object per line (NDJSON) with the fields stream, event, id and data.\n"
+                        "Lost connections are reestablished, the controller is asked to resend missed events.",
+            formatter_class=argparse.RawTextHelpFormatter
+        )
+        p_events.add_argument(
+            '-s', '--streams',
+            nargs='+',
+            choices=list(STREAMS),
+            help="Streams to subscribe to (default: all)"
+        )
+        p_events.add_argument(
+            '-r', '--resources',
+            nargs='+',
+            type=str,
+            help='Only print events of these resources').completer = self.resource_completer
+        p_events.add_argument(
+            '-n', '--nodes',
+            nargs='+',
+            type=str,
+            help='Only print events of these nodes').completer = self.node_completer
+        p_events.add_argument(
+            '--count',
+            type=int,
+            metavar='N',
+            help='Exit after N events were printed'
+        )
+        p_events.add_argument(
+            '--output',
+            type=argparse.FileType('a'),
+            metavar='FILE',
+            help="Append the events to FILE instead of printing them, e.g. a named pipe of a consumer"
+        )
+        p_events.set_defaults(func=self.events)
+
+    @classmethod
+    def _subscribe(cls, lapi, stream, received, stop):
+        """
+        Reads one event stream until stop is set and puts (stream, event) tuples into received. On connection
+        problems the stream is requested again after the retry time, a stream that stayed quiet for
+        STREAM_READ_TIMEOUT seconds is requested again right away. If the controller refuses the stream
+        (stream, error) is put and the thread ends.
+
+        :param linstor.Linstor lapi: connection used only by this stream
+        :param str stream: stream name
+        :param queue.Queue received: events for the main thread
+        :param threading.Event stop: set by the main thread when it is done
+        """
+        path = STREAMS[stream]
+        retry = DEFAULT_RETRY_MS
+        last_id = None
+        reconnect = False
+        while not stop.is_set():
+            try:
+                if reconnect:
+                    lapi.disconnect()
+                    lapi.connect()
+                reconnect = True
+                if last_id is not None:
+                    lapi._http_headers["Last-Event-ID"] = last_id
+                # the stream connection waits longer than the request timeout for data
+                lapi._rest_conn.timeout = cls.STREAM_READ_TIMEOUT
+                if lapi._rest_conn.sock is not None:
+                    lapi._rest_conn.sock.settimeout(cls.STREAM_READ_TIMEOUT)
+                response = lapi._rest_request_base("events", "GET", path)
+                if response.status != 200:
+                    lapi._handle_response_error(response, "GET", path, raise_error=True)
+                for sse_event in parse_sse(iter(response.readline, b"")):
+                    if sse_event.retry is not None:
+                        retry = sse_event.retry
+                    if sse_event.id is not None:
+                        last_id = sse_event.id
+                    received.put((stream, sse_event))
+            except (linstor.LinstorTimeoutError, socket.timeout):
+                # no events for a while, not an interruption
+                continue
+            except (linstor.LinstorNetworkError, socket.error, HTTPException):
+                pass
+            except linstor.LinstorError as err:
+                received.put((stream, err))
+                return
+            if not stop.is_set():
+                sys.stderr.write("Event stream '{s}' interrupted, reconnecting\n".format(s=stream))
+            stop.wait(retry / 1000.0)
+
+    def events(self, args):
+        if args.machine_readable:
+            raise ArgumentError("events are always printed as json, -m is not needed")
+        if args.count is not None and args.count < 1:
+            raise ArgumentError("--count has to be at least 1")
+
+        streams = args.streams or list(STREAMS)
+        if args.curl:
+            for stream in streams:
+                self.get_linstorapi()._rest_request_base("events", "GET", STREAMS[stream])
+            return ExitCode.OK
+
+        out = args.output or sys.stdout
+        received = queue.Queue()
+        stop = threading.Event()
+        connections = []
+        threads = []
+        rc = ExitCode.OK
+        printed = 0
+        try:
+            for stream in streams:
+                lapi = self._linstor_pool.dedicated() if self._linstor_pool else self.get_linstorapi()
+                connections.append(lapi)
+                thread = threading.Thread(target=self._subscribe, args=(lapi, stream, received, stop))
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+
+            while any(x.is_alive() for x in threads) or not received.empty():
+                try:
+                    stream, item = received.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if isinstance(item, Exception):
+                    sys.stderr.write("Error: event stream '{s}': {e}\n".format(s=stream, e=item))
+                    rc = ExitCode.API_ERROR
+                    continue
+                record = event_record(stream, item)
+                if not event_matches(record, args.resources, args.nodes):
+                    continue
+                out.write(to_ndjson(record) + "\n")
+                out.flush()
+                printed += 1
+                if args.count and printed >= args.count:
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop.set()
+            if args.output:
+                args.output.close()
+            # interrupts the blocking reads of the stream threads
+            for lapi in connections:
+                if lapi is not self.get_linstorapi():
+                    lapi.disconnect()
+        return rc
@@ -0,0 +1,135 @@
+import sys
+import time
+
+import linstor
+from linstor.responses import ApiCallResponse
+
+import linstor_client.argparse.argparse as argparse
+from linstor_client.commands import ArgumentError, Commands
+from linstor_client.consts import VERSION, ExitCode
+from linstor_client.export import COMPRESSIONS, write_export, write_export_file
+
+
+def _list_data(replies):
+    """
+    Returns the raw data of a list reply, used for api calls that return a list of replies instead of raising.
+    """
+    errors = [x for x in replies if isinstance(x, ApiCallResponse) and x.is_error()]
+    if errors:
+        raise linstor.LinstorApiCallError(errors[0], errors)
+    if not replies:
+        raise linstor.LinstorError("No list response received.")
+    return replies[0].data_v1
+
+
+class ExportCommands(Commands):
+    # section name -> list call, sections are written in this order
+    SECTIONS = [
+        ("controller_version", lambda lapi: lapi.controller_version().data_v1),
+        ("controller_props", lambda lapi: _list_data(lapi.controller_props())),
+        ("nodes", lambda lapi: lapi.node_list_raise().data_v1),
+        ("storage_pool_definitions", lambda lapi: _list_data(lapi.storage_pool_dfn_list())),
+        ("storage_pools", lambda lapi: lapi.storage_pool_list_raise().data_v1),
+        ("resource_groups", lambda lapi: lapi.resource_group_list_raise().data_v1),
+        ("resource_definitions", lambda lapi: lapi.resource_dfn_list_raise().data_v1),
+        ("resources", lambda lapi: lapi.resource_list_raise().data_v1),
+        ("snapshots", lambda lapi: lapi.snapshot_dfn_list_raise().data_v1),
+        ("remotes", lambda lapi: _list_data(lapi.remote_list())),
+        ("schedules", lambda lapi: lapi.schedule_list().data_v1),
+        ("key_value_stores", lambda lapi: lapi.keyvaluestores().data_v1)
+    ]
+
+    def __init__(self):
+        super(ExportCommands, self).__init__()
+
+    def setup_commands(self, parser):
+        p_export = parser.add_parser(
+            Commands.EXPORT,
+            description="Writes all cluster objects known to the client into one json file.\n"
+                        "The lists are fetched concurrently, sections that could not be fetched are listed\n"
+                        "under 'errors'. Each section can be used as input for the --from-file options.",
+            formatter_class=argparse.RawTextHelpFormatter
+        )
+        p_export.add_argument(
+            'file',
+            help="Output file, '-' writes to stdout. Files ending in {e} are compressed accordingly".format(
+                e=", ".join(ext for ext, _ in COMPRESSIONS.values()))
+        )
+        p_export.add_argument(
+            '--compress',
+            choices=sorted(COMPRESSIONS),
+            help="Compression to use regardless of the file extension"
+        )
+        self.add_parallel_argument(p_export)
+        p_export.set_defaults(func=self.export)
+
+    @classmethod
+    def _try_call(cls, call):
+        """
+        Wraps a list call to return (data, None) or (None, error message), connection problems are still raised.
+        """
+        def wrapped(lapi):
+            try:
+                return call(lapi), None
+            except (linstor.LinstorNetworkError, linstor.LinstorTimeoutError):
+                raise
+            except linstor.LinstorError as err:
+                return None, str(err)
+        return wrapped
+
+    def fetch_sections(self, args):
+        """
+        Fetches all sections concurrently, volume groups are fetched per resource group afterwards.
+
+        :return: sections and errors by section name
+        :rtype: (list[(str, Any)], dict[str, str])
+        """
+        results = self.run_concurrent(
+            [self._try_call(call) for _, call in self.SECTIONS], args.parallel)
+
+        sections = []
+        errors = {}
+        for (name, _), (data, error) in zip(self.SECTIONS, results):
+            if error is None:
+                sections.append((name, data))
+            else:
+                errors[name] = error
+
+        section_names = [name for name, _ in sections]
+        if "resource_groups" in section_names:
+            rsc_grp_idx = section_names.index("resource_groups")
+            rsc_grp_names = [rsc_grp["name"] for rsc_grp in sections[rsc_grp_idx][1]]
+            vlm_grps = self.run_concurrent(
+                [self._try_call(lambda lapi, rg=rg: lapi.volume_group_list_raise(rg).data_v1) for rg in rsc_grp_names],
+                args.parallel
+            )
+            # volume groups by resource group name
+            sections.insert(rsc_grp_idx + 1, (
+                "volume_groups",
+                {rg: data for rg, (data, error) in zip(rsc_grp_names, vlm_grps) if error is None}
+            ))
+            vlm_grp_errors = {rg: error for rg, (_, error) in zip(rsc_grp_names, vlm_grps) if error is not None}
+            if vlm_grp_errors:
+                errors["volume_groups"] = vlm_grp_errors
+        return sections, errors
+
+    def export(self, args):
+        if args.file == "-" and args.compress:
+            raise ArgumentError("--compress needs an output file")
+
+        sections, errors = self.fetch_sections(args)
+        header = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "client_version": VERSION,
+            "controller": self.get_linstorapi().controller_host(),
+            "errors": errors
+        }
+
+        if args.file == "-":
+            write_export(sys.stdout, header, sections)
+        else:
+            write_export_file(args.file, header, sections, args.compress)
+
+        for name, error in sorted(errors.items()):
+            sys.stderr.write("Warning: section '{n}' not exported: {e}\n".format(n=name, e=error))
+        return ExitCode.OK
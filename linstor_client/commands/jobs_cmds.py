@@ -0,0 +1,236 @@
+import sys
+import time
+from datetime import datetime
+
+import linstor
+
+import linstor_client
+import linstor_client.argparse.argparse as argparse
+from linstor_client.commands import ArgumentError, Commands
+from linstor_client.commands.rsc_dfn_cmds import ResourceDefinitionCommands
+from linstor_client.consts import Color, ExitCode
+from linstor_client.jobs import LIST_NODES, LIST_RESOURCES, LIST_RSC_DFNS, LIST_SNAPSHOTS, STATE_DONE, \
+    STATE_FAILED, Journal, journal_path, list_filters, update_jobs
+from linstor_client.utils import LinstorClientError
+from linstor_client.watch import CLEAR_LINE
+
+
+class JobsCommands(Commands):
+    _jobs_headers = [
+        linstor_client.TableHeader("Id"),
+        linstor_client.TableHeader("Kind"),
+        linstor_client.TableHeader("Object"),
+        linstor_client.TableHeader("Submitted"),
+        linstor_client.TableHeader("State", Color.DARKGREEN),
+        linstor_client.TableHeader("Message")
+    ]
+
+    def __init__(self):
+        super(JobsCommands, self).__init__()
+
+    def setup_commands(self, parser):
+        subcmds = [
+            Commands.Subcommands.List,
+            Commands.Subcommands.Status,
+            Commands.Subcommands.Wait
+        ]
+
+        jobs_parser = parser.add_parser(
+            Commands.JOBS,
+            formatter_class=argparse.RawTextHelpFormatter,
+            description="Operations submitted with --async are recorded in a local journal per controller.\n"
+                        "These subcommands show them and check whether the controller completed them, all pending\n"
+                        "jobs are checked with one list request per object type."
+        )
+        jobs_subp = jobs_parser.add_subparsers(
+            title="jobs commands",
+            metavar="",
+            description=Commands.Subcommands.generate_desc(subcmds)
+        )
+
+        p_list = jobs_subp.add_parser(
+            Commands.Subcommands.List.LONG,
+            aliases=[Commands.Subcommands.List.SHORT],
+            description='Lists the recorded jobs with their last known state, the controller is not queried.')
+        p_list.add_argument('-p', '--pastable', action="store_true", help='Generate pastable output')
+        p_list.add_argument('--pending', action="store_true", help='Only list jobs that are not finished')
+        p_list.set_defaults(func=self.list)
+
+        p_status = jobs_subp.add_parser(
+            Commands.Subcommands.Status.LONG,
+            aliases=[Commands.Subcommands.Status.SHORT],
+            description='Checks the pending jobs once and lists the jobs with their current state.')
+        p_status.add_argument('-p', '--pastable', action="store_true", help='Generate pastable output')
+        p_status.add_argument('ids', nargs='*', metavar='ID', help='Jobs to show (default: all)')
+        p_status.set_defaults(func=self.status, revalidate_cache=True)
+
+        p_wait = jobs_subp.add_parser(
+            Commands.Subcommands.Wait.LONG,
+            aliases=[Commands.Subcommands.Wait.SHORT],
+            description='Waits until the pending jobs are finished. Fails if a job failed.')
+        p_wait.add_argument('ids', nargs='*', metavar='ID', help='Jobs to wait for (default: all pending)')
+        p_wait.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            metavar='SECONDS',
+            help='Seconds between two checks (default: 2)'
+        )
+        p_wait.add_argument(
+            '--wait-timeout',
+            type=int,
+            metavar='SECONDS',
+            help='Give up after this many seconds'
+        )
+        p_wait.set_defaults(func=self.wait, revalidate_cache=True)
+
+        self.check_subcommands(jobs_subp, subcmds)
+
+    def _journal(self):
+        return Journal(journal_path(self.get_linstorapi().controller_host()))
+
+    @classmethod
+    def _select(cls, jobs, ids):
+        if not ids:
+            return jobs
+        by_id = {x.id: x for x in jobs}
+        missing = [x for x in ids if x not in by_id]
+        if missing:
+            raise LinstorClientError("Job(s) not found: " + ", ".join(missing), ExitCode.OBJECT_NOT_FOUND)
+        return [by_id[x] for x in ids]
+
+    @classmethod
+    def _list_request(cls, lapi, list_type, names, curl=False):
+        """
+        :return: the objects of the list, in curl mode only the request is printed
+        :rtype: list
+        """
+        if list_type == LIST_NODES:
+            if curl:
+                return lapi.node_list(filter_by_nodes=names)
+            return lapi.node_list_raise(filter_by_nodes=names).nodes
+        if list_type == LIST_RSC_DFNS:
+            if curl:
+                return lapi.resource_dfn_list(query_volume_definitions=True, filter_by_resource_definitions=names)
+            return lapi.resource_dfn_list_raise(
+                query_volume_definitions=True, filter_by_resource_definitions=names).resource_definitions
+        if list_type == LIST_SNAPSHOTS:
+            if curl:
+                return lapi.snapshot_dfn_list(filter_by_resources=names)
+            return lapi.snapshot_dfn_list_raise(filter_by_resources=names).snapshots
+        assert list_type == LIST_RESOURCES
+        if curl:
+            return lapi.resource_list(filter_by_resources=names)
+        return lapi.resource_list_raise(filter_by_resources=names).resources
+
+    def _check(self, jobs):
+        """
+        Fetches the objects of all pending jobs, one request per list type and chunk of names, and updates the
+        jobs.
+
+        :param list[linstor_client.jobs.Job] jobs: jobs to check
+        :return: the jobs that finished
+        :rtype: list[linstor_client.jobs.Job]
+        """
+        chunk_size = ResourceDefinitionCommands.POLL_CHUNK_SIZE
+        requests = [(list_type, names[i:i + chunk_size])
+                    for list_type, names in sorted(list_filters([x for x in jobs if x.pending]).items())
+                    for i in range(0, len(names), chunk_size)]
+        results = self.run_concurrent(
+            [lambda lapi, list_type=list_type, names=names: self._list_request(lapi, list_type, names)
+             for list_type, names in requests])
+        lists = {}
+        for (list_type, _), objects in zip(requests, results):
+            lists.setdefault(list_type, []).extend(objects)
+        return update_jobs(jobs, lists)
+
+    def _show(self, args, jobs):
+        if args.machine_readable:
+            print(self._to_json([x.to_dict() for x in jobs]))
+            return
+
+        tbl = linstor_client.Table(utf8=not args.no_utf8, colors=not args.no_color, pastable=args.pastable)
+        tbl.add_headers(self._jobs_headers)
+        for job in jobs:
+            if job.state == STATE_DONE:
+                state = tbl.color_cell(job.state, Color.DARKGREEN)
+            elif job.state == STATE_FAILED:
+                state = tbl.color_cell(job.state, Color.RED)
+            else:
+                state = tbl.color_cell(job.state, Color.YELLOW)
+            tbl.add_row([
+                job.id,
+                job.kind,
+                job.object_name,
+                datetime.fromtimestamp(int(job.submitted)),
+                state,
+                job.message or ""
+            ])
+        tbl.show()
+
+    def list(self, args):
+        jobs = self._journal().load()
+        if args.pending:
+            jobs = [x for x in jobs if x.pending]
+        self._show(args, jobs)
+        return ExitCode.OK
+
+    def _curl(self, jobs):
+        for list_type, names in sorted(list_filters([x for x in jobs if x.pending]).items()):
+            self._list_request(self.get_linstorapi(), list_type, names, curl=True)
+        return ExitCode.OK
+
+    def status(self, args):
+        journal = self._journal()
+        jobs = self._select(journal.load(), args.ids)
+        if args.curl:
+            return self._curl(jobs)
+
+        finished = self._check(jobs)
+        if finished:
+            journal.update(finished)
+        self._show(args, jobs)
+        return ExitCode.OK
+
+    def wait(self, args):
+        if args.interval <= 0:
+            raise ArgumentError("--interval has to be greater than 0")
+        journal = self._journal()
+        jobs = [x for x in self._select(journal.load(), args.ids) if x.pending]
+        if args.curl:
+            return self._curl(jobs)
+
+        show_progress = sys.stderr.isatty()
+        start = time.time()
+        failed = 0
+        try:
+            while any(x.pending for x in jobs):
+                finished = self._check(jobs)
+                if finished:
+                    journal.update(finished)
+                for job in finished:
+                    if show_progress:
+                        sys.stderr.write("\r" + CLEAR_LINE)
+                    if job.state == STATE_FAILED:
+                        failed += 1
+                    if not args.machine_readable:
+                        print("{s} {i} {k} {o}{m}".format(
+                            s=job.state, i=job.id, k=job.kind, o=job.object_name,
+                            m=": " + job.message if job.message else ""))
+                pending = [x for x in jobs if x.pending]
+                if show_progress:
+                    sys.stderr.write("\r{d}/{t} jobs finished".format(d=len(jobs) - len(pending), t=len(jobs)))
+                    sys.stderr.flush()
+                if not pending:
+                    break
+                if args.wait_timeout and time.time() - start > args.wait_timeout:
+                    raise linstor.LinstorTimeoutError("{n} job(s) didn't finish in time: {j}".format(
+                        n=len(pending), j=", ".join(x.id for x in pending)))
+                time.sleep(args.interval)
+        finally:
+            if show_progress:
+                sys.stderr.write("\n")
+
+        if args.machine_readable:
+            print(self._to_json([x.to_dict() for x in jobs]))
+        return ExitCode.API_ERROR if failed else ExitCode.OK
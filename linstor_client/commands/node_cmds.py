@@ -2,15 +2,17 @@ import collections
 import getpass
 import socket
 import sys
-import json
 
 import linstor.responses
 import linstor.sharedconsts as apiconsts
 import linstor_client
 import linstor_client.argparse.argparse as argparse
 from linstor import SizeCalc, LogLevelEnum
-from linstor_client.commands import Commands
+from linstor_client.commands import ArgumentError, Commands, DefaultState, TransactionOperation, TransactionStage, \
+    TransactionState
 from linstor_client.consts import Color, ExitCode
+from linstor_client.export import json_input_file
+from linstor_client.jobs import KIND_NODE_DELETE, KIND_NODE_LOST, Job
 from linstor_client.tree import TreeNode
 from linstor_client.utils import (LinstorClientError, ip_completer,
                                   rangecheck)
@@ -84,6 +86,7 @@ class NodeCommands(Commands):
             Commands.Subcommands.Interface,
             Commands.Subcommands.Info,
             Commands.Subcommands.SetProperty,
+            Commands.Subcommands.SetPropertyBulk,
             Commands.Subcommands.ListProperties,
             Commands.Subcommands.Modify,
             NodeCommands.Reconnect,
@@ -232,6 +235,12 @@ class NodeCommands(Commands):
             nargs='?',
             help='Name of the node to be described. With no name, all nodes are described'
         ).completer = self.node_completer
+        p_desc_node.add_argument(
+            '--depth',
+            type=rangecheck(0, 3),
+            help='Limit the tree to the given number of levels below the node '
+                 '(1: storage pools, 2: resources, 3: volumes)'
+        )
         p_desc_node.set_defaults(func=self.describe)
 
         # remove-node
@@ -378,6 +387,7 @@ class NodeCommands(Commands):
             nargs='+',
             help="Interface name"
         ).completer = self.netif_completer
+        self.add_parallel_argument(p_delete_netinterface)
         p_delete_netinterface.set_defaults(func=self.delete_netif)
 
         # list nodes
@@ -406,9 +416,10 @@ class NodeCommands(Commands):
                  + 'Can be key=value pairs where key is the property name and value column header')
         p_lnodes.add_argument(
             '--from-file',
-            type=argparse.FileType('r'),
+            type=json_input_file,
             help="Read data to display from the given json file",
         )
+        self.add_watch_arguments(p_lnodes)
         p_lnodes.set_defaults(func=self.list)
 
         # list info
@@ -446,7 +457,7 @@ class NodeCommands(Commands):
         p_sp.add_argument('-p', '--pastable', action="store_true", help='Generate pastable output')
         p_sp.add_argument(
             '--from-file',
-            type=argparse.FileType('r'),
+            type=json_input_file,
             help="Read data to display from the given json file",
         )
         p_sp.add_argument(
@@ -466,7 +477,24 @@ class NodeCommands(Commands):
             help="Node for which to set the property"
         ).completer = self.node_completer
         Commands.add_parser_keyvalue(p_setp, "node")
-        p_setp.set_defaults(func=self.set_props)
+        p_setp.set_defaults(func=self.set_props, allowed_states=[DefaultState, TransactionState])
+
+        # set properties on selected nodes
+        p_setp_bulk = node_subp.add_parser(
+            Commands.Subcommands.SetPropertyBulk.LONG,
+            aliases=[Commands.Subcommands.SetPropertyBulk.SHORT],
+            formatter_class=argparse.RawTextHelpFormatter,
+            description="Set a property on all nodes matching the given selectors."
+        )
+        self.add_bulk_select_arguments(p_setp_bulk, "node")
+        p_setp_bulk.add_argument(
+            '--aux-props',
+            nargs='+',
+            type=str,
+            metavar="AUX_PROPERTY",
+            help='Select nodes with all of these auxiliary properties, e.g. "site=dc1"'
+        )
+        p_setp_bulk.set_defaults(func=self.set_props_bulk)
 
         # restore evicted node
         p_restore_node = node_subp.add_parser(
@@ -622,6 +650,8 @@ class NodeCommands(Commands):
         async_flag = vars(args)["async"]
 
         replies = self._linstor.node_delete(args.name, async_flag)
+        if async_flag:
+            self.record_jobs(args, [(Job(KIND_NODE_DELETE, node=args.name), replies)])
 
         return self.handle_replies(args, replies)
 
@@ -629,6 +659,8 @@ class NodeCommands(Commands):
         async_flag = vars(args)["async"]
 
         replies = self._linstor.node_lost(args.name, async_flag)
+        if async_flag:
+            self.record_jobs(args, [(Job(KIND_NODE_LOST, node=args.name), replies)])
 
         return self.handle_replies(args, replies)
 
@@ -721,9 +753,10 @@ class NodeCommands(Commands):
     def list(self, args):
         args = self.merge_config_args('node.list', args)
         if args.from_file:
-            lstmsg = [linstor.responses.NodeListResponse(json.load(args.from_file))]
-        else:
-            lstmsg = self._linstor.node_list(args.nodes, args.props)
+            return self.output_from_file(args, "nodes", linstor.responses.NodeListResponse, self.show_nodes)
+        if args.watch is not None:
+            return self.watch_list(args, lambda: self._linstor.node_list(args.nodes, args.props), self.show_nodes, 1)
+        lstmsg = self._linstor.node_list(args.nodes, args.props)
         return self.output_list(args, lstmsg, self.show_nodes)
 
     def describe(self, args=None):
@@ -737,18 +770,21 @@ class NodeCommands(Commands):
         """
 
         try:
-            node_list_replies = self._linstor.node_list()
+            # the lists are independent of each other, so fetch them concurrently and
+            # only for the requested node if one was given
+            node_filter = [args.name] if args.name else None
+            node_list_replies, storage_pool_list_replies, rsc_list_replies = self.run_concurrent([
+                lambda lapi: lapi.node_list(filter_by_nodes=node_filter),
+                lambda lapi: lapi.storage_pool_list(filter_by_nodes=node_filter),
+                lambda lapi: lapi.resource_list(filter_by_nodes=node_filter)
+            ])
+
             self.check_list_sanity(args, node_list_replies)
             node_map = self.construct_node(node_list_replies[0])
 
-            storage_pool_list_replies = self._linstor.storage_pool_list()
             self.check_list_sanity(args, storage_pool_list_replies)
             self.construct_storpool(node_map, storage_pool_list_replies[0])
 
-            rsc_dfn_list_replies = self._linstor.resource_dfn_list(query_volume_definitions=False)
-            self.check_list_sanity(args, rsc_dfn_list_replies)
-
-            rsc_list_replies = self._linstor.resource_list()
             self.check_list_sanity(args, rsc_list_replies)
             self.construct_rsc(node_map, rsc_list_replies[0])
 
@@ -759,9 +795,9 @@ class NodeCommands(Commands):
                     print("")
                 if args.name == node_name_key or not args.name:
                     node = node_map[node_name_key]
-                    machine_data.append(node.to_data())
+                    machine_data.append(node.to_data(args.depth))
                     if not args.machine_readable:
-                        node.print_node(args.no_utf8, args.no_color)
+                        node.print_node(args.no_utf8, args.no_color, args.depth)
                         outputted = True
 
             if args.machine_readable:
@@ -985,7 +1021,7 @@ class NodeCommands(Commands):
 
     def print_props(self, args):
         if args.from_file:
-            file_data = json.load(args.from_file)
+            file_data = self.load_from_file(args.from_file, "nodes")
             node_data = filter(lambda node: node["name"] == args.node_name, file_data)
             lstmsg = [linstor.responses.NodeListResponse(node_data)]
         else:
@@ -995,12 +1031,40 @@ class NodeCommands(Commands):
     def set_props(self, args):
         args = self._attach_aux_prop(args)
         mod_prop_dict = Commands.parse_key_value_pairs([(args.key, args.value)])
-        replies = self.get_linstorapi().node_modify(
+        return self.send_or_queue(args, TransactionOperation(
+            TransactionStage.NODE_PROPS,
+            "set-property",
+            "node",
             args.node_name,
-            property_dict=mod_prop_dict['pairs'],
-            delete_props=mod_prop_dict['delete']
+            lambda lapi: lapi.node_modify(
+                args.node_name,
+                property_dict=mod_prop_dict['pairs'],
+                delete_props=mod_prop_dict['delete']
+            )
+        ))
+
+    def set_props_bulk(self, args):
+        if args.name_regex is None and args.props is None and args.aux_props is None:
+            raise ArgumentError("At least one of --name-regex, --props or --aux-props is required")
+
+        args = self._attach_aux_prop(args)
+        mod_prop_dict = Commands.parse_key_value_pairs([(args.key, args.value)])
+
+        filter_props = list(args.props or [])
+        filter_props += [apiconsts.NAMESPC_AUXILIARY + '/' + x for x in args.aux_props or []]
+        nodes = self.get_linstorapi().node_list_raise(filter_by_props=filter_props or None).nodes
+        node_names = self.filter_by_name_regex([x.name for x in nodes], args.name_regex)
+
+        return self.bulk_modify(
+            args,
+            node_names,
+            lambda lapi, node_name: lapi.node_modify(
+                node_name,
+                property_dict=mod_prop_dict['pairs'],
+                delete_props=mod_prop_dict['delete']
+            ),
+            "nodes"
         )
-        return self.handle_replies(args, replies)
 
     def restore_node(self, args):
         replies = self.get_linstorapi().node_restore(
@@ -1043,8 +1107,11 @@ class NodeCommands(Commands):
         return self.handle_replies(args, replies)
 
     def delete_netif(self, args):
-        # execute delete netinterfaces and flatten result list
-        replies = [x for subx in args.interface_name for x in self._linstor.netinterface_delete(args.node_name, subx)]
+        replies = self.fan_out(
+            args,
+            [lambda lapi, netif=netif: lapi.netinterface_delete(args.node_name, netif)
+             for netif in args.interface_name]
+        )
         return self.handle_replies(args, replies)
 
     def set_log_level(self, args):
@@ -1,14 +1,16 @@
 from __future__ import print_function
-import json
 
 import linstor_client.argparse.argparse as argparse
 
 import linstor
 import linstor_client
 import linstor.sharedconsts as apiconsts
-from linstor_client.commands import DefaultState, Commands, DrbdOptions, ArgumentError
+from linstor_client.commands import DefaultState, Commands, DrbdOptions, ArgumentError, TransactionOperation, \
+    TransactionStage, TransactionState
 from linstor_client.commands.vlm_cmds import VolumeCommands
 from linstor_client.consts import Color, ExitCode
+from linstor_client.export import json_input_file
+from linstor_client.jobs import KIND_RSC_CREATE, KIND_RSC_DELETE, KIND_RSC_TOGGLE_DISK, Job
 from linstor_client.commands.utils.skip_disk_utils import print_skip_disk_info, get_skip_disk_state_str
 from linstor_client.utils import rangecheck
 
@@ -31,16 +33,6 @@ class ResourceCreateTransactionState(object):
         return self._terminate_on_error
 
 
-class RscRespWrapper(object):
-    def __init__(self, original):
-        """
-
-        :param linstor.responses.ResourceResponse original:
-        """
-        self.resources = original.resources
-        self.resource_states = original.resource_states
-
-
 class ResourceCommands(Commands):
     CONN_OBJECT_NAME = 'rsc-conn'
 
@@ -132,7 +124,8 @@ class ResourceCommands(Commands):
             'resource_definition_name',
             type=str,
             help='Name of the resource definition').completer = self.resource_dfn_completer
-        p_new_res.set_defaults(func=self.create, allowed_states=[DefaultState, ResourceCreateTransactionState])
+        p_new_res.set_defaults(
+            func=self.create, allowed_states=[DefaultState, ResourceCreateTransactionState, TransactionState])
 
         # make available
         p_mkavial = res_subp.add_parser(
@@ -188,6 +181,7 @@ class ResourceCommands(Commands):
                               help='Name of the node').completer = self.node_completer
         p_rm_res.add_argument('name',
                               help='Name of the resource to delete').completer = self.resource_completer
+        self.add_parallel_argument(p_rm_res)
         p_rm_res.set_defaults(func=self.delete)
 
         resgroupby = [x.name.lower() for x in self._get_headers(False)]
@@ -234,20 +228,21 @@ class ResourceCommands(Commands):
                  + 'Can be key=value pairs where key is the property name and value column header')
         p_lreses.add_argument(
             '--from-file',
-            type=argparse.FileType('r'),
+            type=json_input_file,
             help="Read data to display from the given json file",
         )
         p_lreses.add_argument(
             '--show-drbd-ports',
             action='store_true',
             help="Show the 'DRBD Ports' column")
+        self.add_watch_arguments(p_lreses)
         p_lreses.set_defaults(func=self.list)
 
         # involved resources
         p_involved = res_subp.add_parser(
             Commands.Subcommands.Involved.LONG,
             aliases=[Commands.Subcommands.Involved.SHORT],
-            description='Prints a list of resources involved on a given node.')
+            description='Prints a list of resources involved on any of the given nodes.')
         p_involved.add_argument('-p', '--pastable', action="store_true", help='Generate pastable output')
         p_involved.add_argument('-i', '--inuse', action="store_true", help='Only show resource bundles that are used.')
         p_involved.add_argument(
@@ -269,10 +264,18 @@ class ResourceCommands(Commands):
             default=[],
             help='Show these props in the list. '
                  + 'Can be key=value pairs where key is the property name and value column header')
+        p_involved.add_argument(
+            '-a',
+            '--aux-props',
+            nargs='+',
+            type=str,
+            metavar="AUX_PROPERTY",
+            help='Also select all nodes with these auxiliary properties, e.g. "site=dc1"')
         p_involved.add_argument(
             'node',
+            nargs='*',
             type=str,
-            help='Node name where a resource is used').completer = self.node_completer
+            help='Node names where a resource is used').completer = self.node_completer
         p_involved.set_defaults(func=self.involved)
 
         # list volumes
@@ -305,6 +308,11 @@ class ResourceCommands(Commands):
             default=False,
             help="Hide the replication states column."
         )
+        p_lvlms.add_argument(
+            '--full-reports',
+            action="store_true",
+            help="Print every reported error/warning, instead of each distinct report once with its occurrences."
+        )
         p_lvlms.add_argument(
             '--show-props',
             nargs='+',
@@ -344,7 +352,7 @@ class ResourceCommands(Commands):
             help='Name of the resource'
         ).completer = self.resource_completer
         Commands.add_parser_keyvalue(p_setprop, "resource")
-        p_setprop.set_defaults(func=self.set_props)
+        p_setprop.set_defaults(func=self.set_props, allowed_states=[DefaultState, TransactionState])
 
         # drbd peer device Options
         p_drbd_peer_opts = res_subp.add_parser(
@@ -529,27 +537,37 @@ class ResourceCommands(Commands):
 
             place_count, additional_place_count, diskless_type = self.parse_place_count_args(args)
 
-            # auto-place resource
-            replies = self._linstor.resource_auto_place(
-                args.resource_definition_name,
-                place_count,
-                args.storage_pool,
-                args.do_not_place_with,
-                args.do_not_place_with_regex,
-                replicas_on_same=self.prepare_argparse_list(args.replicas_on_same,
-                                                            linstor.consts.NAMESPC_AUXILIARY + '/'),
-                replicas_on_different=self.prepare_argparse_list(
-                    args.replicas_on_different, linstor.consts.NAMESPC_AUXILIARY + '/'),
-                x_replicas_on_different=self.prepare_argparse_dict_str_int(
-                    args.x_replicas_on_different, linstor.consts.NAMESPC_AUXILIARY + '/'),
-                diskless_on_remaining=self.parse_diskless_on_remaining(args),
-                async_msg=async_flag,
-                layer_list=args.layer_list,
-                provider_list=args.providers,
-                additional_place_count=additional_place_count,
-                diskless_type=diskless_type,
-                diskless_storage_pool=args.diskless_storage_pool
-            )
+            def auto_place(lapi):
+                return lapi.resource_auto_place(
+                    args.resource_definition_name,
+                    place_count,
+                    args.storage_pool,
+                    args.do_not_place_with,
+                    args.do_not_place_with_regex,
+                    replicas_on_same=self.prepare_argparse_list(args.replicas_on_same,
+                                                                linstor.consts.NAMESPC_AUXILIARY + '/'),
+                    replicas_on_different=self.prepare_argparse_list(
+                        args.replicas_on_different, linstor.consts.NAMESPC_AUXILIARY + '/'),
+                    x_replicas_on_different=self.prepare_argparse_dict_str_int(
+                        args.x_replicas_on_different, linstor.consts.NAMESPC_AUXILIARY + '/'),
+                    diskless_on_remaining=self.parse_diskless_on_remaining(args),
+                    async_msg=async_flag,
+                    layer_list=args.layer_list,
+                    provider_list=args.providers,
+                    additional_place_count=additional_place_count,
+                    diskless_type=diskless_type,
+                    diskless_storage_pool=args.diskless_storage_pool
+                )
+
+            transaction = self.open_transaction()
+            if transaction:
+                return transaction.queue(TransactionOperation(
+                    TransactionStage.RESOURCES, "auto-place", "resource", args.resource_definition_name, auto_place,
+                    resource_definition=args.resource_definition_name))
+
+            replies = auto_place(self._linstor)
+            if async_flag:
+                self.record_jobs(args, [(Job(KIND_RSC_CREATE, resource=args.resource_definition_name), replies)])
 
             return self.handle_replies(args, replies)
 
@@ -580,10 +598,29 @@ class ResourceCommands(Commands):
                 print("{} resource(s) added to transaction".format(len(rscs)))
                 current_state.rscs.extend(rscs)
                 return ExitCode.OK
+            elif current_state.__class__ == TransactionState:
+                return current_state.queue(TransactionOperation(
+                    TransactionStage.RESOURCES,
+                    "create",
+                    "resource",
+                    "{r} on {n}".format(r=args.resource_definition_name, n=", ".join(args.node_name)),
+                    lambda lapi: lapi.resource_create(rscs, async_flag),
+                    resource_definition=args.resource_definition_name
+                ))
             else:
                 replies = self._linstor.resource_create(rscs, async_flag)
+                if async_flag:
+                    self.record_jobs(args, [(job, replies) for job in self._create_jobs(rscs)])
                 return self.handle_replies(args, replies)
 
+    @classmethod
+    def _create_jobs(cls, rscs):
+        """
+        :param list[linstor.ResourceData] rscs: resources submitted with --async
+        :rtype: list[linstor_client.jobs.Job]
+        """
+        return [Job(KIND_RSC_CREATE, resource=rsc.rsc_name, node=rsc.node_name) for rsc in rscs]
+
     def make_available(self, args):
         replies = self.get_linstorapi().resource_make_available(
             args.node_name,
@@ -596,68 +633,61 @@ class ResourceCommands(Commands):
     def delete(self, args):
         async_flag = vars(args)["async"]
 
-        # execute delete resource and flatten result list
-        replies = [x for node_name in args.node_name for x in self._linstor.resource_delete(
-            node_name,
-            args.name,
-            async_flag,
-            args.keep_tiebreaker)]
-        return self.handle_replies(args, replies)
+        results = self.run_concurrent([
+            lambda lapi, node_name=node_name: lapi.resource_delete(
+                node_name,
+                args.name,
+                async_flag,
+                args.keep_tiebreaker)
+            for node_name in args.node_name
+        ], args.parallel)
+        if async_flag:
+            self.record_jobs(args, [(Job(KIND_RSC_DELETE, resource=args.name, node=node_name), replies)
+                                    for node_name, replies in zip(args.node_name, results)])
+        return self.handle_replies(args, [reply for replies in results for reply in replies])
 
     @classmethod
     def _filter_involved_resources(
             cls,
             res_response,
-            on_nodes=None,
+            on_nodes,
             only_inuse=False,
             only_diskless_inuse=False,
             min_replicas=None):
         """
-        Filter a RscRespWrapper object according to involved rules.
+        Filter resources according to involved rules, a resource is kept if its resource bundle
+        (all resources of the same resource definition) passes all rules.
 
-        :param RscRespWrapper res_response: response resource wrapper where deleting resource is possible
-        :param list[str] on_nodes: if resource is on any of these nodes
+        :param linstor.responses.ResourceResponse res_response: resource list response to filter
+        :param list[str] on_nodes: if resource bundle is on any of these nodes
         :param bool only_inuse: only show resource bundles that are inuse
         :param bool only_diskless_inuse: only show resource bundles where the inuse node is diskless
         :param Optional[int] min_replicas: only show resource bundles that have less diskful replicas
-        :return: The res_response argument with filtered resources
-        :rtype: RscRespWrapper
+        :return: A new resource response only containing the matching resources
+        :rtype: linstor.responses.ResourceResponse
         """
-        res_del = set()
-        rsc_state_lkup = {x.node_name + x.name: x for x in res_response.resource_states}
-        if on_nodes:
-            look_up_nodes = {}
-            for rsc in res_response.resources:
-                in_use = rsc_state_lkup.get(rsc.node_name + rsc.name).in_use
-                if rsc.name not in look_up_nodes:
-                    look_up_nodes[rsc.name] = {
-                        'nodes': [rsc.node_name],
-                        'inuse': rsc_state_lkup.get(rsc.node_name + rsc.name).in_use,
-                        'diskless-inuse': in_use and apiconsts.FLAG_DISKLESS in rsc.flags,
-                        'replicas': 1 if apiconsts.FLAG_DISKLESS not in rsc.flags else 0
-                    }
-                else:
-                    look_up_nodes[rsc.name]['nodes'].append(rsc.node_name)
-                    look_up_nodes[rsc.name]['inuse'] |= in_use
-                    look_up_nodes[rsc.name]['diskless-inuse'] |= in_use and apiconsts.FLAG_DISKLESS in rsc.flags
-                    look_up_nodes[rsc.name]['replicas'] += 1 if apiconsts.FLAG_DISKLESS not in rsc.flags else 0
-            for i, rsc in enumerate(res_response.resources):
-                look_rsc = look_up_nodes[rsc.name]
-                for n in on_nodes:
-                    if n not in look_rsc['nodes']:
-                        res_del.add(i)
-                        break
-                if only_inuse and not look_rsc['inuse']:
-                    res_del.add(i)
-                if only_diskless_inuse and not look_rsc['diskless-inuse']:
-                    res_del.add(i)
-                if min_replicas is not None and min_replicas <= look_rsc['replicas']:
-                    res_del.add(i)
-            res_del_list = list(res_del)
-            res_del_list.sort()
-            for ri in reversed(res_del_list):
-                del res_response.resources[ri]
-        return res_response
+        on_nodes = set(on_nodes)
+        resources = res_response.resources
+        in_use_lkup = {x.node_name + x.name: x.in_use for x in res_response.resource_states}
+
+        bundles = {}
+        for rsc in resources:
+            in_use = bool(in_use_lkup.get(rsc.node_name + rsc.name))
+            diskless = apiconsts.FLAG_DISKLESS in rsc.flags
+            bundle = bundles.setdefault(
+                rsc.name, {'on-nodes': False, 'inuse': False, 'diskless-inuse': False, 'replicas': 0})
+            bundle['on-nodes'] |= rsc.node_name in on_nodes
+            bundle['inuse'] |= in_use
+            bundle['diskless-inuse'] |= in_use and diskless
+            bundle['replicas'] += 0 if diskless else 1
+
+        def involved(bundle):
+            return bundle['on-nodes'] \
+                and (not only_inuse or bundle['inuse']) \
+                and (not only_diskless_inuse or bundle['diskless-inuse']) \
+                and (min_replicas is None or bundle['replicas'] < min_replicas)
+
+        return linstor.responses.ResourceResponse([x.data_v1 for x in resources if involved(bundles[x.name])])
 
     @staticmethod
     def ordered_unique(seq):  # Order preserving
@@ -667,7 +697,7 @@ class ResourceCommands(Commands):
     def show(self, args, lstmsg):
         """
         :param args:
-        :param RscRespWrapper lstmsg:
+        :param linstor.responses.ResourceResponse lstmsg:
         :return:
         """
         rsc_state_lkup = {x.node_name + x.name: x for x in lstmsg.resource_states}
@@ -766,11 +796,14 @@ class ResourceCommands(Commands):
     def list(self, args):
         args = self.merge_config_args('resource.list', args)
         if args.from_file:
-            lstmsg = [linstor.responses.ResourceResponse(json.load(args.from_file))]
-        else:
-            lstmsg = self._linstor.resource_list(
+            return self.output_from_file(args, "resources", linstor.responses.ResourceResponse, self.show)
+
+        def fetch():
+            return self._linstor.resource_list(
                 filter_by_nodes=args.nodes, filter_by_resources=args.resources, filter_by_props=args.props)
-        return self.output_list(args, lstmsg, self.show)
+        if args.watch is not None:
+            return self.watch_list(args, fetch, self.show, 2)
+        return self.output_list(args, fetch(), self.show)
 
     def list_volumes(self, args):
         args = self.merge_config_args('volume.list', args)
@@ -779,21 +812,40 @@ class ResourceCommands(Commands):
 
     def show_involved(self, args, lstmsg):
         """
-        Filters involved resources and shows them with the normal resource list function.
+        Shows the already filtered involved resources with the normal resource list function.
 
         :param args: argparse options
-        :param linstor.responses.ResourceResponse lstmsg: resource list REST answer from controller.
+        :param linstor.responses.ResourceResponse lstmsg: filtered resource list
         :return: None
         """
         args.groupby = None
         args.all = True
         args.faulty = False
-        rsc_resp_wrp = RscRespWrapper(lstmsg)
-        self._filter_involved_resources(rsc_resp_wrp, [args.node], args.inuse, args.diskless_inuse, args.min_diskful)
-        self.show(args, rsc_resp_wrp)
+        args.show_drbd_ports = False
+        self.show(args, lstmsg)
 
     def involved(self, args):
-        lstmsg = self._linstor.resource_list()
+        if not args.node and not args.aux_props:
+            raise ArgumentError("resource involved: at least one node or --aux-props selector is required")
+
+        on_nodes = list(args.node)
+        if args.aux_props:
+            # resolve the nodes matching the selectors together with the resource list
+            node_replies, lstmsg = self.run_concurrent([
+                lambda lapi: lapi.node_list(
+                    filter_by_props=[apiconsts.NAMESPC_AUXILIARY + '/' + x for x in args.aux_props]),
+                lambda lapi: lapi.resource_list()
+            ])
+            if self.check_for_api_replies(node_replies):
+                return self.handle_replies(args, node_replies)
+            if node_replies:
+                on_nodes += [x.name for x in node_replies[0].nodes]
+        else:
+            lstmsg = self._linstor.resource_list()
+
+        if lstmsg and not self.check_for_api_replies(lstmsg):
+            lstmsg = [self._filter_involved_resources(
+                lstmsg[0], on_nodes, args.inuse, args.diskless_inuse, args.min_diskful)] + lstmsg[1:]
         return self.output_list(args, lstmsg, self.show_involved)
 
     @classmethod
@@ -811,13 +863,19 @@ class ResourceCommands(Commands):
     def set_props(self, args):
         args = self._attach_aux_prop(args)
         mod_prop_dict = Commands.parse_key_value_pairs([(args.key, args.value)])
-        replies = self._linstor.resource_modify(
-            args.node_name,
-            args.name,
-            mod_prop_dict['pairs'],
-            mod_prop_dict['delete']
-        )
-        return self.handle_replies(args, replies)
+        return self.send_or_queue(args, TransactionOperation(
+            TransactionStage.RESOURCE_PROPS,
+            "set-property",
+            "resource",
+            "{r} on {n}".format(r=args.name, n=args.node_name),
+            lambda lapi: lapi.resource_modify(
+                args.node_name,
+                args.name,
+                mod_prop_dict['pairs'],
+                mod_prop_dict['delete']
+            ),
+            resource_definition=args.name
+        ))
 
     def drbd_peer_opts(self, args):
         a = DrbdOptions.filter_new(args)
@@ -850,6 +908,8 @@ class ResourceCommands(Commands):
             diskless=args.diskless,
             async_msg=async_flag
         )
+        if async_flag:
+            self.record_jobs(args, [(Job(KIND_RSC_TOGGLE_DISK, resource=args.name, node=args.node_name), replies)])
         return self.handle_replies(args, replies)
 
     def transactional_create_begin(self, args):
@@ -864,8 +924,11 @@ class ResourceCommands(Commands):
 
     def transactional_create_commit(self, args):
         async_flag = vars(args)["async"]
-        replies = self._linstor.resource_create(self._state_service.get_state().rscs, async_flag)
+        rscs = self._state_service.get_state().rscs
+        replies = self._linstor.resource_create(rscs, async_flag)
         self._state_service.pop_state()
+        if async_flag:
+            self.record_jobs(args, [(job, replies) for job in self._create_jobs(rscs)])
         return self.handle_replies(args, replies)
 
     def activate(self, args):
@@ -1,18 +1,26 @@
 import sys
-import json
+import time
 
 import linstor_client.argparse.argparse as argparse
 
 import linstor
 import linstor_client
-from linstor_client.commands import Commands, DrbdOptions, ArgumentError
+from linstor_client.commands import Commands, DrbdOptions, ArgumentError, DefaultState, TransactionOperation, \
+    TransactionStage, TransactionState
 from linstor_client.consts import Color, ExitCode
+from linstor_client.export import json_input_file
+from linstor_client.jobs import KIND_RSC_DFN_DELETE, Job
 from linstor.sharedconsts import FLAG_DELETE, FLAG_CLONING, FLAG_FAILED, FLAG_RESTORE_TARGET
-from linstor_client.utils import rangecheck, Output
+from linstor_client.sync import SyncTracker
+from linstor_client.utils import rangecheck, LinstorClientError, Output
+from linstor_client.watch import CLEAR_LINE
 
 
 class ResourceDefinitionCommands(Commands):
     OBJECT_NAME = 'resource-definition'
+    # maximal number of resource names per list request when polling many resources
+    POLL_CHUNK_SIZE = 100
+    CLONE_POLL_INTERVAL = 1.0
 
     _rsc_dfn_headers = [
         linstor_client.TableHeader("ResourceName"),
@@ -32,6 +40,7 @@ class ResourceDefinitionCommands(Commands):
             Commands.Subcommands.List,
             Commands.Subcommands.Delete,
             Commands.Subcommands.SetProperty,
+            Commands.Subcommands.SetPropertyBulk,
             Commands.Subcommands.ListProperties,
             Commands.Subcommands.DrbdOptions,
             Commands.Subcommands.Clone,
@@ -73,7 +82,7 @@ class ResourceDefinitionCommands(Commands):
                                    nargs="?",
                                    type=str,
                                    help='Name of the new resource definition. Will be ignored if EXTERNAL_NAME is set.')
-        p_new_res_dfn.set_defaults(func=self.create)
+        p_new_res_dfn.set_defaults(func=self.create, allowed_states=[DefaultState, TransactionState])
 
         p_auto_place = res_def_subp.add_parser(
             Commands.Subcommands.AutoPlace.LONG,
@@ -129,6 +138,7 @@ class ResourceDefinitionCommands(Commands):
             'name',
             nargs="+",
             help='Name of the resource to delete').completer = self.resource_dfn_completer
+        self.add_parallel_argument(p_rm_res_dfn)
         p_rm_res_dfn.set_defaults(func=self.delete)
 
         rsc_dfn_groupby = [x.name.lower() for x in self._rsc_dfn_headers]
@@ -161,29 +171,65 @@ class ResourceDefinitionCommands(Commands):
             '--resource-group', '--rsc-grp',
             help="Resource group the cloned resource should use, this will also use storage pools of the defined RG."
         ).completer = self.resource_grp_completer
+        p_clone_rscdfn.add_argument(
+            '--count',
+            type=rangecheck(1, 100000),
+            metavar='N',
+            help="Create N clones named by --name-template")
+        p_clone_rscdfn.add_argument(
+            '--name-template',
+            metavar='TEMPLATE',
+            help="Name of the clones created by --count, {n} is replaced by 1..N, e.g. 'vdi-{n:03d}'")
+        p_clone_rscdfn.add_argument(
+            '--pairs',
+            nargs='+',
+            metavar='SOURCE:CLONE',
+            help="Clone pairs, can be used instead of or in addition to SOURCE_RESOURCE")
+        self.add_parallel_argument(p_clone_rscdfn)
         p_clone_rscdfn.add_argument(
             'source_resource',
+            nargs="?",
             help="Source resource definition name").completer = self.resource_dfn_completer
         p_clone_rscdfn.add_argument('clone_name',
-                                    nargs="?",
+                                    nargs="*",
                                     type=str,
-                                    help='Name of the new resource definition. '
+                                    help='Names of the new resource definitions. '
                                          'Will be ignored if EXTERNAL_NAME is set.')
-        p_clone_rscdfn.set_defaults(func=self.clone)
+        p_clone_rscdfn.set_defaults(func=self.clone, revalidate_cache=True)
 
         p_wait_sync = res_def_subp.add_parser(
             Commands.Subcommands.WaitSync.LONG,
             aliases=[Commands.Subcommands.WaitSync.SHORT],
-            description="Wait until the specified resource is synchronized (DRBD peers are up-to-date). "
+            description="Wait until the specified resources are synchronized (DRBD peers are up-to-date). "
             "For use when cloning a resource definition (see `linstor resource-definition clone --help`). Cloning a "
             "resource definition might take longer than the LINSTOR client's default timeout period (5 "
             "minutes). To prevent a potentially endless wait, in case something goes wrong and DRBD peers never reach "
             "an up-to-date state, you can specify a `--wait-timeout` value. If the wait timeout is exceeded, the "
-            "command will exit, even if the resource is not synchronized.")
+            "command will exit, even if the resources are not synchronized. "
+            "The states of all resources are fetched together every --interval seconds, on a terminal the number "
+            "of synchronized resources, the estimated remaining time and the slowest peers are shown.")
         p_wait_sync.add_argument('--wait-timeout', type=int, help="Wait this seconds for the clone to finish.")
         p_wait_sync.add_argument(
-            "resource_name", help="Resource name to be checked.").completer = self.resource_dfn_completer
-        p_wait_sync.set_defaults(func=self.wait_sync)
+            '--interval',
+            type=float,
+            default=1.0,
+            metavar='SECONDS',
+            help="Seconds between two state fetches (default: 1)")
+        p_wait_sync.add_argument(
+            '--resource-group', '--rsc-grp',
+            nargs='+',
+            help="Wait for all resource definitions of these resource groups"
+        ).completer = self.resource_grp_completer
+        p_wait_sync.add_argument(
+            '--props',
+            nargs='+',
+            type=str,
+            help="Wait for all resource definitions with these properties (KEY or KEY=VALUE)")
+        p_wait_sync.add_argument(
+            "resource_name",
+            nargs='*',
+            help="Resource names to be checked.").completer = self.resource_dfn_completer
+        p_wait_sync.set_defaults(func=self.wait_sync, revalidate_cache=True)
 
         # list
         p_lrscdfs = res_def_subp.add_parser(
@@ -209,7 +255,7 @@ class ResourceDefinitionCommands(Commands):
                  + 'Can be key=value pairs where key is the property name and value column header')
         p_lrscdfs.add_argument(
             '--from-file',
-            type=argparse.FileType('r'),
+            type=json_input_file,
             help="Read data to display from the given json file",
         )
         p_lrscdfs.add_argument(
@@ -228,7 +274,7 @@ class ResourceDefinitionCommands(Commands):
         p_sp.add_argument('-p', '--pastable', action="store_true", help='Generate pastable output')
         p_sp.add_argument(
             '--from-file',
-            type=argparse.FileType('r'),
+            type=json_input_file,
             help="Read data to display from the given json file",
         )
         p_sp.add_argument(
@@ -245,7 +291,22 @@ class ResourceDefinitionCommands(Commands):
             description='Sets properties for the given resource definition.')
         p_setprop.add_argument('name', type=str, help='Name of the resource definition')
         Commands.add_parser_keyvalue(p_setprop, 'resource-definition')
-        p_setprop.set_defaults(func=self.set_props)
+        p_setprop.set_defaults(func=self.set_props, allowed_states=[DefaultState, TransactionState])
+
+        # set properties on selected resource definitions
+        p_setprop_bulk = res_def_subp.add_parser(
+            Commands.Subcommands.SetPropertyBulk.LONG,
+            aliases=[Commands.Subcommands.SetPropertyBulk.SHORT],
+            formatter_class=argparse.RawTextHelpFormatter,
+            description='Sets properties on all resource definitions matching the given selectors.')
+        self.add_bulk_select_arguments(p_setprop_bulk, 'resource-definition')
+        p_setprop_bulk.add_argument(
+            '--resource-group',
+            nargs='+',
+            type=str,
+            help='Select resource definitions of the given resource groups'
+        ).completer = self.resource_grp_completer
+        p_setprop_bulk.set_defaults(func=self.set_props_bulk)
 
         # drbd options
         p_drbd_opts = res_def_subp.add_parser(
@@ -266,16 +327,23 @@ class ResourceDefinitionCommands(Commands):
     def create(self, args):
         if not args.name and not args.external_name:
             raise ArgumentError("ArgumentError: At least resource name or external name has to be specified.")
-        replies = self._linstor.resource_dfn_create(
-            args.name,
-            args.port,
-            external_name=args.external_name
-            if not isinstance(args.external_name, bytes) else args.external_name.decode('utf-8'),  # py2-3
-            layer_list=args.layer_list,
-            resource_group=args.resource_group,
-            peer_slots=args.peer_slots
-        )
-        return self.handle_replies(args, replies)
+        external_name = args.external_name \
+            if not isinstance(args.external_name, bytes) else args.external_name.decode('utf-8')  # py2-3
+        return self.send_or_queue(args, TransactionOperation(
+            TransactionStage.RESOURCE_DEFINITIONS,
+            "create",
+            "resource definition",
+            args.name or external_name,
+            lambda lapi: lapi.resource_dfn_create(
+                args.name,
+                args.port,
+                external_name=external_name,
+                layer_list=args.layer_list,
+                resource_group=args.resource_group,
+                peer_slots=args.peer_slots
+            ),
+            resource_definition=args.name or external_name
+        ))
 
     def auto_place(self, args):
 
@@ -299,46 +367,200 @@ class ResourceDefinitionCommands(Commands):
             diskless_type=diskless_type)
         return self.handle_replies(args, replies)
 
-    def clone(self, args):
-        clone_resp = self.get_linstorapi().resource_dfn_clone(
-            args.source_resource,
-            args.clone_name,
-            args.external_name,
-            use_zfs_clone=args.use_zfs_clone,
-            volume_passphrases=args.volume_passphrase,
-            layer_list=args.layer_list,
-            resource_group=args.resource_group
-        )
+    @classmethod
+    def _clone_targets(cls, args):
+        """
+        :return: (source, clone name) pairs to clone, the clone name is None if only an external name is given
+        :rtype: list[(str, Optional[str])]
+        """
+        targets = []
+        for pair in args.pairs or []:
+            source, sep, clone_name = pair.partition(":")
+            if not sep or not source or not clone_name:
+                raise ArgumentError("Clone pairs have to be given as SOURCE:CLONE, got '{p}'".format(p=pair))
+            targets.append((source, clone_name))
+
+        if args.count or args.name_template:
+            if not args.count or not args.name_template or not args.source_resource:
+                raise ArgumentError("--count and --name-template have to be used together with SOURCE_RESOURCE")
+            try:
+                names = [args.name_template.format(n=n) for n in range(1, args.count + 1)]
+            except (KeyError, IndexError, ValueError) as err:
+                raise ArgumentError("Invalid --name-template '{t}': {e}".format(t=args.name_template, e=err))
+            if len(set(names)) != len(names):
+                raise ArgumentError("--name-template has to contain {n} to create distinct names")
+            targets += [(args.source_resource, name) for name in args.clone_name + names]
+        elif args.source_resource:
+            targets += [(args.source_resource, name) for name in args.clone_name or [None]]
+
+        if not targets:
+            raise ArgumentError("Specify SOURCE_RESOURCE or --pairs")
+        if args.external_name and len(targets) > 1:
+            raise ArgumentError("--external-name can only be used for a single clone")
+        return targets
 
-        if not args.curl:
-            rc = self.handle_replies(args, clone_resp.messages)
+    @classmethod
+    def _start_clone(cls, lapi, args, source, clone_name):
+        """
+        :return: the clone response or None and the replies to show
+        :rtype: (Optional[linstor.responses.CloneStarted], list[ApiCallResponse])
+        """
+        try:
+            clone_resp = lapi.resource_dfn_clone(
+                source,
+                clone_name,
+                args.external_name,
+                use_zfs_clone=args.use_zfs_clone,
+                volume_passphrases=args.volume_passphrase,
+                layer_list=args.layer_list,
+                resource_group=args.resource_group
+            )
+        except linstor.LinstorApiCallError as err:
+            return None, err.all_errors()
+        if clone_resp is None:
+            return None, []
+        if isinstance(clone_resp.data_v1, list):
+            # the controller refused the clone, the body holds the error replies
+            return None, [linstor.ApiCallResponse(x) for x in clone_resp.data_v1]
+        return clone_resp, clone_resp.messages
+
+    def _wait_clones_complete(self, args, clones):
+        """
+        Polls the resource definitions of all clones together until they are no longer cloning, results are printed
+        as the clones finish.
 
-            if rc == ExitCode.OK and not args.no_wait:
-                if not args.machine_readable:
-                    print("Waiting for cloning to complete...")
-                try:
-                    res = self.get_linstorapi().resource_dfn_clone_wait_complete(
-                        clone_resp.source_name, clone_resp.clone_name, timeout=args.wait_timeout)
-                    if not res:
-                        rc = ExitCode.API_ERROR
+        :param list[linstor.responses.CloneStarted] clones: started clones
+        :return: exit code
+        """
+        pending = {clone.clone_name.lower(): clone.clone_name for clone in clones}
+        rc = ExitCode.OK
+        start = time.time()
+        while pending:
+            names = sorted(pending.values())
+            chunks = [names[i:i + self.POLL_CHUNK_SIZE] for i in range(0, len(names), self.POLL_CHUNK_SIZE)]
+            replies = self.run_concurrent(
+                [lambda lapi, chunk=chunk: lapi.resource_dfn_list_raise(
+                    query_volume_definitions=False, filter_by_resource_definitions=chunk).resource_definitions
+                 for chunk in chunks],
+                args.parallel
+            )
+            rsc_dfns = {rsc_dfn.name.lower(): rsc_dfn for reply in replies for rsc_dfn in reply}
+            for name in names:
+                rsc_dfn = rsc_dfns.get(name.lower())
+                if rsc_dfn is not None and FLAG_CLONING in rsc_dfn.flags and FLAG_FAILED not in rsc_dfn.flags:
+                    continue
+                del pending[name.lower()]
+                if rsc_dfn is not None and FLAG_FAILED not in rsc_dfn.flags:
                     if not args.machine_readable:
-                        if res:
-                            print("{msg} cloning {c}.".format(
-                                c=clone_resp.clone_name,
-                                msg=Output.color_str("Completed", Color.GREEN, args.no_color)))
-                        else:
-                            print("{msg} cloning {c}, please check resource status or satellite errors.".format(
-                                c=clone_resp.clone_name, msg=Output.color_str("Failed", Color.RED, args.no_color)))
-                except linstor.LinstorApiCallError as e:
+                        print("{msg} cloning {c}.".format(
+                            c=name, msg=Output.color_str("Completed", Color.GREEN, args.no_color)))
+                else:
                     rc = ExitCode.API_ERROR
-                    Output.handle_ret(e.main_error, args.no_color, False, sys.stderr)
+                    if not args.machine_readable:
+                        print("{msg} cloning {c}, please check resource status or satellite errors.".format(
+                            c=name, msg=Output.color_str("Failed", Color.RED, args.no_color)))
+                sys.stdout.flush()
 
-            return rc
-        return ExitCode.OK
+            if pending:
+                if args.wait_timeout and time.time() - start > args.wait_timeout:
+                    raise linstor.LinstorTimeoutError("{n} resource(s) didn't finish clone in time: {c}".format(
+                        n=len(pending), c=", ".join(sorted(pending.values()))))
+                time.sleep(self.CLONE_POLL_INTERVAL)
+        return rc
+
+    def clone(self, args):
+        targets = self._clone_targets(args)
+        results = self.run_concurrent(
+            [lambda lapi, source=source, clone_name=clone_name: self._start_clone(lapi, args, source, clone_name)
+             for source, clone_name in targets],
+            args.parallel
+        )
+        if args.curl:
+            return ExitCode.OK
+
+        rc = ExitCode.OK
+        if args.machine_readable:
+            self.handle_replies(args, [reply for _, replies in results for reply in replies])
+        started = []
+        for clone_resp, replies in results:
+            if not args.machine_readable:
+                current_rc = self.handle_replies(args, replies)
+                if current_rc != ExitCode.OK:
+                    rc = current_rc
+            if clone_resp is not None and not any(x.is_error() for x in replies):
+                started.append(clone_resp)
+            else:
+                rc = ExitCode.API_ERROR
+
+        if started and not args.no_wait and (rc == ExitCode.OK or len(targets) > 1):
+            if not args.machine_readable:
+                if len(started) == 1:
+                    print("Waiting for cloning to complete...")
+                else:
+                    print("Waiting for {n} clones to complete...".format(n=len(started)))
+            sys.stdout.flush()
+            wait_rc = self._wait_clones_complete(args, started)
+            if wait_rc != ExitCode.OK:
+                rc = wait_rc
+        return rc
+
+    def _wait_sync_targets(self, args):
+        """
+        Resolves the resource names and selectors of wait-sync to resource definition names.
+
+        :rtype: list[str]
+        """
+        if not args.resource_name and not args.resource_group and not args.props:
+            raise ArgumentError("Specify resource names, --resource-group or --props")
+
+        rsc_dfns = self.get_linstorapi().resource_dfn_list_raise(
+            query_volume_definitions=False,
+            filter_by_resource_definitions=args.resource_name or None,
+            filter_by_props=args.props
+        ).resource_definitions
+        if args.resource_name:
+            known = {x.name.lower() for x in rsc_dfns}
+            missing = [x for x in args.resource_name if x.lower() not in known]
+            if missing:
+                raise LinstorClientError(
+                    "Resource definition(s) not found: " + ", ".join(missing), ExitCode.OBJECT_NOT_FOUND)
+        if args.resource_group:
+            rsc_grps = {x.lower() for x in args.resource_group}
+            rsc_dfns = [x for x in rsc_dfns if x.resource_group_name.lower() in rsc_grps]
+        return [x.name for x in rsc_dfns]
 
     def wait_sync(self, args):
-        # this method either returns True or raises
-        self.get_linstorapi().resource_dfn_wait_synced(args.resource_name, timeout=args.wait_timeout)
+        if args.interval <= 0:
+            raise ArgumentError("--interval has to be greater than 0")
+        if args.curl:
+            self.get_linstorapi().resource_list(filter_by_resources=args.resource_name or None)
+            return ExitCode.OK
+
+        tracker = SyncTracker(self._wait_sync_targets(args))
+        show_progress = sys.stderr.isatty()
+        start = time.time()
+        try:
+            while tracker.pending:
+                # one request per chunk of names keeps the query string short, the chunks are fetched concurrently
+                chunks = [tracker.pending[i:i + self.POLL_CHUNK_SIZE]
+                          for i in range(0, len(tracker.pending), self.POLL_CHUNK_SIZE)]
+                replies = self.run_concurrent(
+                    [lambda lapi, names=names: lapi.resource_list_raise(filter_by_resources=names) for names in chunks])
+                tracker.update([rsc for rsc_resp in replies for rsc in rsc_resp.resources])
+                if show_progress:
+                    sys.stderr.write("\r" + tracker.status() + CLEAR_LINE)
+                    sys.stderr.flush()
+                if not tracker.pending:
+                    break
+                if args.wait_timeout and time.time() - start > args.wait_timeout:
+                    raise linstor.LinstorTimeoutError("{n} resource(s) didn't get ready in time: {r}".format(
+                        n=len(tracker.pending), r=", ".join(tracker.pending)))
+                time.sleep(args.interval)
+        finally:
+            if show_progress:
+                sys.stderr.write("\n")
+        if tracker.total > 1 and not args.machine_readable:
+            print("{t} resources synchronized in {s:.0f}s".format(t=tracker.total, s=time.time() - start))
         return ExitCode.OK
 
     def modify(self, args):
@@ -355,9 +577,15 @@ class ResourceDefinitionCommands(Commands):
     def delete(self, args):
         async_flag = vars(args)["async"]
 
-        # execute delete rscdfns and flatten result list
-        replies = [x for subx in args.name for x in self._linstor.resource_dfn_delete(subx, async_flag)]
-        return self.handle_replies(args, replies)
+        results = self.run_concurrent(
+            [lambda lapi, rsc_dfn_name=rsc_dfn_name: lapi.resource_dfn_delete(rsc_dfn_name, async_flag)
+             for rsc_dfn_name in args.name],
+            args.parallel
+        )
+        if async_flag:
+            self.record_jobs(args, [(Job(KIND_RSC_DFN_DELETE, resource=rsc_dfn_name), replies)
+                                    for rsc_dfn_name, replies in zip(args.name, results)])
+        return self.handle_replies(args, [reply for replies in results for reply in replies])
 
     @classmethod
     def state_value(cls, tbl, rsc_dfn):
@@ -435,7 +663,8 @@ class ResourceDefinitionCommands(Commands):
     def list(self, args):
         args = self.merge_config_args('resource-definition.list', args)
         if args.from_file:
-            lstmsg = [linstor.responses.ResourceDefinitionResponse(json.load(args.from_file))]
+            lstmsg = [linstor.responses.ResourceDefinitionResponse(
+                self.load_from_file(args.from_file, "resource_definitions"))]
         else:
             lstmsg = self._linstor.resource_dfn_list(
                 query_volume_definitions=False,
@@ -454,7 +683,7 @@ class ResourceDefinitionCommands(Commands):
 
     def print_props(self, args):
         if args.from_file:
-            file_data = json.load(args.from_file)
+            file_data = self.load_from_file(args.from_file, "resource_definitions")
             rsc_dfn = filter(lambda rsc: rsc["name"] == args.resource_name, file_data)
             lstmsg = [linstor.responses.ResourceDefinitionResponse(rsc_dfn)]
         else:
@@ -467,8 +696,38 @@ class ResourceDefinitionCommands(Commands):
     def set_props(self, args):
         args = self._attach_aux_prop(args)
         mod_prop_dict = Commands.parse_key_value_pairs([(args.key, args.value)])
-        replies = self._linstor.resource_dfn_modify(args.name, mod_prop_dict['pairs'], mod_prop_dict['delete'])
-        return self.handle_replies(args, replies)
+        return self.send_or_queue(args, TransactionOperation(
+            TransactionStage.RESOURCE_DEFINITION_PROPS,
+            "set-property",
+            "resource definition",
+            args.name,
+            lambda lapi: lapi.resource_dfn_modify(args.name, mod_prop_dict['pairs'], mod_prop_dict['delete']),
+            resource_definition=args.name
+        ))
+
+    def set_props_bulk(self, args):
+        if args.name_regex is None and args.props is None and args.resource_group is None:
+            raise ArgumentError("At least one of --name-regex, --props or --resource-group is required")
+
+        args = self._attach_aux_prop(args)
+        mod_prop_dict = Commands.parse_key_value_pairs([(args.key, args.value)])
+
+        rsc_dfns = self._linstor.resource_dfn_list_raise(
+            query_volume_definitions=False,
+            filter_by_props=args.props
+        ).resource_definitions
+        if args.resource_group:
+            rsc_grps = {rsc_grp.lower() for rsc_grp in args.resource_group}
+            rsc_dfns = [x for x in rsc_dfns if x.resource_group_name.lower() in rsc_grps]
+        rsc_dfn_names = self.filter_by_name_regex([x.name for x in rsc_dfns], args.name_regex)
+
+        return self.bulk_modify(
+            args,
+            rsc_dfn_names,
+            lambda lapi, rsc_dfn_name: lapi.resource_dfn_modify(
+                rsc_dfn_name, mod_prop_dict['pairs'], mod_prop_dict['delete']),
+            "resource definitions"
+        )
 
     def set_drbd_opts(self, args):
         a = DrbdOptions.filter_new(args)
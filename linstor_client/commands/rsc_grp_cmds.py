@@ -1,18 +1,30 @@
 import linstor_client.argparse.argparse as argparse
 
+import collections
+import csv
+import sys
+import time
+
 import linstor
+import linstor.sharedconsts as apiconsts
 import linstor_client
 from linstor import SizeCalc
 # flake8: noqa
 import json
 from linstor.responses import ResourceGroupResponse
-from linstor_client.commands import Commands, DrbdOptions
+from linstor_client.commands import ArgumentError, Commands, DrbdOptions
 from linstor_client.consts import ExitCode
-from linstor_client.utils import rangecheck
+from linstor_client.export import json_input_file
+from linstor_client.parallel import RateLimiter
+from linstor_client.utils import LinstorClientError, Progress, ReportAggregator, rangecheck
+
+SpawnRow = collections.namedtuple("SpawnRow", ["name", "sizes", "props"])
 
 
 class ResourceGroupCommands(Commands):
     OBJECT_NAME = 'resource-definition'  # resource-definition is used here for properties
+    SPAWN_RETRIES = 3
+    SPAWN_RETRY_DELAY = 1.0
 
     _rsc_grp_headers = [
         linstor_client.TableHeader("ResourceGroup"),
@@ -129,9 +141,14 @@ class ResourceGroupCommands(Commands):
                  + 'Can be key=value pairs where key is the property name and value column header')
         p_lrscgrps.add_argument(
             '--from-file',
-            type=argparse.FileType('r'),
+            type=json_input_file,
             help="Read data to display from the given json file",
         )
+        p_lrscgrps.add_argument(
+            '--no-volume-groups',
+            action="store_true",
+            help="Do not query the volume groups of the listed resource groups, VlmNrs will be empty"
+        )
         p_lrscgrps.set_defaults(func=self.list)
         #  ------------ LIST END
 
@@ -143,7 +160,7 @@ class ResourceGroupCommands(Commands):
         p_sp.add_argument('-p', '--pastable', action="store_true", help='Generate pastable output')
         p_sp.add_argument(
             '--from-file',
-            type=argparse.FileType('r'),
+            type=json_input_file,
             help="Read data to display from the given json file",
         )
         p_sp.add_argument(
@@ -186,7 +203,13 @@ class ResourceGroupCommands(Commands):
         p_spawn = res_grp_subp.add_parser(
             Commands.Subcommands.Spawn.LONG,
             aliases=[Commands.Subcommands.Spawn.SHORT],
-            description="Spawns a new resource with the settings of the specified resource group."
+            description="Spawns a new resource with the settings of the specified resource group.\n"
+                        "With --from-file one resource definition is spawned per row of a CSV manifest with the\n"
+                        "columns name, sizes (space separated) and props (space separated KEY=VALUE, set on the\n"
+                        "resource definition after spawning). Sizes given after the resource group name are used\n"
+                        "for rows without sizes. Rows are spawned concurrently, network errors and timeouts are\n"
+                        "retried.",
+            formatter_class=argparse.RawTextHelpFormatter
         )
         p_spawn.add_argument(
             '-p', '--partial', action='store_true', help="Allow mismatching volume sizes."
@@ -202,6 +225,7 @@ class ResourceGroupCommands(Commands):
         ).completer = self.resource_grp_completer
         p_spawn.add_argument(
             'resource_definition_name',
+            nargs='?',
             help="New Resource definition name to create. Will be ignored if EXTERNAL_NAME is set."
         )
         p_spawn.add_argument(
@@ -215,6 +239,34 @@ class ResourceGroupCommands(Commands):
             '--peer-slots',
             type=rangecheck(1, 31),
             help='(DRBD) peer slots for new resources')
+        p_spawn.add_argument(
+            '--from-file',
+            dest='manifest',  # from_file would switch the client to offline list output
+            type=argparse.FileType('r'),
+            metavar='MANIFEST',
+            help="CSV file with one resource definition to spawn per row, '-' reads stdin"
+        )
+        p_spawn.add_argument(
+            '--rate',
+            type=float,
+            metavar='N',
+            help='Maximal number of requests per second with --from-file (default: unlimited)'
+        )
+        p_spawn.add_argument(
+            '--retries',
+            type=rangecheck(0, 100),
+            default=self.SPAWN_RETRIES,
+            metavar='N',
+            help='Retries of a request that failed with a network error or timeout (default: {d})'.format(
+                d=self.SPAWN_RETRIES)
+        )
+        p_spawn.add_argument(
+            '--result-file',
+            type=argparse.FileType('w'),
+            metavar='FILE',
+            help='Write one CSV row per manifest row with name, result, attempts and message'
+        )
+        self.add_parallel_argument(p_spawn)
         self.add_auto_select_argparse_arguments(p_spawn, use_place_count=True, use_p_for_providers=False)
         p_spawn.set_defaults(func=self.spawn)
         #  ------------ SPAWN END
@@ -315,7 +367,13 @@ class ResourceGroupCommands(Commands):
         replies = self._linstor.resource_group_delete(args.name)
         return self.handle_replies(args, replies)
 
-    def show(self, args, lstmsg):
+    def show(self, args, lstmsg, vlm_grps_map=None):
+        """
+
+        :param args: argparse arguments
+        :param ResourceGroupResponse lstmsg: resource groups to show
+        :param Optional[dict[str, list[VolumeGroup]]] vlm_grps_map: volume groups by resource group name
+        """
         tbl = linstor_client.Table(utf8=not args.no_utf8, colors=not args.no_color, pastable=args.pastable)
 
         for hdr in self._rsc_grp_headers:
@@ -327,10 +385,9 @@ class ResourceGroupCommands(Commands):
 
         tbl.set_groupby(args.groupby if args.groupby else [tbl.header_name(0)])
 
+        vlm_grps_map = vlm_grps_map if vlm_grps_map else {}
         for rsc_grp in rsc_grps.resource_groups:
-            vlm_grps = []
-            if not args.from_file:
-                vlm_grps = self.get_linstorapi().volume_group_list_raise(rsc_grp.name).volume_groups
+            vlm_grps = vlm_grps_map.get(rsc_grp.name, [])
             row = [
                 rsc_grp.name,
                 str(rsc_grp.select_filter),
@@ -345,10 +402,27 @@ class ResourceGroupCommands(Commands):
     def list(self, args):
         args = self.merge_config_args('resource-group.list', args)
         if args.from_file:
-            lstmsg = [linstor.responses.ResourceGroupResponse(json.load(args.from_file))]
+            lstmsg = [linstor.responses.ResourceGroupResponse(self.load_from_file(args.from_file, "resource_groups"))]
         else:
             lstmsg = [self._linstor.resource_group_list_raise(args.resource_groups, filter_by_props=args.props)]
-        return self.output_list(args, lstmsg, self.show)
+
+        vlm_grps_map = {}
+        if not (args.from_file or args.no_volume_groups or args.machine_readable or args.curl):
+            vlm_grps_map = self._volume_groups_by_rsc_grp(lstmsg[0].resource_groups)
+        return self.output_list(args, lstmsg, lambda a, m: self.show(a, m, vlm_grps_map))
+
+    def _volume_groups_by_rsc_grp(self, rsc_grps):
+        """
+        Fetches the volume groups of all given resource groups concurrently.
+
+        :param list[ResourceGroup] rsc_grps: resource groups to query
+        :return: volume groups by resource group name
+        :rtype: dict[str, list[VolumeGroup]]
+        """
+        rsc_grp_names = [x.name for x in rsc_grps]
+        vlm_grp_resps = self.run_concurrent(
+            [lambda lapi, name=name: lapi.volume_group_list_raise(name) for name in rsc_grp_names])
+        return {name: resp.volume_groups for name, resp in zip(rsc_grp_names, vlm_grp_resps)}
 
     @classmethod
     def _props_show(cls, args, lstmsg):
@@ -360,7 +434,7 @@ class ResourceGroupCommands(Commands):
 
     def print_props(self, args):
         if args.from_file:
-            file_data = json.load(args.from_file)
+            file_data = self.load_from_file(args.from_file, "resource_groups")
             rsc_grp = filter(lambda rscgrp: rscgrp["name"] == args.name, file_data)
             lstmsg = [linstor.responses.ResourceGroupResponse(rsc_grp)]
         else:
@@ -391,11 +465,11 @@ class ResourceGroupCommands(Commands):
         )
         return self.handle_replies(args, replies)
 
-    def spawn(self, args):
-        replies = self.get_linstorapi().resource_group_spawn(
+    def _spawn(self, lapi, args, rsc_dfn_name, volume_sizes):
+        return lapi.resource_group_spawn(
             args.resource_group_name,
-            args.resource_definition_name,
-            vlm_sizes=args.volume_sizes,
+            rsc_dfn_name,
+            vlm_sizes=volume_sizes,
             partial=args.partial,
             definitions_only=args.definition_only,
             external_name=args.external_name,
@@ -415,17 +489,163 @@ class ResourceGroupCommands(Commands):
             peer_slots=args.peer_slots,
             volume_passphrases=args.volume_passphrase,
         )
+
+    def spawn(self, args):
+        if args.manifest:
+            return self.spawn_from_file(args)
+        if not args.resource_definition_name:
+            raise ArgumentError("Specify a resource definition name or --from-file")
+        replies = self._spawn(self.get_linstorapi(), args, args.resource_definition_name, args.volume_sizes)
         return self.handle_replies(args, replies)
 
+    @classmethod
+    def read_spawn_manifest(cls, stream):
+        """
+        Reads a spawn manifest, a CSV file with a header row naming the columns name, sizes and props.
+
+        :param stream: opened manifest
+        :return: the rows in file order
+        :rtype: list[SpawnRow]
+        :raises LinstorClientError: on missing columns, empty or duplicate names and malformed properties
+        """
+        reader = csv.DictReader(stream)
+        columns = [x.strip().lower() for x in reader.fieldnames or []]
+        if "name" not in columns:
+            raise LinstorClientError("Manifest has no 'name' column", ExitCode.ARGPARSE_ERROR)
+        unknown = [x for x in columns if x not in ["name", "sizes", "props"]]
+        if unknown:
+            raise LinstorClientError("Manifest has unknown columns: " + ", ".join(unknown), ExitCode.ARGPARSE_ERROR)
+        reader.fieldnames = columns
+
+        rows = []
+        seen = set()
+        for raw in reader:
+            line = reader.line_num
+            name = (raw.get("name") or "").strip()
+            if not name:
+                raise LinstorClientError("Manifest line {l}: name missing".format(l=line), ExitCode.ARGPARSE_ERROR)
+            if name.lower() in seen:
+                raise LinstorClientError(
+                    "Manifest line {l}: duplicate name {n}".format(l=line, n=name), ExitCode.ARGPARSE_ERROR)
+            seen.add(name.lower())
+            props = {}
+            for pair in (raw.get("props") or "").split():
+                key, sep, value = pair.partition("=")
+                if not sep or not key:
+                    raise LinstorClientError(
+                        "Manifest line {l}: property '{p}' is not KEY=VALUE".format(l=line, p=pair),
+                        ExitCode.ARGPARSE_ERROR)
+                props[key] = value
+            rows.append(SpawnRow(name, (raw.get("sizes") or "").split(), props))
+        return rows
+
+    def _with_retries(self, args, limiter, call):
+        """
+        Sends a request, requests that fail with a network error or timeout are sent again after an
+        exponentially growing delay.
+
+        :return: (replies, number of attempts)
+        :rtype: (list[ApiCallResponse], int)
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            limiter.acquire()
+            try:
+                return call(attempt), attempt
+            except (linstor.LinstorNetworkError, linstor.LinstorTimeoutError) as err:
+                if attempt > args.retries:
+                    reply = linstor.ApiCallResponse({"ret_code": apiconsts.MASK_ERROR, "message": err.message})
+                    return [reply], attempt
+                time.sleep(self.SPAWN_RETRY_DELAY * 2 ** (attempt - 1))
+
+    def _spawn_row(self, lapi, args, limiter, row, default_sizes):
+        """
+        :return: (replies, number of attempts)
+        :rtype: (list[ApiCallResponse], int)
+        """
+        def spawn(attempt):
+            replies = self._spawn(lapi, args, row.name, row.sizes or default_sizes)
+            if attempt > 1 and any(x.is_error(apiconsts.FAIL_EXISTS_RSC_DFN) for x in replies):
+                # the earlier attempt timed out after the controller created the resource definition
+                replies = [x for x in replies if not x.is_error(apiconsts.FAIL_EXISTS_RSC_DFN)]
+            return replies
+
+        replies, attempts = self._with_retries(args, limiter, spawn)
+        if row.props and not any(x.is_error() for x in replies):
+            prop_replies, prop_attempts = self._with_retries(
+                args, limiter, lambda _: lapi.resource_dfn_modify(row.name, row.props, []))
+            replies += prop_replies
+            attempts += prop_attempts - 1
+        return replies, attempts
+
+    def spawn_from_file(self, args):
+        if args.external_name:
+            raise ArgumentError("--from-file takes the resource definition names from the manifest")
+        if args.rate is not None and args.rate <= 0:
+            raise ArgumentError("--rate has to be greater than 0")
+        rows = self.read_spawn_manifest(args.manifest)
+        if not rows:
+            sys.stderr.write("The manifest contains no rows.\n")
+            return ExitCode.OK
+
+        # the names come from the manifest, all positional arguments are sizes
+        default_sizes = ([args.resource_definition_name] if args.resource_definition_name else []) + args.volume_sizes
+        limiter = RateLimiter(args.rate)
+        progress = Progress("resource definitions", len(rows)) if not args.machine_readable else None
+
+        def spawn_row(lapi, row):
+            result = self._spawn_row(lapi, args, limiter, row, default_sizes)
+            if progress:
+                progress.step()
+            return result
+
+        results = self.run_concurrent(
+            [lambda lapi, row=row: spawn_row(lapi, row) for row in rows],
+            args.parallel
+        )
+        if progress:
+            progress.finish()
+
+        if args.result_file:
+            writer = csv.writer(args.result_file)
+            writer.writerow(["name", "result", "attempts", "message"])
+            for row, (replies, attempts) in zip(rows, results):
+                writer.writerow([
+                    row.name,
+                    self.get_replies_state(replies)[0],
+                    attempts,
+                    " ".join(x.message for x in replies if x.is_error() or x.is_warning())
+                ])
+            args.result_file.close()
+
+        if args.curl:
+            return ExitCode.OK
+        if args.machine_readable:
+            return self.handle_replies(args, [reply for replies, _ in results for reply in replies])
+
+        reports = ReportAggregator()
+        failed = 0
+        for row, (replies, _) in zip(rows, results):
+            if any(reply.is_error() for reply in replies):
+                failed += 1
+            for reply in replies:
+                if not reply.is_success():
+                    reports.add(reply, row.name)
+        rc = reports.print_reports(args.no_color, args.warn_as_error, sys.stdout)
+        print("Spawned {s} of {t} resource definitions.".format(s=len(rows) - failed, t=len(rows)))
+        return rc
+
     def qmvs(self, args):
-        replies = self.get_linstorapi().resource_group_qmvs(
-            args.resource_group_name
+        replies, storage_pool_dfns = self._query_max_volume_size(
+            args,
+            lambda lapi: lapi.resource_group_qmvs(args.resource_group_name)
         )
         api_responses = self.get_linstorapi().filter_api_call_response(replies)
         if api_responses:
             return self.handle_replies(args, api_responses)
 
-        return self.output_list(args, replies, self._show_query_max_volume)
+        return self.output_list(args, replies, lambda a, m: self._show_query_max_volume(a, m, storage_pool_dfns))
 
     @staticmethod
     def _show_query_size_info(args, info):
@@ -1,8 +1,9 @@
 import linstor_client.argparse.argparse as argparse
 
 import linstor_client
-from linstor_client.commands import Commands
+from linstor_client.commands import Commands, DefaultState, TransactionOperation, TransactionStage, TransactionState
 from linstor_client.consts import Color
+from linstor_client.jobs import KIND_SNAPSHOT_CREATE, Job
 from linstor.sharedconsts import FLAG_DELETE, FLAG_SUCCESSFUL, FLAG_FAILED_DEPLOYMENT, FLAG_FAILED_DISCONNECT
 from linstor.sharedconsts import FLAG_BACKUP, FLAG_SHIPPING, FLAG_BACKUP_TARGET, FLAG_BACKUP_SOURCE
 from linstor_client.utils import Output
@@ -69,7 +70,7 @@ class SnapshotCommands(Commands):
             'snapshot_name',
             type=str,
             help='Name of the snapshot local to the resource definition')
-        p_new_snapshot.set_defaults(func=self.create)
+        p_new_snapshot.set_defaults(func=self.create, allowed_states=[DefaultState, TransactionState])
 
         # new multisnapshot
         p_new_multi_snapshot = snapshot_subp.add_parser(
@@ -289,8 +290,23 @@ class SnapshotCommands(Commands):
 
     def create(self, args):
         async_flag = vars(args)["async"]
+        transaction = self.open_transaction()
+        if transaction:
+            return transaction.queue(TransactionOperation(
+                TransactionStage.SNAPSHOTS,
+                "create",
+                "snapshot",
+                "{r}:{s}".format(r=args.resource_definition_name, s=args.snapshot_name),
+                lambda lapi: lapi.snapshot_create(
+                    args.node_name, args.resource_definition_name, args.snapshot_name, async_flag),
+                resource_definition=args.resource_definition_name
+            ))
+
         replies = self._linstor.snapshot_create(
             args.node_name, args.resource_definition_name, args.snapshot_name, async_flag)
+        if async_flag:
+            self.record_jobs(args, [(Job(KIND_SNAPSHOT_CREATE, resource=args.resource_definition_name,
+                                         snapshot=args.snapshot_name), replies)])
         return self.handle_replies(args, replies)
 
     def create_multi(self, args):
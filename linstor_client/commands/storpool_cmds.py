@@ -9,7 +9,8 @@ from linstor import SizeCalc
 # flake8: noqa
 from linstor.responses import StoragePoolListResponse
 from linstor_client.commands import ArgumentError, Commands
-from linstor_client.utils import Output
+from linstor_client.export import json_input_file
+from linstor_client.utils import Output, ReportAggregator
 
 
 class StoragePoolCommands(Commands):
@@ -322,6 +323,7 @@ class StoragePoolCommands(Commands):
             help='Name of the Node where the storage pool exists.').completer = self.node_completer
         p_rm_storpool.add_argument('name',
                                    help='Name of the storage pool to delete').completer = self.storage_pool_completer
+        self.add_parallel_argument(p_rm_storpool)
         p_rm_storpool.set_defaults(func=self.delete)
 
         # list storpool
@@ -351,9 +353,15 @@ class StoragePoolCommands(Commands):
                  + 'Can be key=value pairs where key is the property name and value column header')
         p_lstorpool.add_argument(
             '--from-file',
-            type=argparse.FileType('r'),
+            type=json_input_file,
             help="Read data to display from the given json file",
         )
+        p_lstorpool.add_argument(
+            '--full-reports',
+            action="store_true",
+            help="Print every reported error/warning, instead of each distinct report once with its occurrences."
+        )
+        self.add_watch_arguments(p_lstorpool)
         p_lstorpool.set_defaults(func=self.list)
 
         # show properties
@@ -427,8 +435,11 @@ class StoragePoolCommands(Commands):
         return self.handle_replies(args, replies)
 
     def delete(self, args):
-        # execute delete storpooldfns and flatten result list
-        replies = [x for subx in args.node_name for x in self._linstor.storage_pool_delete(subx, args.name)]
+        replies = self.fan_out(
+            args,
+            [lambda lapi, node_name=node_name: lapi.storage_pool_delete(node_name, args.name)
+             for node_name in args.node_name]
+        )
         return self.handle_replies(args, replies)
 
     def show(self, args, lstmsg):
@@ -442,7 +453,8 @@ class StoragePoolCommands(Commands):
 
         tbl.set_groupby(args.groupby if args.groupby else [self._stor_pool_headers[0].name])
 
-        errors = []
+        reports = ReportAggregator()
+        full_reports = []
         for storpool in storage_pool_resp.storage_pools:
             driver_device = linstor.StoragePoolDriver.storage_props_to_driver_pool(
                 storpool.provider_kind,
@@ -455,9 +467,11 @@ class StoragePoolCommands(Commands):
                 free_capacity = SizeCalc.approximate_size_string(storpool.free_space.free_capacity)
                 total_capacity = SizeCalc.approximate_size_string(storpool.free_space.total_capacity)
 
-            for error in storpool.reports:
-                if error not in errors:
-                    errors.append(error)
+            for report in storpool.reports:
+                if args.full_reports:
+                    full_reports.append(report)
+                else:
+                    reports.add(report, storpool.node_name + "/" + storpool.name)
 
             state_str, state_color = self.get_replies_state(storpool.reports)
             row = [
@@ -475,9 +489,10 @@ class StoragePoolCommands(Commands):
                 row.append(storpool.properties.get(sprop, ''))
             tbl.add_row(row)
         tbl.show()
-        for err in errors:
+        reports.print_reports(no_color=args.no_color, warn_as_error=args.warn_as_error)
+        for report in full_reports:
             Output.handle_ret(
-                err,
+                report,
                 warn_as_error=args.warn_as_error,
                 no_color=args.no_color
             )
@@ -485,9 +500,11 @@ class StoragePoolCommands(Commands):
     def list(self, args):
         args = self.merge_config_args('storage-pool.list', args)
         if args.from_file:
-            lstmsg = [linstor.responses.StoragePoolListResponse(json.load(args.from_file))]
-        else:
-            lstmsg = self._linstor.storage_pool_list(args.nodes, args.storage_pools, args.props)
+            return self.output_from_file(args, "storage_pools", linstor.responses.StoragePoolListResponse, self.show)
+        if args.watch is not None:
+            return self.watch_list(
+                args, lambda: self._linstor.storage_pool_list(args.nodes, args.storage_pools, args.props), self.show, 2)
+        lstmsg = self._linstor.storage_pool_list(args.nodes, args.storage_pools, args.props)
         return self.output_list(args, lstmsg, self.show)
 
     @classmethod
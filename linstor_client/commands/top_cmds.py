@@ -0,0 +1,293 @@
+import sys
+import time
+
+import linstor
+import linstor.sharedconsts as apiconsts
+from linstor import SizeCalc
+
+import linstor_client
+import linstor_client.argparse.argparse as argparse
+from linstor_client.commands import ArgumentError, Commands
+from linstor_client.commands.vlm_cmds import VolumeCommands
+from linstor_client.consts import ExitCode
+from linstor_client.top import COLUMNS, KIND_CONNECTION, KIND_IN_USE, KIND_POOL, KIND_SYNC, KINDS, TopModel, \
+    TopRow, TopScreen, format_row
+from linstor_client.utils import LinstorClientError
+
+try:
+    import curses
+except ImportError:
+    curses = None
+
+
+class TopCommands(Commands):
+    HEADER_LINES = 3
+    KEY_HELP = "q quit  s sort  r reverse  / filter  1-4 toggle Sync/InUse/Conn/Pool  arrows/PgUp/PgDn scroll"
+
+    def __init__(self):
+        super(TopCommands, self).__init__()
+
+    def setup_commands(self, parser):
+        p_top = parser.add_parser(
+            Commands.TOP,
+            description="Full screen view of resources that are syncing, in use on more than one node or have\n"
+                        "failed connections and of the storage pool fill levels, refreshed every --interval\n"
+                        "seconds. Only rows that changed are redrawn, changed rows are highlighted.\n"
+                        "Without a terminal or with --once the rows are printed once.\n\n" + self.KEY_HELP,
+            formatter_class=argparse.RawTextHelpFormatter
+        )
+        p_top.add_argument(
+            '-n', '--nodes',
+            nargs='+',
+            type=str,
+            help='Filter by list of nodes').completer = self.node_completer
+        p_top.add_argument(
+            '-r', '--resources',
+            nargs='+',
+            type=str,
+            help='Filter by list of resources').completer = self.resource_completer
+        p_top.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            metavar='SECONDS',
+            help='Seconds between two refreshes (default: 2)'
+        )
+        p_top.add_argument(
+            '--sort',
+            choices=list(COLUMNS),
+            default="kind",
+            help="Column to sort by, 'value' is the sync progress or fill level"
+        )
+        p_top.add_argument('--reverse', action="store_true", help="Sort descending")
+        p_top.add_argument(
+            '--filter',
+            default="",
+            metavar='REGEX',
+            help='Only show rows whose resource, pool, node or detail matches REGEX'
+        )
+        p_top.add_argument(
+            '--kinds',
+            nargs='+',
+            choices=[x.lower() for x in KINDS],
+            type=str.lower,
+            help='Row kinds to show (default: all)'
+        )
+        p_top.add_argument('--once', action="store_true", help="Print the rows once instead of the full screen view")
+        p_top.add_argument('-p', '--pastable', action="store_true", help='Generate pastable output')
+        p_top.set_defaults(func=self.top)
+
+    @classmethod
+    def resource_rows(cls, rsc_resp):
+        """
+        Rows for volumes that are not established with all peers, resources in use on more than one node and failed
+        drbd connections.
+
+        :param linstor.responses.ResourceResponse rsc_resp: resource list with states
+        :return: rows by key
+        :rtype: dict[tuple, TopRow]
+        """
+        rows = {}
+        in_use = cls.get_inuse_lookup(rsc_resp.resource_states)
+        rsc_states = {(x.node_name, x.name): x for x in rsc_resp.resource_states}
+        for rsc in rsc_resp.resources:
+            if in_use.get(rsc.name, 0) > 1:
+                rsc_state = rsc_states.get((rsc.node_name, rsc.name))
+                if rsc_state and rsc_state.in_use:
+                    rows[(KIND_IN_USE, rsc.name, rsc.node_name)] = TopRow(
+                        KIND_IN_USE, rsc.name, rsc.node_name, "in use on {c} nodes".format(c=in_use[rsc.name]), None)
+
+            drbd_rsc = rsc.layer_data.drbd_resource if rsc.layer_data else None
+            if drbd_rsc:
+                for peer, conn in drbd_rsc.connections.items():
+                    if not conn.connected:
+                        rows[(KIND_CONNECTION, rsc.name, rsc.node_name, peer)] = TopRow(
+                            KIND_CONNECTION, rsc.name, rsc.node_name, "{p}: {m}".format(p=peer, m=conn.message), None)
+
+            if apiconsts.FLAG_RSC_INACTIVE in rsc.flags:
+                continue
+            for vlm in rsc.volumes:
+                for peer, repl_state in vlm.state.replication_states.items():
+                    if repl_state.replication_state == "Established":
+                        continue
+                    rows[(KIND_SYNC, rsc.name, rsc.node_name, vlm.number, peer)] = TopRow(
+                        KIND_SYNC,
+                        "{r}/{v}".format(r=rsc.name, v=vlm.number),
+                        rsc.node_name,
+                        VolumeCommands._format_repl_state(
+                            peer, repl_state.replication_state, repl_state.done_percentage),
+                        repl_state.done_percentage
+                    )
+        return rows
+
+    @classmethod
+    def storage_pool_rows(cls, storage_pool_resp):
+        """
+        Fill level rows of all storage pools that report their capacity.
+
+        :param linstor.responses.StoragePoolListResponse storage_pool_resp: storage pool list
+        :rtype: dict[tuple, TopRow]
+        """
+        rows = {}
+        for storpool in storage_pool_resp.storage_pools:
+            if storpool.is_diskless() or storpool.free_space is None or not storpool.free_space.total_capacity:
+                continue
+            total = storpool.free_space.total_capacity
+            used = total - storpool.free_space.free_capacity
+            rows[(KIND_POOL, storpool.name, storpool.node_name)] = TopRow(
+                KIND_POOL,
+                storpool.name,
+                storpool.node_name,
+                "{u} of {t} used".format(
+                    u=SizeCalc.approximate_size_string(used), t=SizeCalc.approximate_size_string(total)),
+                100.0 * used / total
+            )
+        return rows
+
+    def _fetch(self, args, model, rows):
+        """
+        Fetches the resource and storage pool lists and updates the model. Rows of a list are only computed again
+        if the list changed since the last fetch.
+
+        :param dict[str, dict] rows: rows by list from the previous fetch, updated in place
+        """
+        lapi = self.get_linstorapi()
+        rsc_resp = lapi.resource_list_raise(filter_by_nodes=args.nodes, filter_by_resources=args.resources)
+        if not getattr(lapi, "last_unchanged", False) or "resources" not in rows:
+            rows["resources"] = self.resource_rows(rsc_resp)
+        storage_pool_resp = lapi.storage_pool_list_raise(filter_by_nodes=args.nodes)
+        if not getattr(lapi, "last_unchanged", False) or "storage_pools" not in rows:
+            rows["storage_pools"] = self.storage_pool_rows(storage_pool_resp)
+
+        all_rows = dict(rows["resources"])
+        all_rows.update(rows["storage_pools"])
+        return model.update(all_rows)
+
+    def _print_once(self, args, model):
+        tbl = linstor_client.Table(utf8=not args.no_utf8, colors=not args.no_color, pastable=args.pastable)
+        for header, _ in COLUMNS.values():
+            tbl.add_column(header, just_txt='>' if header == "%" else '<')
+        for _, row in model.visible():
+            tbl.add_row([
+                row.kind,
+                row.name,
+                row.node,
+                "" if row.value is None else "{v:.1f}".format(v=row.value),
+                row.detail
+            ])
+        tbl.show()
+
+    def _status_line(self, args, model, error):
+        counts = model.counts()
+        status = "linstor top - every {i:g}s - {t}  {c}  sort: {s}{r}".format(
+            i=args.interval,
+            t=time.strftime("%H:%M:%S"),
+            c=" ".join("{k}: {n}".format(k=k, n=counts[k]) + ("" if k in model.kinds else "(hidden)")
+                       for k in KINDS),
+            s=model.sort,
+            r=" desc" if model.reverse else ""
+        )
+        if model.filter_text:
+            status += "  filter: " + model.filter_text
+        if error:
+            status += "  ERROR: " + error
+        return status
+
+    def _screen_lines(self, args, model, error, offset, filter_input, height, width):
+        lines = [
+            (self._status_line(args, model, error), True, False),
+            (self.KEY_HELP if filter_input is None else "Filter: " + filter_input + "_", False, False),
+            (format_row(None, width), True, False)
+        ]
+        for key, row in model.visible()[offset:offset + max(height - self.HEADER_LINES, 0)]:
+            lines.append((format_row(row, width), False, key in model.changed))
+        return lines
+
+    def _dashboard(self, stdscr, args, model):
+        try:
+            curses.curs_set(0)
+        except curses.error:
+            pass
+        stdscr.timeout(100)
+        screen = TopScreen(stdscr, header_attr=curses.A_REVERSE, changed_attr=curses.A_BOLD)
+        rows = {}
+        error = None
+        offset = 0
+        filter_input = None
+        next_fetch = 0
+        while True:
+            if time.time() >= next_fetch:
+                try:
+                    self._fetch(args, model, rows)
+                    error = None
+                except linstor.LinstorError as err:
+                    error = str(err).splitlines()[0] if str(err) else err.__class__.__name__
+                next_fetch = time.time() + args.interval
+
+            height, width = stdscr.getmaxyx()
+            page = max(height - self.HEADER_LINES, 1)
+            offset = max(min(offset, len(model.visible()) - page), 0)
+            screen.draw(self._screen_lines(args, model, error, offset, filter_input, height, width))
+            curses.doupdate()
+
+            key = stdscr.getch()
+            if key == -1:
+                continue
+            if key == curses.KEY_RESIZE:
+                screen.invalidate()
+                stdscr.clear()
+            elif filter_input is not None:
+                if key in (curses.KEY_ENTER, 10, 13):
+                    model.select(filter_text=filter_input)
+                    filter_input = None
+                elif key == 27:
+                    filter_input = None
+                elif key in (curses.KEY_BACKSPACE, 127, 8):
+                    filter_input = filter_input[:-1]
+                elif 32 <= key < 127:
+                    filter_input += chr(key)
+            elif key in (ord('q'), ord('Q'), 27):
+                return
+            elif key == ord('s'):
+                columns = list(COLUMNS)
+                model.select(sort=columns[(columns.index(model.sort) + 1) % len(columns)])
+            elif key == ord('r'):
+                model.select(reverse=not model.reverse)
+            elif key == ord('/'):
+                filter_input = model.filter_text
+            elif ord('1') <= key < ord('1') + len(KINDS):
+                model.select(kinds=model.kinds ^ {KINDS[key - ord('1')]})
+            elif key == curses.KEY_UP:
+                offset -= 1
+            elif key == curses.KEY_DOWN:
+                offset += 1
+            elif key == curses.KEY_PPAGE:
+                offset -= page
+            elif key == curses.KEY_NPAGE:
+                offset += page
+            elif key == curses.KEY_HOME:
+                offset = 0
+            elif key == curses.KEY_END:
+                offset = len(model.visible())
+
+    def top(self, args):
+        if args.machine_readable or args.curl:
+            raise ArgumentError("top can not be combined with machine readable output or --curl")
+        if args.interval <= 0:
+            raise ArgumentError("--interval has to be greater than 0")
+
+        kinds = [x for x in KINDS if x.lower() in args.kinds] if args.kinds else None
+        model = TopModel(sort=args.sort, reverse=args.reverse, filter_text=args.filter, kinds=kinds)
+        if args.once or not sys.stdout.isatty():
+            self._fetch(args, model, {})
+            self._print_once(args, model)
+            return ExitCode.OK
+
+        if curses is None:
+            raise LinstorClientError("The full screen view needs the python curses module, use --once",
+                                     ExitCode.OPTION_NOT_SUPPORTED)
+        try:
+            curses.wrapper(self._dashboard, args, model)
+        except KeyboardInterrupt:
+            pass
+        return ExitCode.OK
@@ -0,0 +1,193 @@
+import sys
+
+import linstor_client
+import linstor_client.argparse.argparse as argparse
+from linstor_client.commands import Commands, TransactionState
+from linstor_client.consts import Color, ExitCode
+
+
+class TransactionCommands(Commands):
+    _operation_headers = [
+        linstor_client.TableHeader("Stage"),
+        linstor_client.TableHeader("Operation"),
+        linstor_client.TableHeader("Type"),
+        linstor_client.TableHeader("Name")
+    ]
+
+    def __init__(self, state_service):
+        super(TransactionCommands, self).__init__()
+        self._state_service = state_service
+
+    def setup_commands(self, parser):
+        subcmds = [
+            Commands.Subcommands.Begin,
+            Commands.Subcommands.Abort,
+            Commands.Subcommands.Commit,
+            Commands.Subcommands.List
+        ]
+
+        tx_parser = parser.add_parser(
+            Commands.TRANSACTION,
+            aliases=["tx"],
+            formatter_class=argparse.RawTextHelpFormatter,
+            description="Queues resource definition, volume definition and resource creates, property changes of\n"
+                        "nodes, resource definitions, volume definitions and resources and snapshot creates.\n"
+                        "On commit they are sent in dependency order, the operations of a stage concurrently.\n"
+                        "Commands can also be piped into 'transaction begin', e.g. from a file.")
+        tx_subp = tx_parser.add_subparsers(
+            title="transaction commands",
+            metavar="",
+            description=Commands.Subcommands.generate_desc(subcmds)
+        )
+
+        p_begin = tx_subp.add_parser(
+            Commands.Subcommands.Begin.LONG,
+            aliases=[Commands.Subcommands.Begin.SHORT],
+            description='Starts a transaction, the following supported commands are queued until commit.')
+        p_begin.add_argument(
+            '--terminate-on-error',
+            action='store_true',
+            help='Abort the transaction when any command fails.'
+        )
+        p_begin.set_defaults(func=self.begin)
+
+        p_abort = tx_subp.add_parser(
+            Commands.Subcommands.Abort.LONG,
+            aliases=[Commands.Subcommands.Abort.SHORT],
+            description='Discards the queued operations.')
+        p_abort.set_defaults(func=self.abort, allowed_states=[TransactionState])
+
+        p_commit = tx_subp.add_parser(
+            Commands.Subcommands.Commit.LONG,
+            aliases=[Commands.Subcommands.Commit.SHORT],
+            description='Executes the queued operations stage by stage. If an operation of a stage fails the\n'
+                        'later stages are skipped.',
+            formatter_class=argparse.RawTextHelpFormatter)
+        p_commit.add_argument('-p', '--pastable', action="store_true", help='Generate pastable output')
+        self.add_parallel_argument(p_commit)
+        p_commit.set_defaults(func=self.commit, allowed_states=[TransactionState])
+
+        p_list = tx_subp.add_parser(
+            Commands.Subcommands.List.LONG,
+            aliases=[Commands.Subcommands.List.SHORT],
+            description='Lists the queued operations in commit order.')
+        p_list.add_argument('-p', '--pastable', action="store_true", help='Generate pastable output')
+        p_list.set_defaults(func=self.list, allowed_states=[TransactionState])
+
+        self.check_subcommands(tx_subp, subcmds)
+
+    def begin(self, args):
+        return self._state_service.enter_state(TransactionState(args.terminate_on_error), verbose=args.verbose)
+
+    def abort(self, _):
+        self._state_service.pop_state()
+        return ExitCode.OK
+
+    @classmethod
+    def _stages(cls, operations):
+        """
+        :return: stage number -> operations of the stage in queue order, numbered from 1
+        :rtype: list[(int, list[TransactionOperation])]
+        """
+        stages = sorted({x.stage for x in operations})
+        return [(idx + 1, [x for x in operations if x.stage == stage]) for idx, stage in enumerate(stages)]
+
+    @classmethod
+    def _groups(cls, operations):
+        """
+        Groups the operations of one stage that have to be executed in queue order. Operations that change the
+        same resource definition, e.g. its volume definitions or resources, end up in the same group.
+
+        :return: operation groups in queue order
+        :rtype: list[list[TransactionOperation]]
+        """
+        groups = {}
+        for operation in operations:
+            if operation.resource_definition:
+                key = ("resource definition", operation.resource_definition.lower())
+            else:
+                key = (operation.obj_type, operation.obj_name)
+            groups.setdefault(key, []).append(operation)
+        return list(groups.values())
+
+    def list(self, args):
+        operations = self._state_service.get_state().operations
+        if args.machine_readable:
+            print(self._to_json([
+                {"stage": stage_nr, "operation": x.verb, "type": x.obj_type, "name": x.obj_name}
+                for stage_nr, stage_ops in self._stages(operations) for x in stage_ops
+            ]))
+            return ExitCode.OK
+
+        tbl = linstor_client.Table(utf8=not args.no_utf8, colors=not args.no_color, pastable=args.pastable)
+        tbl.add_headers(self._operation_headers)
+        for stage_nr, stage_ops in self._stages(operations):
+            for operation in stage_ops:
+                tbl.add_row([stage_nr, operation.verb, operation.obj_type, operation.obj_name])
+        tbl.show()
+        return ExitCode.OK
+
+    def _run_stage(self, args, operations):
+        """
+        Executes the operations of one stage concurrently. Operations on the same resource definition are executed
+        in queue order, e.g. two volume definitions of the same resource definition.
+
+        :return: replies per operation, in the order of operations
+        :rtype: list[list[ApiCallResponse]]
+        """
+        group_list = self._groups(operations)
+        results = self.run_concurrent(
+            [lambda lapi, group=group: [x.call(lapi) for x in group] for group in group_list],
+            args.parallel
+        )
+        replies = {}
+        for group, group_replies in zip(group_list, results):
+            for operation, op_replies in zip(group, group_replies):
+                replies[id(operation)] = op_replies
+        return [replies[id(x)] for x in operations]
+
+    def _show_summary(self, args, results):
+        tbl = linstor_client.Table(utf8=not args.no_utf8, colors=not args.no_color, pastable=args.pastable)
+        tbl.add_headers(self._operation_headers + [
+            linstor_client.TableHeader("Result", Color.DARKGREEN),
+            linstor_client.TableHeader("Message")
+        ])
+        for stage_nr, operation, replies in results:
+            if replies is None:
+                result = tbl.color_cell("Skipped", Color.YELLOW)
+                message = ""
+            else:
+                state, color = self.get_replies_state(replies)
+                result = tbl.color_cell(state, color)
+                message = "\n".join(x.message for x in replies if x.is_error() or x.is_warning())
+            tbl.add_row([stage_nr, operation.verb, operation.obj_type, operation.obj_name, result, message])
+        tbl.show()
+
+    def commit(self, args):
+        operations = self._state_service.get_state().operations
+        self._state_service.pop_state()
+        if not operations:
+            print("Nothing to commit.")
+            return ExitCode.OK
+
+        rc = ExitCode.OK
+        results = []
+        all_replies = []
+        for stage_nr, stage_ops in self._stages(operations):
+            if rc != ExitCode.OK:
+                results += [(stage_nr, x, None) for x in stage_ops]
+                continue
+            stage_replies = self._run_stage(args, stage_ops)
+            results += [(stage_nr, x, replies) for x, replies in zip(stage_ops, stage_replies)]
+            all_replies += [reply for replies in stage_replies for reply in replies]
+            if any(reply.is_error() for replies in stage_replies for reply in replies):
+                rc = ExitCode.API_ERROR
+
+        if args.machine_readable:
+            self.handle_replies(args, all_replies)
+        elif not args.curl:
+            self._show_summary(args, results)
+            skipped = len([x for x in results if x[2] is None])
+            if skipped:
+                sys.stderr.write("A stage failed, skipped {n} remaining operations.\n".format(n=skipped))
+        return rc
@@ -12,8 +12,9 @@ from linstor import SizeCalc
 from linstor.responses import Resource
 from linstor_client import Table, utils
 from linstor_client.commands import Commands
-from linstor_client.utils import Output
+from linstor_client.utils import Output, ReportAggregator
 from linstor_client.consts import Color
+from linstor_client.export import json_input_file
 from linstor_client.commands.utils.skip_disk_utils import print_skip_disk_info, get_skip_disk_state_str
 
 
@@ -81,9 +82,15 @@ class VolumeCommands(Commands):
         )
         p_lvlms.add_argument(
             '--from-file',
-            type=argparse.FileType('r'),
+            type=json_input_file,
             help="Read data to display from the given json file",
         )
+        p_lvlms.add_argument(
+            '--full-reports',
+            action="store_true",
+            help="Print every reported error/warning, instead of each distinct report once with its occurrences."
+        )
+        self.add_watch_arguments(p_lvlms)
         p_lvlms.set_defaults(func=self.list_volumes)
 
         # show properties
@@ -274,7 +281,9 @@ class VolumeCommands(Commands):
         rsc_state_lkup = {x.node_name + x.name: x for x in lstmsg.resource_states}
         rsc_inuse_lkup = cls.get_inuse_lookup(lstmsg.resource_states)
 
-        reports = []
+        full_reports = getattr(args, 'full_reports', False)
+        reports = ReportAggregator()
+        all_reports = []
         for rsc in lstmsg.resources:
             rsc_count = len([x for x in lstmsg.resources if x.name == rsc.name])
             if apiconsts.FLAG_RSC_INACTIVE in rsc.flags and not apiconsts.FLAG_EVICTED in rsc.flags:
@@ -316,7 +325,10 @@ class VolumeCommands(Commands):
                 if has_errors:
                     state = tbl.color_cell("Error", Color.RED)
                 for x in vlm.reports:
-                    reports.append(x)
+                    if full_reports:
+                        all_reports.append(x)
+                    else:
+                        reports.add(x, "{n}/{r}/{v}".format(n=rsc.node_name, r=rsc.name, v=vlm.number))
                 vlm_drbd_data = vlm.drbd_data
                 row = [
                     rsc.name,
@@ -339,13 +351,21 @@ class VolumeCommands(Commands):
         tbl.show()
         if show_skip_disk_info:
             print_skip_disk_info(args.no_color)
-        for x in reports:
+        reports.print_reports(no_color=args.no_color, warn_as_error=args.warn_as_error)
+        for x in all_reports:
             Output.handle_ret(x, args.no_color, warn_as_error=args.warn_as_error)
 
     def list_volumes(self, args):
         args = self.merge_config_args('volume.list', args)
         if args.from_file:
-            lstmsg = [linstor.responses.ResourceResponse(json.load(args.from_file))]
+            lstmsg = [linstor.responses.ResourceResponse(self.load_from_file(args.from_file, "resources"))]
+        elif args.watch is not None:
+            return self.watch_list(
+                args,
+                lambda: self._linstor.volume_list(args.nodes, args.storage_pools, args.resources),
+                VolumeCommands.show_volumes,
+                4
+            )
         else:
             lstmsg = self._linstor.volume_list(args.nodes, args.storage_pools, args.resources)
         return self.output_list(args, lstmsg, VolumeCommands.show_volumes)
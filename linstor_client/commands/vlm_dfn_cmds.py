@@ -1,12 +1,17 @@
+import math
 import re
 import getpass
+import sys
 
 import linstor_client
 import linstor_client.argparse.argparse as argparse
 from linstor import SizeCalc
 from linstor.sharedconsts import FLAG_DELETE, FLAG_RESIZE, FLAG_GROSS_SIZE
-from linstor_client.commands import Commands, DrbdOptions
+from linstor_client.commands import ArgumentError, Commands, DrbdOptions, DefaultState, TransactionOperation, \
+    TransactionStage, TransactionState
+from linstor_client.commands.rsc_dfn_cmds import ResourceDefinitionCommands
 from linstor_client.consts import Color, ExitCode
+from linstor_client.jobs import KIND_VLM_DFN_DELETE, Job
 from linstor_client.utils import LinstorClientError
 
 
@@ -42,6 +47,7 @@ class VolumeDefinitionCommands(Commands):
             Commands.Subcommands.List,
             Commands.Subcommands.Delete,
             Commands.Subcommands.SetSize,
+            Commands.Subcommands.SetSizeBulk,
             Commands.Subcommands.SetProperty,
             Commands.Subcommands.ListProperties,
             Commands.Subcommands.DrbdOptions,
@@ -94,7 +100,7 @@ class VolumeDefinitionCommands(Commands):
             'size',
             help=VolumeDefinitionCommands.VOLUME_SIZE_HELP
         ).completer = VolumeDefinitionCommands.size_completer
-        p_new_vol.set_defaults(func=self.create)
+        p_new_vol.set_defaults(func=self.create, allowed_states=[DefaultState, TransactionState])
 
         # remove-volume definition
         p_rm_vol = vol_def_subp.add_parser(
@@ -175,7 +181,7 @@ class VolumeDefinitionCommands(Commands):
             type=int,
             help="Volume number")
         Commands.add_parser_keyvalue(p_setprop, "volume-definition")
-        p_setprop.set_defaults(func=self.set_props)
+        p_setprop.set_defaults(func=self.set_props, allowed_states=[DefaultState, TransactionState])
 
         p_drbd_opts = vol_def_subp.add_parser(
             Commands.Subcommands.DrbdOptions.LONG,
@@ -217,6 +223,51 @@ class VolumeDefinitionCommands(Commands):
         p_set_size.add_argument('--gross', action="store_true")
         p_set_size.set_defaults(func=self.set_volume_size)
 
+        # set size of selected volume definitions
+        p_set_size_bulk = vol_def_subp.add_parser(
+            Commands.Subcommands.SetSizeBulk.LONG,
+            aliases=[Commands.Subcommands.SetSizeBulk.SHORT],
+            formatter_class=argparse.RawTextHelpFormatter,
+            description="Change the size of all volume definitions matching the given selectors, the selectors\n"
+                        "are combined. Before any volume is resized the growth is checked against the free space\n"
+                        "of the thick storage pools holding the volumes, thin pools are not checked.")
+        p_set_size_bulk.add_argument(
+            'size',
+            metavar='SIZE',
+            help="New size, e.g. '20GiB', or growth relative to the current size, e.g. '+5GiB' or '+10%%'. "
+                 "The default unit is GiB."
+        )
+        p_set_size_bulk.add_argument(
+            '--resource-group', '--rsc-grp',
+            nargs='+',
+            help="Select the volume definitions of all resource definitions of these resource groups"
+        ).completer = self.resource_grp_completer
+        p_set_size_bulk.add_argument(
+            '--name-regex',
+            type=str,
+            help='Select resource definitions whose name fully matches the regular expression (case insensitive)'
+        )
+        p_set_size_bulk.add_argument(
+            '--names-file',
+            type=argparse.FileType('r'),
+            metavar='FILE',
+            help="File with one resource definition name per line, '-' reads stdin"
+        )
+        p_set_size_bulk.add_argument(
+            '--volume-nr',
+            type=int,
+            help="Only resize this volume number (default: all volumes)"
+        )
+        p_set_size_bulk.add_argument('--gross', action="store_true")
+        p_set_size_bulk.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Only check the free space and print the planned sizes"
+        )
+        p_set_size_bulk.add_argument('-p', '--pastable', action="store_true", help='Generate pastable output')
+        self.add_parallel_argument(p_set_size_bulk)
+        p_set_size_bulk.set_defaults(func=self.set_volume_size_bulk)
+
         # modify passphrase
         p_modifypass = vol_def_subp.add_parser(
             Commands.Subcommands.ModifyPassphrase.LONG,
@@ -246,22 +297,32 @@ class VolumeDefinitionCommands(Commands):
         elif args.passphrase == '':
             # read from keyboard
             passphrase = self._ask_passphrase()
-        replies = self._linstor.volume_dfn_create(
-            args.resource_name,
-            Commands.parse_size_str(args.size),
-            args.vlmnr,
-            args.minor,
-            args.encrypt,
-            args.storage_pool,
-            args.gross,
-            passphrase=passphrase
-        )
-        return self.handle_replies(args, replies)
+        size = Commands.parse_size_str(args.size)
+        return self.send_or_queue(args, TransactionOperation(
+            TransactionStage.VOLUME_DEFINITIONS,
+            "create",
+            "volume definition",
+            args.resource_name if args.vlmnr is None else "{r}/{v}".format(r=args.resource_name, v=args.vlmnr),
+            lambda lapi: lapi.volume_dfn_create(
+                args.resource_name,
+                size,
+                args.vlmnr,
+                args.minor,
+                args.encrypt,
+                args.storage_pool,
+                args.gross,
+                passphrase=passphrase
+            ),
+            resource_definition=args.resource_name
+        ))
 
     def delete(self, args):
         async_flag = vars(args)["async"]
 
         replies = self._linstor.volume_dfn_delete(args.resource_name, args.volume_nr, async_flag)
+        if async_flag:
+            self.record_jobs(args, [(Job(KIND_VLM_DFN_DELETE, resource=args.resource_name, volume=args.volume_nr),
+                                     replies)])
         return self.handle_replies(args, replies)
 
     @classmethod
@@ -343,13 +404,19 @@ class VolumeDefinitionCommands(Commands):
     def set_props(self, args):
         args = self._attach_aux_prop(args)
         mod_prop_dict = Commands.parse_key_value_pairs([(args.key, args.value)])
-        replies = self._linstor.volume_dfn_modify(
-            args.resource_name,
-            args.volume_nr,
-            set_properties=mod_prop_dict['pairs'],
-            delete_properties=mod_prop_dict['delete']
-        )
-        return self.handle_replies(args, replies)
+        return self.send_or_queue(args, TransactionOperation(
+            TransactionStage.VOLUME_DEFINITION_PROPS,
+            "set-property",
+            "volume definition",
+            "{r}/{v}".format(r=args.resource_name, v=args.volume_nr),
+            lambda lapi: lapi.volume_dfn_modify(
+                args.resource_name,
+                args.volume_nr,
+                set_properties=mod_prop_dict['pairs'],
+                delete_properties=mod_prop_dict['delete']
+            ),
+            resource_definition=args.resource_name
+        ))
 
     def set_drbd_opts(self, args):
         a = DrbdOptions.filter_new(args)
@@ -375,6 +442,178 @@ class VolumeDefinitionCommands(Commands):
         )
         return self.handle_replies(args, replies)
 
+    @classmethod
+    def parse_size_expr(cls, size_expr):
+        """
+        Parses the size argument of set-size-bulk.
+
+        :param str size_expr: absolute size like '20GiB' or growth like '+5GiB' or '+10%'
+        :return: function that computes the new size in KiB from the current size in KiB
+        :rtype: Callable[[int], int]
+        """
+        m = re.match(r'^\+(\d+(?:\.\d+)?)%$', size_expr)
+        if m:
+            percent = float(m.group(1))
+            return lambda size: size + int(math.ceil(size * percent / 100))
+
+        m = re.match(r'^(\+?)(\d+)(\D*)$', size_expr)
+        if not m or (m.group(3) and m.group(3).lower() not in SizeCalc.UNITS_MAP):
+            raise ArgumentError(
+                "Invalid size '{s}', expected e.g. 20GiB, +5GiB or +10%. Valid units: {u}".format(
+                    s=size_expr, u=SizeCalc.UNITS_LIST_STR))
+        value = cls.parse_size_str(m.group(2) + m.group(3))
+        if m.group(1):
+            return lambda size: size + value
+        return lambda size: value
+
+    def _resize_targets(self, args, new_size):
+        """
+        Resolves the selectors of set-size-bulk.
+
+        :return: (resource name, volume number, current size, new size) of the volume definitions to resize
+        :rtype: list[(str, int, int, int)]
+        """
+        names = None
+        if args.names_file:
+            names = [x.strip() for x in args.names_file if x.strip() and not x.strip().startswith('#')]
+            if not names:
+                return []
+
+        rsc_dfns = self.get_linstorapi().resource_dfn_list_raise(
+            query_volume_definitions=True,
+            filter_by_resource_definitions=names
+        ).resource_definitions
+        if names:
+            known = {x.name.lower() for x in rsc_dfns}
+            missing = [x for x in names if x.lower() not in known]
+            if missing:
+                raise LinstorClientError(
+                    "Resource definition(s) not found: " + ", ".join(missing), ExitCode.OBJECT_NOT_FOUND)
+        if args.resource_group:
+            rsc_grps = {x.lower() for x in args.resource_group}
+            rsc_dfns = [x for x in rsc_dfns if x.resource_group_name.lower() in rsc_grps]
+        selected = set(self.filter_by_name_regex([x.name for x in rsc_dfns], args.name_regex))
+
+        targets = []
+        for rsc_dfn in sorted(rsc_dfns, key=lambda x: x.name):
+            if rsc_dfn.name not in selected:
+                continue
+            for vlm_dfn in rsc_dfn.volume_definitions:
+                if FLAG_DELETE in vlm_dfn.flags or args.volume_nr not in [None, vlm_dfn.number]:
+                    continue
+                targets.append((rsc_dfn.name, vlm_dfn.number, vlm_dfn.size, new_size(vlm_dfn.size)))
+        return targets
+
+    @classmethod
+    def space_shortfalls(cls, targets, resources, storage_pools):
+        """
+        Sums up the growth of the volumes per storage pool and compares it with the free space of the pool.
+        Thin and diskless pools and pools without free space information are not checked.
+
+        :param list[(str, int, int, int)] targets: volume definitions to resize, as returned by _resize_targets
+        :param list[linstor.responses.Resource] resources: resources of the resource definitions to resize
+        :param list[linstor.responses.StoragePool] storage_pools: all storage pools
+        :return: (node name, storage pool name, required KiB, free KiB) of all pools without enough free space
+        :rtype: list[(str, str, int, int)]
+        """
+        growth = {(rsc_name.lower(), vlm_nr): new_size - size for rsc_name, vlm_nr, size, new_size in targets}
+        pools = {(x.node_name.lower(), x.name.lower()): x for x in storage_pools}
+        required = {}
+        for rsc in resources:
+            for vlm in rsc.volumes:
+                delta = growth.get((rsc.name.lower(), vlm.number), 0)
+                pool = pools.get((rsc.node_name.lower(), (vlm.storage_pool_name or "").lower()))
+                if delta <= 0 or pool is None or pool.is_thin() or pool.is_diskless() or pool.free_space is None:
+                    continue
+                key = (pool.node_name, pool.name)
+                required[key] = required.get(key, 0) + delta
+
+        shortfalls = []
+        for (node_name, pool_name), needed in sorted(required.items()):
+            free = pools[(node_name.lower(), pool_name.lower())].free_space.free_capacity
+            if needed > free:
+                shortfalls.append((node_name, pool_name, needed, free))
+        return shortfalls
+
+    def _fetch_placement(self, rsc_names):
+        """
+        Fetches the storage pools and the resources of the given resource definitions before anything is changed,
+        the resources are fetched in chunks concurrently.
+
+        :return: (resources, storage pools)
+        :rtype: (list[linstor.responses.Resource], list[linstor.responses.StoragePool])
+        """
+        chunk_size = ResourceDefinitionCommands.POLL_CHUNK_SIZE
+        chunks = [rsc_names[i:i + chunk_size] for i in range(0, len(rsc_names), chunk_size)]
+        calls = [lambda lapi: lapi.storage_pool_list_raise().storage_pools]
+        calls += [lambda lapi, names=names: lapi.resource_list_raise(filter_by_resources=names).resources
+                  for names in chunks]
+        results = self.run_concurrent(calls)
+        return [rsc for rscs in results[1:] for rsc in rscs], results[0]
+
+    def _show_resize_plan(self, args, targets):
+        if args.machine_readable:
+            print(self._to_json([
+                {"resource_name": rsc_name, "volume_number": vlm_nr, "size_kib": size, "new_size_kib": new_size}
+                for rsc_name, vlm_nr, size, new_size in targets
+            ]))
+            return
+
+        tbl = linstor_client.Table(utf8=not args.no_utf8, colors=not args.no_color, pastable=args.pastable)
+        tbl.add_headers([
+            linstor_client.TableHeader("ResourceName"),
+            linstor_client.TableHeader("VolumeNr"),
+            linstor_client.TableHeader("Size"),
+            linstor_client.TableHeader("NewSize")
+        ])
+        for rsc_name, vlm_nr, size, new_size in targets:
+            tbl.add_row([
+                rsc_name,
+                vlm_nr,
+                SizeCalc.approximate_size_string(size),
+                SizeCalc.approximate_size_string(new_size)
+            ])
+        tbl.show()
+
+    def set_volume_size_bulk(self, args):
+        if args.resource_group is None and args.name_regex is None and args.names_file is None:
+            raise ArgumentError("At least one of --resource-group, --name-regex or --names-file is required")
+        new_size = self.parse_size_expr(args.size)
+
+        targets = [x for x in self._resize_targets(args, new_size) if x[2] != x[3]]
+        if not targets:
+            sys.stderr.write("No volume definitions to resize.\n")
+            return ExitCode.OK
+
+        resources, storage_pools = self._fetch_placement(sorted({x[0] for x in targets}))
+        shortfalls = self.space_shortfalls(targets, resources, storage_pools)
+        if shortfalls:
+            raise LinstorClientError(
+                "Not enough free space, nothing was resized:\n" + "\n".join(
+                    "  {n}/{p}: {r} required, {f} free".format(
+                        n=node_name, p=pool_name, r=SizeCalc.approximate_size_string(needed),
+                        f=SizeCalc.approximate_size_string(free))
+                    for node_name, pool_name, needed, free in shortfalls),
+                ExitCode.ILLEGAL_STATE)
+
+        if args.dry_run:
+            self._show_resize_plan(args, targets)
+            return ExitCode.OK
+
+        names = ["{r}/{v}".format(r=rsc_name, v=vlm_nr) for rsc_name, vlm_nr, _, _ in targets]
+        by_name = dict(zip(names, targets))
+        return self.bulk_modify(
+            args,
+            names,
+            lambda lapi, name: lapi.volume_dfn_modify(
+                by_name[name][0],
+                by_name[name][1],
+                size=by_name[name][3],
+                gross=args.gross
+            ),
+            "volume definitions"
+        )
+
     @staticmethod
     def _ask_passphrase():
         passphrase = getpass.getpass("Passphrase: ")
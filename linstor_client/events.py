@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Decoding of the server-sent event streams of the controller, used by the events command.
+"""
+import collections
+import json
+
+# event streams of the controller, name -> rest path
+STREAMS = collections.OrderedDict([
+    ("drbd-promotion", "/v1/events/drbd/promotion"),
+    ("nodes", "/v1/events/nodes")
+])
+
+DEFAULT_RETRY_MS = 3000
+
+SseEvent = collections.namedtuple("SseEvent", ["event", "data", "id", "retry"])
+
+
+def parse_sse(lines):
+    """
+    Decodes a server-sent event stream as the lines arrive.
+
+    :param Iterable[bytes] lines: raw lines of the stream, with or without line endings
+    :return: one SseEvent per dispatched event, event is 'message' if the server did not name it
+    :rtype: Iterator[SseEvent]
+    """
+    event = None
+    data = []
+    event_id = None
+    retry = None
+    for raw_line in lines:
+        line = raw_line.decode("utf-8", "replace").rstrip("\r\n")
+        if not line:
+            if data:
+                yield SseEvent(event or "message", "\n".join(data), event_id, retry)
+            event = None
+            data = []
+            retry = None
+            continue
+        if line.startswith(":"):
+            continue  # comment, used as keep alive
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "event":
+            event = value
+        elif field == "data":
+            data.append(value)
+        elif field == "id":
+            event_id = value
+        elif field == "retry" and value.isdigit():
+            retry = int(value)
+
+
+def event_record(stream, sse_event):
+    """
+    :param str stream: name of the stream the event was received on
+    :param SseEvent sse_event: received event
+    :return: the json object printed for the event, data is decoded if it is json
+    :rtype: dict
+    """
+    try:
+        data = json.loads(sse_event.data)
+    except ValueError:
+        data = sse_event.data
+    return collections.OrderedDict([
+        ("stream", stream),
+        ("event", sse_event.event),
+        ("id", sse_event.id),
+        ("data", data)
+    ])
+
+
+def _names(data, keys, object_key):
+    if not isinstance(data, dict):
+        return set()
+    names = {data[k] for k in keys if isinstance(data.get(k), str)}
+    obj = data.get(object_key)
+    if isinstance(obj, dict) and isinstance(obj.get("name"), str):
+        names.add(obj["name"])
+    return {x.lower() for x in names}
+
+
+def event_matches(record, resources=None, nodes=None):
+    """
+    Checks the resource and node names an event refers to, events without a resource or node name do not match
+    the respective filter. Names are compared case insensitive.
+
+    :param dict record: event record as returned by event_record
+    :param Optional[list[str]] resources: resource names to accept
+    :param Optional[list[str]] nodes: node names to accept
+    :rtype: bool
+    """
+    data = record["data"]
+    if resources:
+        if not _names(data, ["resource_name", "rsc_name"], "resource") & {x.lower() for x in resources}:
+            return False
+    if nodes:
+        node_names = _names(data, ["node_name"], "node")
+        if isinstance(data, dict):
+            node_names |= _names(data.get("resource"), ["node_name"], None)
+        if not node_names & {x.lower() for x in nodes}:
+            return False
+    return True
+
+
+def to_ndjson(record):
+    return json.dumps(record, separators=(",", ":"))
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+Self-describing cluster export files as written by "linstor export".
+
+An export is a json object with a small header and the raw rest api list data of the controller, one entry per
+section in "data". The section data has the same format the --from-file options of the list commands read.
+"""
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+import re
+import sys
+
+import linstor_client.argparse.argparse as argparse
+from linstor_client.consts import ExitCode
+from linstor_client.utils import LinstorClientError
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+EXPORT_FORMAT = "linstor-export"
+EXPORT_FORMAT_VERSION = 1
+
+COMPRESSIONS = {
+    "gzip": (".gz", gzip.open),
+    "bz2": (".bz2", bz2.open),
+    "xz": (".xz", lzma.open)
+}
+
+
+def compression_from_name(path):
+    """
+    :param str path: file name
+    :return: the compression matching the file extension or None
+    :rtype: Optional[str]
+    """
+    for compression, (ext, _) in COMPRESSIONS.items():
+        if path.endswith(ext):
+            return compression
+    return None
+
+
+def open_file(path, mode="r", compression=None):
+    """
+    Opens a text file, compressed files are (de)compressed transparently.
+
+    :param str path: file name
+    :param str mode: "r" or "w"
+    :param Optional[str] compression: compression to use, default is derived from the file extension
+    :return: text stream
+    """
+    compression = compression or compression_from_name(path)
+    if compression:
+        return COMPRESSIONS[compression][1](path, mode + "t", encoding="utf-8")
+    return io.open(path, mode, encoding="utf-8")
+
+
+def _zstd_open(file, mode, encoding):
+    if zstandard is None:
+        raise IOError("reading zstd compressed files needs the python zstandard module")
+    return zstandard.open(file, mode, encoding=encoding)
+
+
+# magic bytes of compressed input -> open function
+_INPUT_MAGICS = [
+    (b"\x1f\x8b", gzip.open),
+    (b"BZh", bz2.open),
+    (b"\xfd7zXZ\x00", lzma.open),
+    (b"\x28\xb5\x2f\xfd", _zstd_open)
+]
+
+
+def open_input(path):
+    """
+    Opens a json input file, gzip, bzip2, xz and zstd compressed files are detected by their content and
+    decompressed transparently while reading.
+
+    :param str path: file name, '-' reads stdin
+    :return: text stream
+    """
+    if path == "-":
+        source = sys.stdin.buffer
+        head = source.peek(8)[:8]
+    else:
+        source = path
+        with io.open(path, "rb") as stream:
+            head = stream.read(8)
+
+    for magic, open_func in _INPUT_MAGICS:
+        if head.startswith(magic):
+            return open_func(source, "rt", encoding="utf-8")
+    if path == "-":
+        return io.TextIOWrapper(source, encoding="utf-8")
+    return io.open(path, "r", encoding="utf-8")
+
+
+# "type" used for argparse
+def json_input_file(path):
+    try:
+        return open_input(path)
+    except (IOError, OSError) as err:
+        raise argparse.ArgumentTypeError("can't open '{p}': {e}".format(p=path, e=err))
+
+
+class JsonStream(object):
+    """
+    Incremental json decoder for large inputs. Elements of a top level array are decoded one by one as they are
+    read, consumed text is dropped so the document text is never held in memory completely.
+    """
+    _SCALAR_END = re.compile(r'[\s,\]}]')
+
+    def __init__(self, stream, chunk_size=1 << 16):
+        """
+
+        :param stream: text stream
+        :param int chunk_size: number of characters to read at once
+        """
+        self._stream = stream
+        self._chunk_size = chunk_size
+        # keys are shared between elements the way json.load shares them within a document, the decoder's own
+        # memo is cleared after every element
+        self._keys = {}
+        self._decoder = json.JSONDecoder(object_pairs_hook=self._make_object)
+        self._buf = ""
+        self._pos = 0
+        self._dropped = 0
+        self._eof = False
+
+    def _make_object(self, pairs):
+        keys = self._keys
+        return {keys.setdefault(key, key): value for key, value in pairs}
+
+    def _offset(self):
+        return self._dropped + self._pos
+
+    def _fill(self):
+        """
+        Appends the next chunk to the buffer, at least doubling the unconsumed text so values spanning many
+        chunks are not decoded over and over again.
+
+        :return: False if the stream is exhausted
+        """
+        if self._eof:
+            return False
+        chunk = self._stream.read(max(self._chunk_size, len(self._buf) - self._pos))
+        if not chunk:
+            self._eof = True
+            return False
+        self._dropped += self._pos
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _next_char(self):
+        """
+        Skips whitespace.
+
+        :return: the next character or an empty string at the end of the stream
+        """
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\n\r":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _decode_value(self):
+        first = self._next_char()
+        if first and first not in '{["':
+            # numbers and literals are decoded once a delimiter follows, e.g. "1." or "1e" continue in the next chunk
+            while not self._SCALAR_END.search(self._buf, self._pos) and self._fill():
+                pass
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except ValueError:
+                if not self._fill():
+                    raise
+                continue
+            self._pos = end
+            return value
+
+    def is_array(self):
+        return self._next_char() == "["
+
+    def __iter__(self):
+        """
+        Yields the elements of the top level array.
+
+        :raises ValueError: on invalid json or if the document is not an array
+        """
+        if not self.is_array():
+            raise ValueError("Expecting a json array at offset {o}".format(o=self._offset()))
+        self._pos += 1
+
+        if self._next_char() == "]":
+            self._pos += 1
+        else:
+            while True:
+                yield self._decode_value()
+
+                sep = self._next_char()
+                self._pos += 1
+                if sep == "]":
+                    break
+                if sep != ",":
+                    raise ValueError("Expecting ',' delimiter at offset {o}".format(o=self._offset() - 1))
+
+        if self._next_char():
+            raise ValueError("Extra data at offset {o}".format(o=self._offset()))
+
+    def load(self):
+        """
+        Decodes the whole document, like json.load.
+        """
+        if self.is_array():
+            return list(self)
+        return json.loads(self._buf[self._pos:] + self._stream.read())
+
+
+def is_export(data):
+    return isinstance(data, dict) and data.get("format") == EXPORT_FORMAT
+
+
+def write_export(stream, header, sections):
+    """
+    Writes an export, the sections are encoded one after another directly into the stream.
+
+    :param stream: text stream to write to
+    :param dict[str, Any] header: additional header fields
+    :param list[(str, Any)] sections: section names and their data
+    """
+    doc_header = {"format": EXPORT_FORMAT, "version": EXPORT_FORMAT_VERSION}
+    doc_header.update(header)
+    doc_header["sections"] = [name for name, _ in sections]
+
+    stream.write(json.dumps(doc_header)[:-1] + ', "data": {')
+    for idx, (name, data) in enumerate(sections):
+        if idx:
+            stream.write(",")
+        stream.write("\n" + json.dumps(name) + ": ")
+        json.dump(data, stream)
+    stream.write("\n}}\n")
+
+
+def write_export_file(path, header, sections, compression=None):
+    """
+    Writes the export to a temporary file next to path and renames it once complete, so an existing export is
+    never left half written.
+    """
+    tmp_path = "{p}.{pid}.tmp".format(p=path, pid=os.getpid())
+    try:
+        with open_file(tmp_path, "w", compression or compression_from_name(path)) as stream:
+            write_export(stream, header, sections)
+        os.rename(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_export(path):
+    """
+    :param str path: export file name, may be compressed, '-' reads stdin
+    :return: the parsed export
+    :rtype: dict[str, Any]
+    :raises LinstorClientError: if the file is not readable or not an export
+    """
+    try:
+        with open_input(path) as stream:
+            data = json.load(stream)
+    except (IOError, OSError, ValueError, EOFError) as err:
+        raise LinstorClientError("Unable to read export '{p}': {e}".format(p=path, e=err), ExitCode.ARGPARSE_ERROR)
+    if not is_export(data):
+        raise LinstorClientError("'{p}' is not a linstor export".format(p=path), ExitCode.ARGPARSE_ERROR)
+    if data.get("version", 0) > EXPORT_FORMAT_VERSION:
+        raise LinstorClientError(
+            "Export '{p}' has the unsupported version {v}".format(p=path, v=data.get("version")),
+            ExitCode.ARGPARSE_ERROR
+        )
+    return data
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+Local journal of operations submitted with --async and their completion checks, used by the jobs command.
+"""
+import collections
+import io
+import json
+import os
+import time
+import uuid
+
+import linstor
+import linstor.sharedconsts as apiconsts
+
+from linstor_client.cache import controller_dir_name
+
+KIND_RSC_CREATE = "resource-create"
+KIND_RSC_DELETE = "resource-delete"
+KIND_RSC_TOGGLE_DISK = "resource-toggle-disk"
+KIND_NODE_DELETE = "node-delete"
+KIND_NODE_LOST = "node-lost"
+KIND_RSC_DFN_DELETE = "resource-definition-delete"
+KIND_VLM_DFN_DELETE = "volume-definition-delete"
+KIND_SNAPSHOT_CREATE = "snapshot-create"
+
+# object lists the completion of jobs is checked with
+LIST_RESOURCES = "resources"
+LIST_NODES = "nodes"
+LIST_RSC_DFNS = "resource-definitions"
+LIST_SNAPSHOTS = "snapshots"
+
+# job kind -> list that contains the object of the job
+KINDS = collections.OrderedDict([
+    (KIND_RSC_CREATE, LIST_RESOURCES),
+    (KIND_RSC_DELETE, LIST_RESOURCES),
+    (KIND_RSC_TOGGLE_DISK, LIST_RESOURCES),
+    (KIND_NODE_DELETE, LIST_NODES),
+    (KIND_NODE_LOST, LIST_NODES),
+    (KIND_RSC_DFN_DELETE, LIST_RSC_DFNS),
+    (KIND_VLM_DFN_DELETE, LIST_RSC_DFNS),
+    (KIND_SNAPSHOT_CREATE, LIST_SNAPSHOTS)
+])
+
+STATE_PENDING = "Pending"
+STATE_DONE = "Done"
+STATE_FAILED = "Failed"
+
+# finished jobs are dropped from the journal after this many seconds
+KEEP_FINISHED_SECONDS = 7 * 24 * 3600
+
+_TOGGLE_DISK_FLAGS = {
+    apiconsts.FLAG_DISK_ADDING,
+    apiconsts.FLAG_DISK_ADD_REQUESTED,
+    apiconsts.FLAG_DISK_REMOVING,
+    apiconsts.FLAG_DISK_REMOVE_REQUESTED
+}
+
+
+def journal_path(controller):
+    """
+    :param str controller: controller uri
+    :return: the journal file of the controller, ~/.local/state/linstor/<controller>/jobs.json by default
+    """
+    base = os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+    return os.path.join(base, "linstor", controller_dir_name(controller), "jobs.json")
+
+
+class Job(object):
+    """
+    One submitted operation. The object is identified by the names the kind needs, e.g. resource and node for
+    resource-delete. node is None for auto-placed resources, the job then covers all resources of the definition.
+    """
+    FIELDS = ["id", "kind", "resource", "node", "volume", "snapshot", "submitted", "state", "finished", "message"]
+
+    def __init__(self, kind, resource=None, node=None, volume=None, snapshot=None, job_id=None, submitted=None,
+                 state=STATE_PENDING, finished=None, message=None):
+        self.id = job_id or uuid.uuid4().hex[:8]
+        self.kind = kind
+        self.resource = resource
+        self.node = node
+        self.volume = volume
+        self.snapshot = snapshot
+        self.submitted = time.time() if submitted is None else submitted
+        self.state = state
+        self.finished = finished
+        self.message = message
+
+    @property
+    def pending(self):
+        return self.state == STATE_PENDING
+
+    @property
+    def object_name(self):
+        """
+        :return: readable name of the object, e.g. 'rsc1 on node1' or 'rsc1/0'
+        :rtype: str
+        """
+        if self.kind in [KIND_NODE_DELETE, KIND_NODE_LOST]:
+            return self.node
+        name = self.resource
+        if self.volume is not None:
+            name += "/{v}".format(v=self.volume)
+        if self.snapshot is not None:
+            name += ":" + self.snapshot
+        if self.node is not None:
+            name += " on " + self.node
+        return name
+
+    def finish(self, state, message=None, now=None):
+        self.state = state
+        self.message = message
+        self.finished = time.time() if now is None else now
+
+    def to_dict(self):
+        return collections.OrderedDict((x, getattr(self, x)) for x in self.FIELDS)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["kind"],
+            resource=data.get("resource"),
+            node=data.get("node"),
+            volume=data.get("volume"),
+            snapshot=data.get("snapshot"),
+            job_id=data["id"],
+            submitted=data.get("submitted"),
+            state=data.get("state", STATE_PENDING),
+            finished=data.get("finished"),
+            message=data.get("message")
+        )
+
+
+class Journal(object):
+    """
+    Stores the jobs of one controller in a json file. Every write reads the file again and replaces it by renaming
+    a temporary file, so concurrent clients only race within that short window.
+    """
+    def __init__(self, path):
+        """
+
+        :param str path: journal file, the directory is created on first write
+        """
+        self._path = path
+
+    @property
+    def path(self):
+        return self._path
+
+    def load(self):
+        """
+        :return: the recorded jobs in submission order, an unreadable journal is treated as empty
+        :rtype: list[Job]
+        """
+        try:
+            with io.open(self._path, "r", encoding="utf-8") as journal_file:
+                return [Job.from_dict(x) for x in json.load(journal_file)]
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return []
+
+    def _write(self, jobs):
+        directory = os.path.dirname(self._path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        tmp_path = "{p}.{pid}.tmp".format(p=self._path, pid=os.getpid())
+        try:
+            with io.open(tmp_path, "w", encoding="utf-8") as journal_file:
+                journal_file.write(json.dumps([x.to_dict() for x in jobs], indent=1))
+            os.rename(tmp_path, self._path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def add(self, jobs):
+        """
+        :param list[Job] jobs: newly submitted jobs
+        """
+        self._write(self.load() + list(jobs))
+
+    def update(self, jobs, now=None):
+        """
+        Replaces the recorded jobs with the given ones by id and drops jobs that finished long ago.
+
+        :param list[Job] jobs: jobs with changed state
+        """
+        now = time.time() if now is None else now
+        changed = {x.id: x for x in jobs}
+        result = []
+        for job in self.load():
+            job = changed.get(job.id, job)
+            if job.finished is None or now - job.finished < KEEP_FINISHED_SECONDS:
+                result.append(job)
+        self._write(result)
+
+
+def list_filters(jobs):
+    """
+    :param list[Job] jobs: pending jobs
+    :return: list -> sorted names to filter the list by, one list request per entry covers all jobs
+    :rtype: dict[str, list[str]]
+    """
+    names = {}
+    for job in jobs:
+        list_type = KINDS[job.kind]
+        name = job.node if list_type == LIST_NODES else job.resource
+        names.setdefault(list_type, set()).add(name)
+    return {list_type: sorted(x) for list_type, x in names.items()}
+
+
+def _error_reports(rsc):
+    errors = []
+    for vlm in rsc.volumes:
+        errors += [report["message"] for report in vlm.data_v1.get("reports", [])
+                   if linstor.ApiCallResponse(report).is_error()]
+    return errors
+
+
+def _check_resources(job, rscs):
+    if job.kind == KIND_RSC_DELETE:
+        return (STATE_DONE, None) if not rscs else (STATE_PENDING, None)
+    if not rscs:
+        return STATE_FAILED, "resource not found"
+    for rsc in rscs:
+        errors = _error_reports(rsc)
+        if errors:
+            return STATE_FAILED, "; ".join(errors)
+    if job.kind == KIND_RSC_TOGGLE_DISK:
+        if any(_TOGGLE_DISK_FLAGS & set(x.flags) for x in rscs):
+            return STATE_PENDING, None
+        return STATE_DONE, None
+    # a resource is deployed once the satellite reported the devices of its volumes
+    for rsc in rscs:
+        if apiconsts.FLAG_RSC_INACTIVE not in rsc.flags and any(not vlm.device_path for vlm in rsc.volumes):
+            return STATE_PENDING, None
+    return STATE_DONE, None
+
+
+def _check_snapshots(job, snapshots):
+    if not snapshots:
+        return STATE_FAILED, "snapshot not found"
+    flags = set(snapshots[0].flags)
+    if flags & {apiconsts.FLAG_FAILED_DEPLOYMENT, apiconsts.FLAG_FAILED_DISCONNECT}:
+        return STATE_FAILED, "snapshot failed: " + ", ".join(sorted(flags))
+    if apiconsts.FLAG_SUCCESSFUL in flags:
+        return STATE_DONE, None
+    return STATE_PENDING, None
+
+
+def check_job(job, lists):
+    """
+    Derives the state of a job from the fetched lists.
+
+    :param Job job: pending job
+    :param dict[str, list] lists: list -> fetched objects, as filtered by list_filters
+    :return: new state and a message for failed jobs
+    :rtype: (str, Optional[str])
+    """
+    def same(name, other):
+        return other is None or name.lower() == other.lower()
+
+    list_type = KINDS[job.kind]
+    if list_type == LIST_NODES:
+        present = any(same(x.name, job.node) for x in lists[list_type])
+        return (STATE_PENDING, None) if present else (STATE_DONE, None)
+    if list_type == LIST_RSC_DFNS:
+        rsc_dfns = [x for x in lists[list_type] if same(x.name, job.resource)]
+        if job.kind == KIND_VLM_DFN_DELETE:
+            present = any(vlm_dfn.number == job.volume for x in rsc_dfns for vlm_dfn in x.volume_definitions)
+        else:
+            present = bool(rsc_dfns)
+        return (STATE_PENDING, None) if present else (STATE_DONE, None)
+    if list_type == LIST_SNAPSHOTS:
+        return _check_snapshots(job, [x for x in lists[list_type]
+                                      if same(x.resource_name, job.resource) and same(x.name, job.snapshot)])
+    return _check_resources(job, [x for x in lists[list_type]
+                                  if same(x.name, job.resource) and same(x.node_name, job.node)])
+
+
+def update_jobs(jobs, lists, now=None):
+    """
+    Checks all pending jobs against the fetched lists.
+
+    :param list[Job] jobs: jobs to check, finished ones are skipped
+    :param dict[str, list] lists: list -> fetched objects
+    :return: the jobs that finished
+    :rtype: list[Job]
+    """
+    finished = []
+    for job in jobs:
+        if not job.pending:
+            continue
+        state, message = check_job(job, lists)
+        if state != STATE_PENDING:
+            job.finish(state, message, now)
+            finished.append(job)
+    return finished
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Answers read-only rest requests from a cluster export instead of a controller, used by --offline.
+"""
+import json
+import sys
+
+import linstor
+import linstor.sharedconsts as apiconsts
+
+from linstor_client.consts import ExitCode
+from linstor_client.export import load_export
+from linstor_client.utils import LinstorClientError
+
+try:
+    from urllib.parse import parse_qs, unquote, urlparse
+except ImportError:
+    from urlparse import parse_qs, urlparse
+    from urllib import unquote
+
+DEFAULT_MAX_OVERSUBSCRIPTION_RATIO = 20.0
+
+
+class _OfflineResponse(object):
+    """
+    Minimal stand-in for the http response object the linstor api reads.
+    """
+    def __init__(self, status, data):
+        self.status = status
+        self._body = json.dumps(data).encode("utf-8")
+
+    def read(self):
+        return self._body
+
+    def getheader(self, name, default=None):
+        if name.lower() == "content-type":
+            return "application/json"
+        return default
+
+    def close(self):
+        pass
+
+
+def _matches_props(obj, props_filters):
+    """
+    :param dict obj: raw rest object
+    :param list[str] props_filters: KEY or KEY=VALUE filters, all have to match
+    """
+    props = obj.get("props", {})
+    for prop_filter in props_filters:
+        key, sep, value = prop_filter.partition("=")
+        if key not in props or (sep and props[key] != value):
+            return False
+    return True
+
+
+def _filter(items, query, filters):
+    """
+    Applies the list filters of a rest query to raw rest objects.
+
+    :param list[dict] items: raw rest objects
+    :param dict[str, list[str]] query: parsed query string
+    :param dict[str, str] filters: query parameter -> object field, names are compared case insensitive
+    """
+    for param, field in filters.items():
+        if query.get(param):
+            names = {x.lower() for x in query[param]}
+            items = [x for x in items if x.get(field, "").lower() in names]
+    if query.get("props"):
+        items = [x for x in items if _matches_props(x, query["props"])]
+    return items
+
+
+class OfflineLinstor(linstor.Linstor):
+    """
+    linstor.Linstor object that serves list requests from a cluster export written by "linstor export",
+    every modifying request is refused.
+    """
+    def __init__(self, export, source):
+        """
+
+        :param dict export: loaded export
+        :param str source: export file name
+        """
+        super(OfflineLinstor, self).__init__("offline://" + source)
+        self._source = source
+        self._export = export
+        self._data = export["data"]
+        self._qmvs_note_printed = False
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(load_export(path), path)
+
+    @property
+    def export(self):
+        return self._export
+
+    @property
+    def source(self):
+        """
+        :return: the export file name, controller_host() adds the offline:// prefix
+        """
+        return self._source
+
+    def connect(self):
+        self._connected = True
+        self._ctrl_version = linstor.responses.ControllerVersion(self._data.get("controller_version", {}))
+
+    def disconnect(self):
+        self._connected = False
+        return True
+
+    def _section(self, name):
+        if name not in self._data:
+            return None
+        return self._data[name]
+
+    def _not_found(self, path):
+        return _OfflineResponse(404, [{
+            "ret_code": apiconsts.MASK_ERROR,
+            "message": "'{p}' is not contained in the offline snapshot '{s}'".format(p=path, s=self._ctrl_host)
+        }])
+
+    def _rest_request_base(self, apicall, method, path, body=None, reconnect=True):
+        url = urlparse(path)
+        query = parse_qs(url.query)
+        parts = [unquote(x) for x in url.path.split("/")[2:]]  # strip the /v1 prefix
+
+        if method == "OPTIONS" and parts == ["query-max-volume-size"]:
+            return self._query_max_volume_size(body, path)
+        if method != "GET":
+            raise LinstorClientError(
+                "Command not available in offline mode, it would send {m} {p}".format(m=method, p=url.path),
+                ExitCode.OPTION_NOT_SUPPORTED
+            )
+
+        data = self._get(parts, query)
+        if data is None:
+            return self._not_found(path)
+        return _OfflineResponse(200, data)
+
+    def _get(self, parts, query):
+        """
+        :param list[str] parts: request path elements after /v1
+        :param dict[str, list[str]] query: parsed query string
+        :return: the raw response data or None if the snapshot has no data for the request
+        """
+        sections = {
+            ("controller", "version"): "controller_version",
+            ("controller", "properties"): "controller_props",
+            ("storage-pool-definitions",): "storage_pool_definitions",
+            ("remotes",): "remotes",
+            ("schedules",): "schedules",
+            ("key-value-store",): "key_value_stores"
+        }
+        if tuple(parts) in sections:
+            return self._section(sections[tuple(parts)])
+
+        filters = {
+            ("nodes",): ("nodes", {"nodes": "name"}),
+            ("view", "storage-pools"): ("storage_pools", {"nodes": "node_name", "storage_pools": "storage_pool_name"}),
+            ("resource-groups",): ("resource_groups", {"resource_groups": "name"}),
+            ("resource-definitions",): ("resource_definitions", {"resource_definitions": "name"}),
+            ("view", "resources"): ("resources", {"nodes": "node_name", "resources": "name"}),
+            ("view", "snapshots"): ("snapshots", {"resources": "resource_name"})
+        }
+        if tuple(parts) in filters:
+            section, section_filters = filters[tuple(parts)]
+            items = self._section(section)
+            if items is None:
+                return None
+            items = _filter(items, query, section_filters)
+            if section == "resources" and query.get("storage_pools"):
+                items = self._filter_volumes_by_storage_pool(items, query["storage_pools"])
+            if section == "resource_definitions" and not query.get("with_volume_definitions"):
+                items = [{k: v for k, v in x.items() if k != "volume_definitions"} for x in items]
+            if section == "snapshots" and query.get("nodes"):
+                nodes = {x.lower() for x in query["nodes"]}
+                items = [x for x in items if nodes & {n.lower() for n in x.get("nodes", [])}]
+            return items
+
+        if len(parts) == 3 and parts[0] == "resource-groups":
+            if parts[2] == "volume-groups":
+                vlm_grps = self._section("volume_groups") or {}
+                matching = [v for k, v in vlm_grps.items() if k.lower() == parts[1].lower()]
+                return matching[0] if matching else None
+            if parts[2] == "query-max-volume-size":
+                rsc_grp = [x for x in self._section("resource_groups") or [] if x["name"].lower() == parts[1].lower()]
+                if not rsc_grp:
+                    return None
+                select_filter = rsc_grp[0].get("select_filter", {})
+                return self._max_volume_sizes(
+                    select_filter.get("place_count", 2),
+                    select_filter.get("storage_pool_list") or select_filter.get("storage_pool")
+                )
+        return None
+
+    @classmethod
+    def _filter_volumes_by_storage_pool(cls, resources, storage_pools):
+        storage_pools = {x.lower() for x in storage_pools}
+        result = []
+        for rsc in resources:
+            volumes = [x for x in rsc.get("volumes", []) if x.get("storage_pool_name", "").lower() in storage_pools]
+            if volumes:
+                rsc = dict(rsc)
+                rsc["volumes"] = volumes
+                result.append(rsc)
+        return result
+
+    def _oversubscription_ratio(self, storage_pool):
+        storage_pool_dfns = self._section("storage_pool_definitions") or []
+        spd_props = [x.get("props", {}) for x in storage_pool_dfns
+                     if x["storage_pool_name"] == storage_pool["storage_pool_name"]]
+        for props in [storage_pool.get("props", {})] + spd_props + [self._section("controller_props") or {}]:
+            if apiconsts.KEY_STOR_POOL_MAX_OVERSUBSCRIPTION_RATIO in props:
+                return float(props[apiconsts.KEY_STOR_POOL_MAX_OVERSUBSCRIPTION_RATIO])
+        return DEFAULT_MAX_OVERSUBSCRIPTION_RATIO
+
+    def _max_volume_sizes(self, place_count, storage_pool_names):
+        """
+        Approximates the controller's max volume size query: per storage pool name the largest volume that fits
+        into place_count pools, thin pools count with their oversubscription ratio. Placement constraints other
+        than the storage pool are not considered.
+        """
+        if not self._qmvs_note_printed:
+            sys.stderr.write("Note: max volume sizes are approximated from the offline snapshot.\n")
+            self._qmvs_note_printed = True
+
+        if isinstance(storage_pool_names, str):
+            storage_pool_names = [storage_pool_names]
+        wanted = {x.lower() for x in storage_pool_names or []}
+
+        by_name = {}
+        for storage_pool in self._section("storage_pools") or []:
+            name = storage_pool["storage_pool_name"]
+            if storage_pool.get("provider_kind") == linstor.StoragePoolDriver.Diskless:
+                continue
+            if wanted and name.lower() not in wanted:
+                continue
+            if "free_capacity" not in storage_pool:
+                continue
+            thin = storage_pool.get("provider_kind", "").endswith("_THIN")
+            capacity = storage_pool["free_capacity"]
+            if thin:
+                capacity = int(capacity * self._oversubscription_ratio(storage_pool))
+            by_name.setdefault(name, []).append((capacity, storage_pool["node_name"], thin))
+
+        candidates = []
+        for name, pools in sorted(by_name.items()):
+            if len(pools) < place_count:
+                continue
+            pools.sort(reverse=True)
+            candidates.append({
+                "storage_pool": name,
+                "max_volume_size_kib": pools[place_count - 1][0],
+                "all_thin": all(thin for _, _, thin in pools),
+                "node_names": sorted(node for _, node, _ in pools)
+            })
+        return {"candidates": candidates, "default_max_oversubscription_ratio": DEFAULT_MAX_OVERSUBSCRIPTION_RATIO}
+
+    def _query_max_volume_size(self, body, path):
+        body = body or {}
+        if "place_count" not in body:
+            return self._not_found(path)
+        return _OfflineResponse(200, self._max_volume_sizes(body["place_count"], body.get("storage_pool")))
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ConnectionPool(object):
+    """
+    Hands out controller connections to worker threads.
+
+    A linstor.Linstor object wraps a single http connection and must not be used by more than one thread at a time,
+    so every concurrent request checks out its own connection. Additional connections are created lazily via the
+    given factory, at most as many as the current run has workers; further requests wait for an idle connection.
+    After a run only the connections within the pool size are kept open until the pool is closed, the primary
+    connection is part of the pool.
+    """
+    DEFAULT_SIZE = 8
+
+    def __init__(self, primary, factory, size=DEFAULT_SIZE):
+        """
+
+        :param linstor.Linstor primary: the already connected main connection
+        :param Callable[[], linstor.Linstor] factory: returns a new connected linstor.Linstor object
+        :param int size: default number of concurrent requests
+        """
+        self._primary = primary
+        self._factory = factory
+        self._size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._idle.put(primary)
+        self._created = []
+        self._connecting = 0
+        self._checked_out = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def serial(self):
+        """
+        True if requests have to be executed one after another on the primary connection,
+        e.g. in curl mode the printed commands would otherwise appear in random order.
+        """
+        return self._primary.curl
+
+    def _checkout(self, limit):
+        """
+        :param int limit: maximal number of connections including the primary one
+        :rtype: linstor.Linstor
+        """
+        with self._lock:
+            self._checked_out += 1
+            create = self._idle.empty() and len(self._created) + self._connecting + 1 < limit
+            if create:
+                self._connecting += 1
+
+        if not create:
+            return self._idle.get()
+
+        try:
+            lapi = self._factory()
+        except BaseException:
+            with self._lock:
+                self._checked_out -= 1
+            raise
+        finally:
+            with self._lock:
+                self._connecting -= 1
+        with self._lock:
+            self._created.append(lapi)
+        return lapi
+
+    def _checkin(self, lapi):
+        with self._lock:
+            self._checked_out -= 1
+        self._idle.put(lapi)
+
+    def _shrink(self):
+        """
+        Disconnects the connections exceeding the pool size, if no connection is checked out.
+        """
+        with self._lock:
+            if self._checked_out:
+                return
+            surplus = self._created[self._size - 1:]
+            self._created = self._created[:self._size - 1]
+            self._idle = queue.LifoQueue()
+            self._idle.put(self._primary)
+            for lapi in self._created:
+                self._idle.put(lapi)
+        for lapi in surplus:
+            lapi.disconnect()
+
+    def dedicated(self):
+        """
+        Creates a connection that is not shared with other calls, for long running requests like event streams.
+        The caller has to disconnect it.
+
+        :rtype: linstor.Linstor
+        """
+        return self._factory()
+
+    def _call(self, call, limit):
+        lapi = self._checkout(limit)
+        try:
+            return call(lapi)
+        finally:
+            self._checkin(lapi)
+
+    def run(self, calls, max_workers=None):
+        """
+        Executes the given calls concurrently, each call gets a linstor.Linstor object as only argument.
+
+        :param list[Callable[[linstor.Linstor], Any]] calls: calls to execute
+        :param Optional[int] max_workers: maximal number of concurrent requests, default is the pool size
+        :return: results of the calls in the same order as the calls
+        :rtype: list[Any]
+        :raises: the first exception (in call order) raised by any of the calls
+        """
+        workers = min(len(calls), max_workers if max_workers else self._size)
+        if workers <= 1 or self.serial:
+            return [call(self._primary) for call in calls]
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._call, call, workers) for call in calls]
+                return [f.result() for f in futures]
+        finally:
+            self._shrink()
+
+    def close(self):
+        """
+        Disconnects all connections created by the pool, the primary connection is left untouched.
+        """
+        with self._lock:
+            created = self._created
+            self._created = []
+        for lapi in created:
+            lapi.disconnect()
+        self._idle = queue.LifoQueue()
+        self._idle.put(self._primary)
+
+
+class RateLimiter(object):
+    """
+    Spaces out the requests of several worker threads, at most rate requests are started per second.
+    """
+    def __init__(self, rate, clock=time.time, sleep=time.sleep):
+        """
+
+        :param Optional[float] rate: requests per second, None or 0 for no limit
+        """
+        self._interval = 1.0 / rate if rate else 0.0
+        self._next = None
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until the calling thread may send its next request.
+        """
+        if not self._interval:
+            return
+        with self._lock:
+            now = self._clock()
+            start = now if self._next is None else max(now, self._next)
+            self._next = start + self._interval
+        if start > now:
+            self._sleep(start - now)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Tracks the synchronization of many resources from periodically fetched resource lists, used by wait-sync.
+"""
+import time
+
+import linstor
+import linstor.sharedconsts as apiconsts
+
+
+def _peer_progress(rsc, vlm):
+    """
+    :return: (peer, replication state, done percentage) of the peers the volume is not established with
+    :rtype: list[(str, str, Optional[float])]
+    """
+    return [(peer, state.replication_state, state.done_percentage)
+            for peer, state in vlm.state.replication_states.items() if state.replication_state != "Established"]
+
+
+def volume_synced(rsc, vlm):
+    """
+    A volume is synchronized if its disk is up to date, or intentionally diskless, and it is established with all
+    peers. Volumes without drbd are always synchronized.
+
+    :param linstor.responses.Resource rsc: resource of the volume
+    :param linstor.responses.Volume vlm: volume to check
+    :rtype: bool
+    """
+    layer_data = vlm.data_v1.get("layer_data_list", [])
+    if not layer_data or layer_data[0].get("type") != linstor.consts.DeviceLayerKind.DRBD.value:
+        return True
+    disk_state = vlm.data_v1.get("state", {}).get("disk_state")
+    if disk_state != "UpToDate" and not (disk_state == "Diskless" and apiconsts.FLAG_DISKLESS in rsc.flags):
+        return False
+    return not _peer_progress(rsc, vlm)
+
+
+class SyncTracker(object):
+    """
+    Synchronization state of a set of resource definitions. Every update evaluates one resource list that
+    contains the resources of the pending resource definitions. The speed of every syncing peer is derived from
+    the change of its done percentage since it was first seen, the overall estimate is the slowest of them.
+    """
+    def __init__(self, names):
+        """
+
+        :param list[str] names: resource definition names to wait for
+        """
+        self._pending = {x.lower(): x for x in names}
+        self._total = len(names)
+        self._first_seen = {}  # (rsc, node, vlm nr, peer) -> (time, done percentage)
+        self._syncing = {}  # (rsc, node, vlm nr, peer) -> (replication state, done percentage, eta seconds or None)
+
+    @property
+    def pending(self):
+        """
+        :return: names of the resource definitions that are not synchronized yet
+        :rtype: list[str]
+        """
+        return sorted(self._pending.values())
+
+    @property
+    def total(self):
+        return self._total
+
+    @property
+    def synced_count(self):
+        return self._total - len(self._pending)
+
+    def update(self, resources, now=None):
+        """
+        :param list[linstor.responses.Resource] resources: resources of (at least) all pending resource definitions
+        :param Optional[float] now: time of the fetch
+        """
+        now = time.time() if now is None else now
+        by_name = {}
+        for rsc in resources:
+            by_name.setdefault(rsc.name.lower(), []).append(rsc)
+
+        syncing = {}
+        for name in list(self._pending):
+            synced = True
+            for rsc in by_name.get(name, []):
+                if apiconsts.FLAG_RSC_INACTIVE in rsc.flags:
+                    continue
+                for vlm in rsc.volumes:
+                    if volume_synced(rsc, vlm):
+                        continue
+                    synced = False
+                    for peer, repl_state, done in _peer_progress(rsc, vlm):
+                        key = (rsc.name, rsc.node_name, vlm.number, peer)
+                        syncing[key] = (repl_state, done, self._eta(key, done, now))
+            if synced:
+                del self._pending[name]
+        self._syncing = syncing
+
+    def _eta(self, key, done, now):
+        if done is None:
+            return None
+        first = self._first_seen.get(key)
+        if first is None or done < first[1]:
+            self._first_seen[key] = (now, done)  # first sighting or the sync restarted
+            return None
+        elapsed = now - first[0]
+        if elapsed <= 0 or done <= first[1]:
+            return None
+        return (100.0 - done) * elapsed / (done - first[1])
+
+    def eta(self):
+        """
+        :return: estimated seconds until all syncing peers are done, None if no estimate is possible yet
+        :rtype: Optional[float]
+        """
+        etas = [eta for _, _, eta in self._syncing.values() if eta is not None]
+        return max(etas) if etas else None
+
+    def slowest(self, count=3):
+        """
+        :return: the syncing peers that finish last, peers without estimate first
+        :rtype: list[((str, str, int, str), (str, Optional[float], Optional[float]))]
+        """
+        def sort_key(item):
+            _, done, eta = item[1]
+            return (eta is not None, -(eta or 0), done or 0)
+        return sorted(self._syncing.items(), key=sort_key)[:count]
+
+    def status(self):
+        """
+        :return: one line summary like '3/10 synced, ETA 2m05s, slowest: rsc1/0 n1->n2 12.0%'
+        :rtype: str
+        """
+        text = "{s}/{t} synced".format(s=self.synced_count, t=self._total)
+        eta = self.eta()
+        if eta is not None:
+            text += ", ETA {m}m{s:02d}s".format(m=int(eta) // 60, s=int(eta) % 60)
+        slowest = self.slowest()
+        if slowest:
+            text += ", slowest: " + ", ".join(
+                "{r}/{v} {n}->{p}".format(r=rsc, v=vlm_nr, n=node, p=peer) + (
+                    "" if done is None else " {d:.1f}%".format(d=done))
+                for (rsc, node, vlm_nr, peer), (_, done, _) in slowest)
+        return text
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Data model and screen layout of the 'linstor top' dashboard.
+"""
+import collections
+import re
+
+KIND_SYNC = "Sync"
+KIND_IN_USE = "InUse"
+KIND_CONNECTION = "Conn"
+KIND_POOL = "Pool"
+KINDS = [KIND_SYNC, KIND_IN_USE, KIND_CONNECTION, KIND_POOL]
+
+# value is the progress of a sync or the fill level of a pool in percent, None if unknown
+TopRow = collections.namedtuple("TopRow", ["kind", "name", "node", "detail", "value"])
+
+# column name -> (header, width or None to fill the remaining space)
+COLUMNS = collections.OrderedDict([
+    ("kind", ("Kind", 6)),
+    ("name", ("Resource/Pool", 24)),
+    ("node", ("Node", 16)),
+    ("value", ("%", 7)),
+    ("detail", ("Detail", None))
+])
+
+
+def _value_sort_key(row):
+    return (row.value is None, row.value)
+
+
+SORT_KEYS = {
+    "kind": lambda row: (KINDS.index(row.kind), row.name, row.node),
+    "name": lambda row: (row.name, row.node),
+    "node": lambda row: (row.node, row.name),
+    "value": _value_sort_key,
+    "detail": lambda row: (row.detail, row.name)
+}
+
+
+class TopModel(object):
+    """
+    Current rows of the dashboard and the selection the user made. The visible row list is only sorted again if
+    rows or the selection changed.
+    """
+    def __init__(self, sort="kind", reverse=False, filter_text="", kinds=None):
+        """
+
+        :param str sort: column to sort by, a key of SORT_KEYS
+        :param bool reverse: sort descending
+        :param str filter_text: only show rows containing this regular expression
+        :param Optional[list[str]] kinds: row kinds to show, default all
+        """
+        self._rows = {}
+        self.sort = sort
+        self.reverse = reverse
+        self.filter_text = filter_text
+        self.kinds = set(kinds or KINDS)
+        self._visible = None
+        self.changed = set()  # keys that were added or changed by the last update
+
+    def update(self, rows):
+        """
+        :param dict[tuple, TopRow] rows: all rows of the current tick
+        :return: True if anything changed
+        """
+        self.changed = {key for key, row in rows.items() if self._rows.get(key) != row}
+        modified = bool(self.changed) or len(rows) != len(self._rows) or any(x not in rows for x in self._rows)
+        self._rows = rows
+        if modified:
+            self._visible = None
+        return modified
+
+    def select(self, sort=None, reverse=None, filter_text=None, kinds=None):
+        if sort is not None:
+            self.sort = sort
+        if reverse is not None:
+            self.reverse = reverse
+        if filter_text is not None:
+            self.filter_text = filter_text
+        if kinds is not None:
+            self.kinds = set(kinds)
+        self._visible = None
+
+    def _matches(self, row, pattern):
+        return pattern is None or any(pattern.search(str(x)) for x in (row.name, row.node, row.detail))
+
+    def visible(self):
+        """
+        :return: (key, row) tuples of the rows matching the selection, sorted
+        :rtype: list[(tuple, TopRow)]
+        """
+        if self._visible is None:
+            try:
+                pattern = re.compile(self.filter_text, re.IGNORECASE) if self.filter_text else None
+            except re.error:
+                pattern = re.compile(re.escape(self.filter_text), re.IGNORECASE)
+            rows = [(key, row) for key, row in self._rows.items()
+                    if row.kind in self.kinds and self._matches(row, pattern)]
+            sort_key = SORT_KEYS[self.sort]
+            rows.sort(key=lambda x: sort_key(x[1]), reverse=self.reverse)
+            self._visible = rows
+        return self._visible
+
+    def counts(self):
+        counts = dict.fromkeys(KINDS, 0)
+        for row in self._rows.values():
+            counts[row.kind] += 1
+        return counts
+
+
+def format_row(row, width):
+    """
+    :param TopRow row: row to format, None for the header
+    :param int width: screen width
+    :rtype: str
+    """
+    cells = []
+    used = 0
+    for column, (header, col_width) in COLUMNS.items():
+        if row is None:
+            text = header
+        elif column == "value":
+            text = "" if row.value is None else "{v:.1f}".format(v=row.value)
+        else:
+            text = getattr(row, column)
+        if col_width is None:
+            col_width = max(width - used, 0)
+        text = text[:col_width]
+        cells.append(text.rjust(col_width) if column == "value" else text.ljust(col_width))
+        used += col_width + 1
+    return " ".join(cells)[:width].rstrip()
+
+
+class TopScreen(object):
+    """
+    Writes the dashboard lines to a curses window, only lines that differ from what is on screen are written.
+    """
+    def __init__(self, window, header_attr=0, changed_attr=0):
+        """
+
+        :param window: curses window
+        :param int header_attr: curses attribute of the status and header lines
+        :param int changed_attr: curses attribute of rows changed by the last update
+        """
+        self._window = window
+        self._header_attr = header_attr
+        self._changed_attr = changed_attr
+        self._on_screen = []  # (text, attr) per screen line
+
+    def invalidate(self):
+        self._on_screen = []
+
+    def draw(self, lines):
+        """
+        :param list[(str, bool, bool)] lines: text, header and changed flag per screen line
+        """
+        height, width = self._window.getmaxyx()
+        lines = lines[:height]
+        for idx, (text, header, changed) in enumerate(lines):
+            attr = self._header_attr if header else (self._changed_attr if changed else 0)
+            entry = (text[:width - 1], attr)
+            if idx < len(self._on_screen) and self._on_screen[idx] == entry:
+                continue
+            self._window.move(idx, 0)
+            self._window.clrtoeol()
+            self._window.addnstr(idx, 0, entry[0], width - 1, attr)
+            if idx < len(self._on_screen):
+                self._on_screen[idx] = entry
+            else:
+                self._on_screen.append(entry)
+        for idx in range(len(lines), len(self._on_screen)):
+            self._window.move(idx, 0)
+            self._window.clrtoeol()
+        del self._on_screen[len(lines):]
+        self._window.noutrefresh()
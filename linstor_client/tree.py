@@ -2,6 +2,7 @@
 from __future__ import print_function
 from linstor_client.consts import Color
 import locale
+import sys
 
 
 class TreeFormatter:
@@ -38,6 +39,9 @@ class TreeFormatter:
 
 
 class TreeNode:
+    # number of rendered lines collected before they are written to the output stream
+    OUTPUT_CHUNK_LINES = 1024
+
     def __init__(self, name, description, color):
         """
         Creates a new TreeNode object
@@ -51,40 +55,66 @@ class TreeNode:
         self.description = description
         self.color = color
         self.child_list = []
+        self._child_map = {}
 
-    def print_node(self, no_utf8, no_color):
-        self.print_node_in_tree("", "", "", TreeFormatter(no_utf8, no_color))
-
-    def print_node_in_tree(self, connector, element_marker, child_prefix, formatter):
-        if connector:
-            print(connector)
-
-        print(element_marker + formatter.apply_color(self.name, self.color) + ' (' + self.description + ')')
-
-        for child_node in self.child_list[:-1]:
-            child_node.print_node_in_tree(
-                child_prefix + formatter.get_drawing_string('connector_continue'),
-                child_prefix + formatter.get_drawing_string('child_marker_continue'),
-                child_prefix + formatter.get_drawing_string('connector_continue'),
-                formatter
-            )
+    def print_node(self, no_utf8, no_color, max_depth=None, outstream=None):
+        """
+        Prints the tree starting at this node.
 
-        for child_node in self.child_list[-1:]:
-            child_node.print_node_in_tree(
-                child_prefix + formatter.get_drawing_string('connector_continue'),
-                child_prefix + formatter.get_drawing_string('child_marker_end'),
-                child_prefix + formatter.get_drawing_string('connector_end'),
-                formatter
-            )
+        :param bool no_utf8: only use ascii characters for the tree drawing
+        :param bool no_color: do not color node names
+        :param Optional[int] max_depth: do not print nodes deeper than this, the node itself has depth 0
+        :param outstream: stream to write to, default sys.stdout
+        """
+        self.print_node_in_tree(
+            "", "", "", TreeFormatter(no_utf8, no_color), max_depth, outstream if outstream else sys.stdout)
+
+    def print_node_in_tree(self, connector, element_marker, child_prefix, formatter, max_depth=None, outstream=None):
+        # iterative depth-first walk with an explicit stack, lines are written in chunks
+        outstream = outstream if outstream else sys.stdout
+        connector_continue = formatter.get_drawing_string('connector_continue')
+        connector_end = formatter.get_drawing_string('connector_end')
+        child_marker_continue = formatter.get_drawing_string('child_marker_continue')
+        child_marker_end = formatter.get_drawing_string('child_marker_end')
+
+        lines = []
+        stack = [(self, connector, element_marker, child_prefix, 0)]
+        while stack:
+            node, node_connector, node_marker, node_child_prefix, depth = stack.pop()
+            if node_connector:
+                lines.append(node_connector)
+            lines.append(node_marker + formatter.apply_color(node.name, node.color) + ' (' + node.description + ')')
+
+            if len(lines) >= self.OUTPUT_CHUNK_LINES:
+                outstream.write("\n".join(lines) + "\n")
+                lines = []
+
+            if not node.child_list or (max_depth is not None and depth >= max_depth):
+                continue
+
+            child_connector = node_child_prefix + connector_continue
+            last_child = node.child_list[-1]
+            stack.append((
+                last_child,
+                child_connector,
+                node_child_prefix + child_marker_end,
+                node_child_prefix + connector_end,
+                depth + 1
+            ))
+            marker = node_child_prefix + child_marker_continue
+            for child_node in reversed(node.child_list[:-1]):
+                stack.append((child_node, child_connector, marker, child_connector, depth + 1))
+
+        if lines:
+            outstream.write("\n".join(lines) + "\n")
 
     def add_child(self, child):
         self.child_list.append(child)
+        # keep the first child for a name, like a linear search would find it
+        self._child_map.setdefault(child.name, child)
 
     def find_child(self, name):
-        for child in self.child_list:
-            if child.name == name:
-                return child
-        return None
+        return self._child_map.get(name)
 
     def set_description(self, description):
         self.description = description
@@ -92,11 +122,12 @@ class TreeNode:
     def add_description(self, description):
         self.description += description
 
-    def to_data(self):
+    def to_data(self, max_depth=None):
         return {
             'name': self.name,
             'description': self.description,
-            'children': [x.to_data() for x in self.child_list]
+            'children': [x.to_data(max_depth - 1 if max_depth is not None else None) for x in self.child_list]
+            if max_depth is None or max_depth > 0 else []
         }
 
     def __repr__(self):
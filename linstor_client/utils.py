@@ -18,8 +18,10 @@
     See <http://www.gnu.org/licenses/>.
 """
 
+import collections
 import subprocess
 import sys
+import threading
 
 from linstor_client.consts import (
     Color,
@@ -29,7 +31,7 @@ from linstor_client.consts import (
 
 class Output(object):
     @staticmethod
-    def handle_ret(answer, no_color, warn_as_error, outstream=sys.stdout):
+    def handle_ret(answer, no_color, warn_as_error, outstream=sys.stdout, error_report_ids=None):
         from linstor.sharedconsts import (MASK_ERROR, MASK_WARN, MASK_INFO)
 
         rc = answer.ret_code
@@ -69,9 +71,11 @@ class Output(object):
             outstream.write("Details:\n")
             Output.print_with_indent(outstream, 4, details)
 
-        if answer.error_report_ids:
+        if error_report_ids is None:
+            error_report_ids = answer.error_report_ids
+        if error_report_ids:
             outstream.write("Show reports:\n")
-            Output.print_with_indent(outstream, 4, "linstor error-reports show " + " ".join(answer.error_report_ids))
+            Output.print_with_indent(outstream, 4, "linstor error-reports show " + " ".join(error_report_ids))
         return ret
 
     @staticmethod
@@ -119,6 +123,81 @@ class Output(object):
         return msg
 
 
+class ReportAggregator(object):
+    """
+    Collects api call responses attached to listed objects and prints every distinct response only once,
+    together with the number of objects that reported it. E.g. an offline satellite makes every one of its
+    volumes report the same error.
+    """
+    def __init__(self):
+        # responses compare equal by return code and message
+        self._groups = collections.OrderedDict()  # type: dict[ApiCallResponse, (list[str], list[str])]
+
+    def add(self, report, obj_name):
+        """
+
+        :param ApiCallResponse report: response to add
+        :param str obj_name: name of the object the report is attached to
+        """
+        obj_names, error_report_ids = self._groups.setdefault(report, ([], []))
+        obj_names.append(obj_name)
+        for report_id in report.error_report_ids:
+            if report_id not in error_report_ids:
+                error_report_ids.append(report_id)
+
+    def __len__(self):
+        return len(self._groups)
+
+    def print_reports(self, no_color, warn_as_error, outstream=sys.stdout):
+        """
+        Prints each distinct report once.
+
+        :return: the highest exit code of the reports
+        :rtype: int
+        """
+        rc = ExitCode.OK
+        for report, (obj_names, error_report_ids) in self._groups.items():
+            current_rc = Output.handle_ret(
+                report,
+                no_color=no_color,
+                warn_as_error=warn_as_error,
+                outstream=outstream,
+                error_report_ids=error_report_ids
+            )
+            if len(obj_names) > 1:
+                outstream.write("Reported {c} times by:\n".format(c=len(obj_names)))
+                Output.print_with_indent(outstream, 4, ", ".join(obj_names))
+            if current_rc != ExitCode.OK:
+                rc = current_rc
+        return rc
+
+
+class Progress(object):
+    """
+    Prints a "label: done/total" counter on a terminal, steps may be reported from worker threads.
+    Nothing is printed if the output stream is not a terminal.
+    """
+    def __init__(self, label, total, outstream=sys.stderr):
+        self._label = label
+        self._total = total
+        self._done = 0
+        self._outstream = outstream
+        self._enabled = total > 1 and hasattr(outstream, "isatty") and outstream.isatty()
+        self._lock = threading.Lock()
+
+    def step(self):
+        with self._lock:
+            self._done += 1
+            if self._enabled:
+                self._outstream.write("\r{l}: {d}/{t}".format(l=self._label, d=self._done, t=self._total))
+                self._outstream.flush()
+
+    def finish(self):
+        if self._enabled and self._done:
+            self._outstream.write("\n")
+            self._outstream.flush()
+
+
 # a wrapper for subprocess.check_output
 def check_output(*args, **kwargs):
     def _wrapcall_2_6(*args, **kwargs):
@@ -182,7 +261,7 @@ def filter_new_args(unsetprefix, args):
         "controllers", "warn_as_error", "no_utf8", "no_color",
         "machine_readable", "disable_config", "timeout",
         "verbose", "output_version", "curl", "allow_insecure_auth",
-        "certfile", "keyfile", "cafile"
+        "certfile", "keyfile", "cafile", "parallel", "offline", "cache_ttl"
     ]
     for k, v in args.__dict__.items():
         if v is not None and k not in reserved_keys:
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental rendering of repeatedly fetched list tables for the --watch option.
+"""
+import re
+import sys
+import time
+
+from linstor_client.consts import Color
+
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+_PIPES = u"|┊"
+_SEPARATOR_CHARS = u"=-═┄─"
+
+CLEAR_SCREEN = "\x1b[H\x1b[2J"
+CLEAR_LINE = "\x1b[K"
+
+
+def strip_ansi(text):
+    return _ANSI_RE.sub("", text)
+
+
+class TableSnapshot(object):
+    """
+    The rendered output of one list command, split into keyed table rows.
+    """
+    def __init__(self, text, key_columns):
+        """
+
+        :param str text: output of the show function, a table and optional trailing messages
+        :param int key_columns: number of leading columns that identify a row
+        """
+        self.lines = text.splitlines()
+        self.rows = {}  # key -> (cell values, indices of the row's lines)
+        self.order = []
+
+        header_seen = False
+        last_key = None
+        occurrences = {}
+        for idx, line in enumerate(self.lines):
+            plain = strip_ansi(line).strip()
+            if not plain or plain[0] not in _PIPES:
+                continue
+            inner = plain[1:-1]
+            if inner and inner.strip(_SEPARATOR_CHARS) == "":
+                continue  # separator line
+            cells = [x.strip() for x in re.split(u"[" + _PIPES + u"]", plain)[1:-1]]
+            if not header_seen:
+                header_seen = True
+                continue
+
+            if last_key is not None and not any(cells[:key_columns]):
+                # continuation line of a multi line row
+                values, line_idxs = self.rows[last_key]
+                self.rows[last_key] = (values + tuple(cells), line_idxs + [idx])
+                continue
+
+            key = tuple(cells[:key_columns])
+            occurrences[key] = occurrences.get(key, 0) + 1
+            if occurrences[key] > 1:
+                key += (occurrences[key],)
+            self.rows[key] = (tuple(cells), [idx])
+            self.order.append(key)
+            last_key = key
+
+    def changed_keys(self, previous):
+        """
+        :param Optional[TableSnapshot] previous: snapshot of the previous tick
+        :return: keys of rows that are new or have different values than in the previous snapshot
+        :rtype: set[tuple]
+        """
+        if previous is None:
+            return set()
+        return {key for key in self.order
+                if key not in previous.rows or previous.rows[key][0] != self.rows[key][0]}
+
+    def removed_keys(self, previous):
+        if previous is None:
+            return []
+        return [key for key in previous.order if key not in self.rows]
+
+    def same_layout(self, other):
+        """
+        True if both snapshots have the same lines apart from the table rows, so changed rows can be redrawn in
+        place.
+        """
+        if other is None or len(self.lines) != len(other.lines) or self.order != other.order:
+            return False
+        row_lines = {idx for _, line_idxs in self.rows.values() for idx in line_idxs}
+        return all(self.lines[idx] == other.lines[idx] for idx in range(len(self.lines)) if idx not in row_lines)
+
+
+class TableWatch(object):
+    """
+    Renders the snapshots of a watched list command.
+
+    On a terminal the table is drawn once and afterwards only rows that changed are redrawn and marked, the
+    whole screen is only repainted if the layout of the table changed. Without a terminal or with changes_only
+    only the difference to the previous tick is printed, one line per added (+), removed (-) or changed (~) row.
+    """
+    MARK = "> "
+    NO_MARK = "  "
+
+    def __init__(self, title, key_columns, changes_only=False, colors=True, outstream=None):
+        """
+
+        :param str title: status line shown above the table
+        :param int key_columns: number of leading columns that identify a row
+        :param bool changes_only: only print the delta lines
+        :param bool colors: use colors to mark changed rows
+        :param outstream: stream to write to, default stdout
+        """
+        self._title = title
+        self._key_columns = key_columns
+        self._out = outstream or sys.stdout
+        self._changes_only = changes_only or not self._out.isatty()
+        self._colors = colors
+        self._previous = None
+        self._marked = set()  # keys of rows marked on screen
+
+    def _status(self):
+        return "{t}    {now}".format(t=self._title, now=time.strftime("%Y-%m-%d %H:%M:%S"))
+
+    def _mark(self, line, marked):
+        if not marked:
+            return self.NO_MARK + line
+        if self._colors:
+            return Color.YELLOW + self.MARK + Color.NONE + line
+        return self.MARK + line
+
+    def _write_line(self, screen_row, line):
+        self._out.write("\x1b[{r};1H{l}{c}".format(r=screen_row, l=line, c=CLEAR_LINE))
+
+    def update(self, text):
+        """
+        Shows the output of the next tick.
+
+        :param str text: rendered output of the list command
+        """
+        snapshot = TableSnapshot(text, self._key_columns)
+        if self._changes_only:
+            self._print_changes(snapshot)
+        elif snapshot.same_layout(self._previous):
+            self._redraw_rows(snapshot)
+        else:
+            self._repaint(snapshot)
+        self._out.flush()
+        self._previous = snapshot
+
+    def _print_changes(self, snapshot):
+        if self._previous is None:
+            self._out.write(self._status() + "\n" + "\n".join(snapshot.lines) + "\n")
+            return
+
+        now = time.strftime("%H:%M:%S")
+        for key in snapshot.removed_keys(self._previous):
+            for line_idx in self._previous.rows[key][1]:
+                self._out.write("{n} - {l}\n".format(n=now, l=self._previous.lines[line_idx]))
+        changed = snapshot.changed_keys(self._previous)
+        for key in snapshot.order:
+            if key in changed:
+                sign = "~" if key in self._previous.rows else "+"
+                for line_idx in snapshot.rows[key][1]:
+                    self._out.write("{n} {s} {l}\n".format(n=now, s=sign, l=snapshot.lines[line_idx]))
+
+    def _repaint(self, snapshot):
+        changed = snapshot.changed_keys(self._previous)
+        marked_lines = {idx for key in changed for idx in snapshot.rows[key][1]}
+        self._out.write(CLEAR_SCREEN + self._status() + "\n\n")
+        for idx, line in enumerate(snapshot.lines):
+            self._out.write(self._mark(line, idx in marked_lines) + "\n")
+        self._marked = changed
+
+    def _redraw_rows(self, snapshot):
+        changed = snapshot.changed_keys(self._previous)
+        self._write_line(1, self._status())
+        # status line and an empty line precede the table
+        for key in changed | self._marked:
+            for idx in snapshot.rows[key][1]:
+                self._write_line(idx + 3, self._mark(snapshot.lines[idx], key in changed))
+        self._out.write("\x1b[{r};1H".format(r=len(snapshot.lines) + 3))
+        self._marked = changed
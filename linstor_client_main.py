@@ -28,6 +28,9 @@ import linstor
 import linstor_client.argparse.argparse as argparse
 import linstor_client.argcomplete as argcomplete
 import linstor_client.utils as utils
+from linstor_client.cache import CachedLinstor, ResponseCache, SessionCache, cache_directory
+from linstor_client.parallel import ConnectionPool
+from linstor_client.offline import OfflineLinstor
 from linstor_client.commands import (
     ControllerCommands,
     VolumeDefinitionCommands,
@@ -52,6 +55,12 @@ from linstor_client.commands import (
     RemoteCommands,
     FileCommands,
     KeyValueStoreCommands,
+    ApplyCommands,
+    ExportCommands,
+    TopCommands,
+    EventsCommands,
+    JobsCommands,
+    TransactionCommands,
     ScheduleCommands,
     Commands,
     DefaultState,
@@ -126,6 +135,12 @@ class LinStorCLI(object):
         self._file_commands = FileCommands()
         self._schedule_commands = ScheduleCommands()
         self._key_value_store_commands = KeyValueStoreCommands()
+        self._apply_commands = ApplyCommands()
+        self._export_commands = ExportCommands()
+        self._top_commands = TopCommands()
+        self._events_commands = EventsCommands()
+        self._jobs_commands = JobsCommands()
+        self._transaction_commands = TransactionCommands(self._state_service)
 
         self._command_list = [
             self._controller_commands,
@@ -149,8 +164,16 @@ class LinStorCLI(object):
             self._file_commands,
             self._misc_commands,
             self._schedule_commands,
-            self._key_value_store_commands
+            self._key_value_store_commands,
+            self._apply_commands,
+            self._export_commands,
+            self._top_commands,
+            self._events_commands,
+            self._jobs_commands,
+            self._transaction_commands
         ]
+        for cmd in self._command_list:
+            cmd._state_service = self._state_service
 
         self._dflt_ctrl = 'localhost:%d' % linstor.Linstor.REST_PORT
 
@@ -158,6 +181,8 @@ class LinStorCLI(object):
         self._parser = self.setup_parser()
         self._all_commands = self.parser_cmds(self._parser)
         self._linstorapi = None  # type: Optional[linstor.Linstor]
+        self._linstor_pool = None  # type: Optional[ConnectionPool]
+        self._session_cache = None  # type: Optional[SessionCache]
 
     def setup_parser(self):
         parser = argparse.ArgumentParser(prog="linstor")
@@ -183,6 +208,20 @@ class LinStorCLI(object):
                             help='Comma separated list of controllers (e.g.: "host1:port,host2:port"). '
                             'If the environment variable %s is set, '
                             'the ones set via this argument get appended.' % KEY_LS_CONTROLLERS)
+        parser.add_argument(
+            '--offline',
+            metavar='SNAPSHOT',
+            help="Answer list commands from a file written by 'linstor export' instead of a controller. "
+                 "Commands that would modify the cluster are refused."
+        )
+        parser.add_argument(
+            '--cache-ttl',
+            type=float,
+            metavar='SECONDS',
+            help="Serve list requests from responses cached in ~/.cache/linstor/ that are younger than SECONDS. "
+                 "Modifying commands of this client invalidate the affected cached lists. In interactive mode the "
+                 "lists are kept in memory, by default for {t:g} seconds.".format(t=SessionCache.INTERACTIVE_TTL)
+        )
         parser.add_argument('-m', '--machine-readable', action="store_true")
         parser.add_argument(
             '--output-version',
@@ -234,6 +273,12 @@ class LinStorCLI(object):
                                  description='Only useful in interactive mode')
         p_exit.set_defaults(func=self.cmd_exit, always_allowed=True)
 
+        # refresh
+        p_refresh = subp.add_parser(Commands.REFRESH,
+                                    description='Drop the lists cached by the interactive session, '
+                                                'only useful in interactive mode')
+        p_refresh.set_defaults(func=self.cmd_refresh, always_allowed=True)
+
         for sub_cmd in self._command_list:
             sub_cmd.setup_commands(subp)
 
@@ -291,6 +336,43 @@ class LinStorCLI(object):
             pargs.append("interactive")
         return self._parser.parse_args(pargs)
 
+    @classmethod
+    def _create_linstorapi(cls, contrl, args, username, password, response_cache=None):
+        lapi_args = dict(timeout=args.timeout, keep_alive=True, agent_info="Client " + VERSION)
+        if response_cache:
+            lapi = CachedLinstor(contrl, response_cache, **lapi_args)
+        else:
+            lapi = linstor.Linstor(contrl, **lapi_args)
+        lapi.username = username
+        lapi.password = password
+        lapi.certfile = args.certfile
+        lapi.keyfile = args.keyfile
+        lapi.cafile = args.cafile
+        lapi.allow_insecure = args.allow_insecure_auth
+        lapi.curl = args.curl or (hasattr(args, 'from_file') and args.from_file)
+        return lapi
+
+    def _pooled_linstorapi_factory(self, args, username, password):
+        def factory():
+            # connect to the controller host the primary connection ended up with (e.g. after a https redirect)
+            lapi = self._create_linstorapi(
+                self._linstorapi.controller_host(),
+                args,
+                username,
+                password,
+                getattr(self._linstorapi, "cache", None)
+            )
+            lapi.connect()
+            return lapi
+        return factory
+
+    def _offline_linstorapi_factory(self):
+        def factory():
+            lapi = OfflineLinstor(self._linstorapi.export, self._linstorapi.source)
+            lapi.connect()
+            return lapi
+        return factory
+
     @classmethod
     def _report_linstor_error(cls, le):
         sys.stderr.write("Error: " + le.message + '\n')
@@ -312,7 +394,8 @@ class LinStorCLI(object):
                 self.cmd_list,
                 MigrateCommands.cmd_dmmigrate,
                 self._zsh_generator.cmd_completer,
-                self.cmd_help
+                self.cmd_help,
+                self.cmd_refresh
             ]
 
             # only connect if not already connected or a local only command was executed
@@ -325,6 +408,7 @@ class LinStorCLI(object):
             if not ctrls:
                 ctrls.append(self._dflt_ctrl)
             contrl_list = linstor.MultiLinstor.controller_uri_list(','.join(ctrls))
+            watching = getattr(args, "watch", None) is not None or args.func == self._top_commands.top
             if self._linstorapi is None and args.func not in local_only_cmds:
                 username = None
                 password = None
@@ -337,21 +421,26 @@ class LinStorCLI(object):
 
                 for contrl in contrl_list:
                     try:
-                        self._linstorapi = linstor.Linstor(
-                            contrl,
-                            timeout=args.timeout,
-                            keep_alive=True,
-                            agent_info="Client " + VERSION
-                        )
-                        self._linstorapi.username = username
-                        self._linstorapi.password = password
-                        self._linstorapi.certfile = args.certfile
-                        self._linstorapi.keyfile = args.keyfile
-                        self._linstorapi.cafile = args.cafile
-                        self._linstorapi.allow_insecure = args.allow_insecure_auth
-                        self._linstorapi.curl = args.curl or (hasattr(args, 'from_file') and args.from_file)
+                        if args.offline:
+                            self._linstorapi = OfflineLinstor.from_file(args.offline)
+                            factory = self._offline_linstorapi_factory()
+                        else:
+                            if args.func == self.cmd_interactive and self._session_cache is None:
+                                self._session_cache = SessionCache(
+                                    args.cache_ttl if args.cache_ttl is not None else SessionCache.INTERACTIVE_TTL)
+                            response_cache = self._session_cache
+                            if response_cache is None and args.cache_ttl:
+                                response_cache = ResponseCache(cache_directory(contrl), args.cache_ttl)
+                            if response_cache is None and watching:
+                                # revalidate every tick, unchanged lists are not decoded and rendered again
+                                response_cache = SessionCache(ttl=0)
+                            self._linstorapi = self._create_linstorapi(
+                                contrl, args, username, password, response_cache)
+                            factory = self._pooled_linstorapi_factory(args, username, password)
+                        self._linstor_pool = ConnectionPool(self._linstorapi, factory)
                         for cmd in self._command_list:
                             cmd._linstor = self._linstorapi
+                            cmd._linstor_pool = self._linstor_pool
                         self._linstorapi.connect()
                         break
                     except linstor.LinstorNetworkError as le:
@@ -368,6 +457,10 @@ class LinStorCLI(object):
                 allowed_states = vars(args).get('allowed_states', [DefaultState])
                 always_allowed = vars(args).get('always_allowed', False)
                 if always_allowed or current_state.__class__ in allowed_states:
+                    if isinstance(self._linstorapi, CachedLinstor):
+                        # commands that wait for changes must not be answered from the cache
+                        self._linstorapi.cache.begin_command(
+                            revalidate=watching or vars(args).get('revalidate_cache', False))
                     rc = args.func(args)
                 else:
                     sys.stderr.write("Error: Command not allowed in state '{state.name}'\n".format(state=current_state))
@@ -388,6 +481,7 @@ class LinStorCLI(object):
         except linstor.LinstorTimeoutError as le:
             self._report_linstor_error(le)
             rc = ExitCode.CONNECTION_TIMEOUT
+            self._linstor_pool.close()
             self._linstorapi.disconnect()
             self._linstorapi = None  # should trigger reconnect in interactive mode
         except linstor.LinstorApiCallError as le:
@@ -397,6 +491,7 @@ class LinStorCLI(object):
             rc = ExitCode.UNKNOWN_ERROR
         finally:
             if self._linstorapi and not is_interactive:
+                self._linstor_pool.close()
                 self._linstorapi.disconnect()
 
         return rc
@@ -653,6 +748,11 @@ class LinStorCLI(object):
     def cmd_help(self, args):
         return self.parse_and_execute(args.command + ["-h"])
 
+    def cmd_refresh(self, _):
+        if self._session_cache is not None:
+            self._session_cache.clear()
+        return ExitCode.OK
+
     def cmd_exit(self, _):
         sys.exit(ExitCode.OK)
 
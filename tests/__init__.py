@@ -13,7 +13,20 @@ _controller_tests = [
 
 _std_tests = [
     "tests.test_client_commands",
-    "tests.test_tables"
+    "tests.test_tables",
+    "tests.test_parallel",
+    "tests.test_tree",
+    "tests.test_utils",
+    "tests.test_apply",
+    "tests.test_export",
+    "tests.test_offline",
+    "tests.test_cache",
+    "tests.test_watch",
+    "tests.test_top",
+    "tests.test_events",
+    "tests.test_sync",
+    "tests.test_jobs",
+    "tests.test_transaction"
 ]
 
 
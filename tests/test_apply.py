@@ -0,0 +1,152 @@
+import inspect
+import unittest
+
+import linstor.responses
+
+from linstor_client.commands.apply_cmds import ClusterState, Manifest, plan
+from linstor_client.utils import LinstorClientError
+
+
+class _RecordingLinstor(object):
+    """
+    Records the api calls of planned actions, every call has to match a method of linstor.Linstor.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def api_version_smaller(self, version):
+        return False
+
+    def __getattr__(self, name):
+        method = getattr(linstor.Linstor, name)
+
+        def call(*args, **kwargs):
+            inspect.getcallargs(method, self, *args, **kwargs)
+            self.calls.append(name)
+            return []
+        return call
+
+
+class TestApplyPlan(unittest.TestCase):
+    @staticmethod
+    def _state():
+        nodes = [linstor.responses.Node({"name": "node1", "type": "SATELLITE", "props": {"Aux/site": "dc1"}})]
+        storage_pools = [linstor.responses.StoragePool(
+            {"node_name": "node1", "storage_pool_name": "pool1", "provider_kind": "LVM_THIN", "props": {}})]
+        rsc_grps = [linstor.responses.ResourceGroup(
+            {"name": "rg1", "select_filter": {"place_count": 2, "storage_pool_list": ["pool1"]}, "props": {}})]
+        vlm_grps = [linstor.responses.VolumeGroup({"volume_number": 0, "props": {}})]
+        rsc_dfns = [
+            linstor.responses.ResourceDefinition({"name": "rsc1", "resource_group_name": "rg1", "props": {"A": "1"}}),
+            linstor.responses.ResourceDefinition({"name": "rsc2", "resource_group_name": "rg1", "props": {}})
+        ]
+        return ClusterState(
+            {"B": "2"},
+            {x.name.lower(): x for x in nodes},
+            {(x.node_name.lower(), x.name.lower()): x for x in storage_pools},
+            {x.name.lower(): x for x in rsc_grps},
+            {"rg1": {x.number: x for x in vlm_grps}},
+            {x.name.lower(): x for x in rsc_dfns}
+        )
+
+    @staticmethod
+    def _plan(data, prune=False):
+        actions = plan(Manifest(data), TestApplyPlan._state(), prune)
+        return [(x.stage, x.verb, x.obj_type, x.obj_name, x.changes) for x in actions]
+
+    def test_no_changes(self):
+        self.assertListEqual([], self._plan({
+            "controller": {"props": {"B": "2"}},
+            "nodes": [{"name": "NODE1", "type": "Satellite", "props": {"Aux/site": "dc1"}}],
+            "storage_pools": [{"node": "node1", "name": "pool1", "provider_kind": "lvm_thin"}],
+            "resource_groups": [{"name": "rg1", "place_count": 2, "storage_pool": "pool1", "volume_groups": [{}]}],
+            "resource_definitions": [{"name": "rsc1", "resource_group": "rg1", "props": {"A": 1}}]
+        }))
+
+    def test_changes(self):
+        self.assertListEqual([
+            (0, "modify", "controller", "controller", ["DrbdOptions/Net/protocol=C", "-B"]),
+            (2, "modify", "resource group", "rg1", ["place_count: 2 -> 3"]),
+            (3, "create", "volume group", "rg1/1", []),
+            (4, "modify", "resource definition", "rsc1", ["resource_group: rg1 -> rg2", "-A"]),
+            (4, "create", "resource definition", "rsc3", ["resource_group=rg1"]),
+            (5, "modify", "resource definition", "rsc3", ["Aux/x=true"])
+        ], self._plan({
+            "controller": {"props": {"B": None}, "drbd_options": {"Net/protocol": "C"}},
+            "resource_groups": [{"name": "rg1", "place_count": 3, "volume_groups": [{}, {}]}],
+            "resource_definitions": [
+                {"name": "rsc1", "resource_group": "rg2", "props": {"A": None}},
+                {"name": "rsc3", "resource_group": "rg1", "props": {"Aux/x": True}}
+            ]
+        }))
+
+    def test_prune(self):
+        data = {"resource_definitions": [{"name": "rsc1"}], "resource_groups": [{"name": "rg1"}]}
+        self.assertListEqual([], self._plan(data))
+        self.assertListEqual([(6, "delete", "resource definition", "rsc2", [])], self._plan(data, prune=True))
+
+        data = {
+            "nodes": [{"name": "node1"}],
+            "storage_pools": [],
+            "resource_groups": [{"name": "rg1", "volume_groups": []}],
+            "resource_definitions": [{"name": "rsc1"}, {"name": "rsc2"}]
+        }
+        self.assertListEqual([
+            (7, "delete", "volume group", "rg1/0", []),
+            (8, "delete", "storage pool", "node1/pool1", [])
+        ], self._plan(data, prune=True))
+
+    def test_actions_call_api(self):
+        actions = plan(Manifest({
+            "controller": {"props": {"B": None}, "drbd_options": {"Net/protocol": "C"}},
+            "nodes": [
+                {"name": "node1", "type": "Combined", "props": {"Aux/site": None}},
+                {"name": "node2", "address": "10.0.0.2", "props": {"Aux/site": "dc2"}}
+            ],
+            "storage_pools": [
+                {"node": "node1", "name": "pool1", "provider_kind": "lvm_thin", "props": {"A": 1}},
+                {"node": "node2", "name": "pool2", "provider_kind": "lvm", "driver_pool_name": "vg0"}
+            ],
+            "resource_groups": [
+                {"name": "rg1", "place_count": 3, "volume_groups": [{"props": {"A": 1}}, {}]},
+                {"name": "rg2", "place_count": 2, "volume_groups": [{}]}
+            ],
+            "resource_definitions": [
+                {"name": "rsc1", "resource_group": "rg2", "props": {"A": None}},
+                {"name": "rsc3", "resource_group": "rg1", "props": {"Aux/x": True}}
+            ]
+        }), self._state(), True)
+        self.assertEqual(
+            {"controller", "node", "storage pool", "resource group", "volume group", "resource definition"},
+            {x.obj_type for x in actions}
+        )
+        actions += plan(Manifest({
+            "nodes": [], "storage_pools": [], "resource_groups": [], "resource_definitions": []
+        }), self._state(), True)
+
+        lapi = _RecordingLinstor()
+        for action in actions:
+            self.assertListEqual([], action.call(lapi))
+        self.assertListEqual([
+            "_rest_request", "node_modify", "node_create", "storage_pool_modify", "storage_pool_create",
+            "resource_group_modify", "resource_group_create", "volume_group_modify", "volume_group_create",
+            "volume_group_create", "resource_dfn_modify", "resource_dfn_create", "resource_dfn_modify",
+            "resource_dfn_delete", "resource_dfn_delete", "resource_dfn_delete", "storage_pool_delete",
+            "resource_group_delete", "node_delete"
+        ], lapi.calls)
+
+    def test_invalid_manifest(self):
+        self.assertRaises(LinstorClientError, Manifest, [])
+        self.assertRaises(LinstorClientError, Manifest, {"nodes": [{"name": "n1", "adress": "1.2.3.4"}]})
+        self.assertRaises(LinstorClientError, Manifest, {"nodes": [{"name": "n1"}, {"name": "N1"}]})
+        self.assertRaises(LinstorClientError, Manifest, {"resource_definitions": [{"name": 1234}]})
+        self.assertRaises(LinstorClientError, self._plan, {"nodes": [{"name": "node2"}]})
+        self.assertRaises(
+            LinstorClientError,
+            self._plan,
+            {"storage_pools": [{"node": "node1", "name": "pool1", "provider_kind": "zfs"}]}
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,250 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+from linstor_client.cache import CachedLinstor, ResponseCache, SessionCache, _CachedResponse, cacheable, \
+    invalidated_types, object_types
+
+
+class _Response(object):
+    def __init__(self, body, headers=None):
+        self.status = 200
+        self._stream = io.BytesIO(body)
+        self._headers = headers or {"content-type": "application/json"}
+
+    def read(self, amt=None):
+        return self._stream.read(amt)
+
+    def getheader(self, name, default=None):
+        return self._headers.get(name.lower(), default)
+
+    def close(self):
+        pass
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ResponseCache(os.path.join(self.tmp_dir, "ctrl"), 60)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_object_types(self):
+        self.assertSetEqual({"nodes"}, object_types("/v1/nodes?nodes=node1"))
+        self.assertSetEqual({"resources"}, object_types("/v1/view/resources"))
+        self.assertSetEqual(
+            {"resource-definitions", "resources"}, object_types("/v1/resource-definitions/r1/resources"))
+
+        self.assertIn("storage-pools", invalidated_types("/v1/resource-definitions/r1/resources/node1"))
+        self.assertNotIn("nodes", invalidated_types("/v1/resource-definitions/r1"))
+        self.assertIn("*", invalidated_types("/v1/nodes/node1"))
+        self.assertIn("*", invalidated_types("/v1/unknown/thing"))
+
+    def test_cacheable(self):
+        for path in ["/v1/nodes?nodes=node1", "/v1/view/resources", "/v1/resource-definitions/r1/volume-definitions",
+                     "/v1/resource-groups/rg1/volume-groups", "/v1/controller/version"]:
+            self.assertTrue(cacheable(path), path)
+        for path in ["/v1/sos-report/download", "/v1/error-reports", "/v1/resource-definitions/r1/sync-status",
+                     "/v1/events/drbd-resource-state", "/v1/files/f1", "/v1/physical-storage"]:
+            self.assertFalse(cacheable(path), path)
+
+    def test_cached_response(self):
+        response = _CachedResponse({}, b"0123456789")
+        out = io.BytesIO()
+        shutil.copyfileobj(response, out, 4)
+        self.assertEqual(b"0123456789", out.getvalue())
+        self.assertEqual(b"0123456789", response.body)
+
+    def test_lookup(self):
+        self.assertIsNone(self.cache.lookup("k", "/v1/nodes"))
+        self.cache.store("k", "/v1/nodes", {"content-type": "application/json"}, b"[]")
+        self.assertEqual(({"content-type": "application/json"}, b"[]"), self.cache.lookup("k", "/v1/nodes"))
+        self.assertIsNone(self.cache.lookup("other", "/v1/nodes"))
+
+        expired = ResponseCache(self.cache.directory, 0)
+        self.assertIsNone(expired.lookup("k", "/v1/nodes"))
+
+    def test_invalidate(self):
+        self.cache.store("n", "/v1/nodes", {}, b"[]")
+        self.cache.store("r", "/v1/view/resources", {}, b"[]")
+        self.cache.store("s", "/v1/view/storage-pools", {}, b"[]")
+        self.cache.invalidate("/v1/resource-definitions/r1/resources/node1")
+        self.assertIsNotNone(self.cache.lookup("n", "/v1/nodes"))
+        self.assertIsNone(self.cache.lookup("r", "/v1/view/resources"))
+        self.assertIsNone(self.cache.lookup("s", "/v1/view/storage-pools"))
+        self.assertTrue(self.cache.mutated)
+        self.cache.begin_command()
+        self.assertFalse(self.cache.mutated)
+
+        self.cache.invalidate("/v1/nodes/node1")
+        self.assertListEqual([], os.listdir(self.cache.directory))
+
+    def test_cached_linstor(self):
+        lapi = CachedLinstor("linstor://localhost", self.cache)
+        self.cache.store(lapi._key("/v1/controller/version"), "/v1/controller/version", {},
+                         b'{"version": "1.20.0", "rest_api_version": "1.19.0"}')
+        lapi.connect()  # served from the cache, nothing listens on localhost
+        self.assertFalse(lapi.api_version_smaller("1.19.0"))
+
+        base = "linstor.Linstor._rest_request_base"
+        nodes = b'[{"name": "node1", "type": "SATELLITE"}]'
+        with mock.patch(base, side_effect=lambda *args: _Response(nodes)) as request, \
+                mock.patch("linstor.Linstor.connect"):
+            self.assertEqual("node1", lapi.node_list_raise().nodes[0].name)
+            self.assertEqual("node1", lapi.node_list_raise().nodes[0].name)
+            self.assertEqual(1, request.call_count)
+
+            nodes = b'[]'
+            lapi.node_delete("node1")
+            self.assertEqual(2, request.call_count)
+            self.assertEqual([], os.listdir(self.cache.directory))
+            # after a mutation the command reads current data only
+            lapi.node_list_raise()
+            lapi.node_list_raise()
+            self.assertEqual(4, request.call_count)
+
+    def test_not_cacheable(self):
+        lapi = CachedLinstor("linstor://localhost", self.cache)
+        out_file = os.path.join(self.tmp_dir, "report.tgz")
+        base = "linstor.Linstor._rest_request_base"
+        with mock.patch(base) as request:
+            for _ in range(2):
+                request.return_value = _Response(b"tgz", {"content-disposition": "attachment; filename=report.tgz"})
+                replies = lapi._rest_request_download("sos", "GET", "/v1/sos-report/download", to_file=out_file)
+                self.assertTrue(replies[0].is_success())
+            self.assertEqual(2, request.call_count)
+        with open(out_file, "rb") as report:
+            self.assertEqual(b"tgz", report.read())
+        self.assertFalse(os.path.exists(self.cache.directory))
+
+    def test_session_cache(self):
+        cache = SessionCache(60)
+        cache.store("n", "/v1/nodes", {}, b"[]")
+        cache.store("r", "/v1/view/resources", {}, b"[]")
+        self.assertEqual(({}, b"[]"), cache.lookup("n", "/v1/nodes"))
+
+        cache.invalidate("/v1/resource-definitions/r1")
+        self.assertIsNone(cache.lookup("r", "/v1/view/resources"))
+        self.assertIsNotNone(cache.lookup("n", "/v1/nodes"))
+
+        cache.clear()
+        self.assertIsNone(cache.lookup("n", "/v1/nodes"))
+
+        cache = SessionCache(0.2)
+        cache.store("n", "/v1/nodes", {}, b"[]")
+        time.sleep(0.25)
+        self.assertIsNone(cache.lookup("n", "/v1/nodes"))
+        self.assertIsNotNone(cache.lookup("n", "/v1/nodes", stale=True))
+
+    def test_ttl(self):
+        cache = ResponseCache(self.cache.directory, 0.2)
+        cache.store("k", "/v1/nodes", {}, b"[]")
+        self.assertIsNotNone(cache.lookup("k", "/v1/nodes"))
+        time.sleep(0.25)
+        self.assertIsNone(cache.lookup("k", "/v1/nodes"))
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """
+    Serves the controller version and a node list, with ETags if the server's use_etags is set.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/v1/controller/version":
+            body = json.dumps({"version": "1.20.0", "rest_api_version": "1.19.0"}).encode()
+        elif self.path == "/v1/nodes":
+            body = json.dumps(self.server.nodes).encode()
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        etag = '"' + hashlib.sha256(body).hexdigest() + '"'
+        if self.server.use_etags and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.server.use_etags:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestRevalidation(unittest.TestCase):
+    def start_server(self, use_etags, ttl=0):
+        server = HTTPServer(("127.0.0.1", 0), _StandInHandler)
+        server.use_etags = use_etags
+        server.requests = []
+        server.nodes = [{"name": "node1", "type": "SATELLITE"}]
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        lapi = CachedLinstor("linstor://127.0.0.1:{p}".format(p=server.server_address[1]), SessionCache(ttl))
+        lapi.connect()
+        self.addCleanup(lapi.disconnect)
+        return server, lapi
+
+    def test_etag(self):
+        server, lapi = self.start_server(use_etags=True)
+        first = lapi.node_list_raise()
+        self.assertFalse(lapi.last_unchanged)
+        self.assertIs(first, lapi.node_list_raise())
+        self.assertTrue(lapi.last_unchanged)
+
+        node_requests = [x for x in server.requests if x[0] == "/v1/nodes"]
+        self.assertIsNone(node_requests[0][1])
+        self.assertIsNotNone(node_requests[1][1])  # revalidated, answered with 304
+
+        server.nodes.append({"name": "node2", "type": "SATELLITE"})
+        self.assertEqual(2, len(lapi.node_list_raise().nodes))
+        self.assertFalse(lapi.last_unchanged)
+
+    def test_content_hash(self):
+        server, lapi = self.start_server(use_etags=False)
+        first = lapi.node_list_raise()
+        self.assertIs(first, lapi.node_list_raise())
+        self.assertTrue(lapi.last_unchanged)
+        self.assertEqual(2, len([x for x in server.requests if x[0] == "/v1/nodes"]))
+
+        server.nodes = []
+        self.assertEqual([], lapi.node_list_raise().nodes)
+        self.assertFalse(lapi.last_unchanged)
+
+    def test_polling_command(self):
+        server, lapi = self.start_server(use_etags=True, ttl=60)
+        self.assertEqual(1, len(lapi.node_list_raise().nodes))
+        server.nodes = []
+        # changes of other clients are only seen after the ttl or by commands that poll
+        self.assertEqual(1, len(lapi.node_list_raise().nodes))
+        lapi.cache.begin_command(revalidate=True)
+        self.assertEqual([], lapi.node_list_raise().nodes)
+
+        server.nodes = [{"name": "node2", "type": "SATELLITE"}]
+        lapi.cache.begin_command()
+        self.assertEqual([], lapi.node_list_raise().nodes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,16 @@
+import argparse
+import io
 import unittest
+from contextlib import redirect_stdout
 from datetime import datetime, timedelta
 
+import linstor.responses
+import linstor.sharedconsts as apiconsts
 import linstor_client_main
-from linstor_client.commands import Commands
+from linstor_client.commands import ArgumentError, Commands, ControllerCommands, ResourceCommands, \
+    ResourceDefinitionCommands, ResourceGroupCommands, VolumeDefinitionCommands
+from linstor_client.commands.rsc_grp_cmds import SpawnRow
+from linstor_client.parallel import RateLimiter
 from linstor_client.utils import LinstorClientError
 
 
@@ -28,6 +36,242 @@ class TestClientCommands(unittest.TestCase):
         self.assertRaises(LinstorClientError, Commands.parse_time_str, "10m")
         self.assertRaises(LinstorClientError, Commands.parse_time_str, "")
 
+    @staticmethod
+    def _rsc(name, node_name, in_use=False, diskless=False):
+        return {
+            "name": name,
+            "node_name": node_name,
+            "flags": [apiconsts.FLAG_DISKLESS] if diskless else [],
+            "state": {"in_use": in_use},
+            "volumes": []
+        }
+
+    def test_filter_involved_resources(self):
+        rsc_resp = linstor.responses.ResourceResponse([
+            self._rsc("rsc1", "node1", in_use=True),
+            self._rsc("rsc1", "node2"),
+            self._rsc("rsc2", "node2"),
+            self._rsc("rsc2", "node3", in_use=True, diskless=True),
+            self._rsc("rsc3", "node3"),
+            self._rsc("rsc3", "node4")
+        ])
+
+        def involved(on_nodes, **kwargs):
+            filtered = ResourceCommands._filter_involved_resources(rsc_resp, on_nodes, **kwargs)
+            return [(x.name, x.node_name) for x in filtered.resources]
+
+        self.assertListEqual([("rsc1", "node1"), ("rsc1", "node2")], involved(["node1"]))
+        self.assertListEqual(
+            [("rsc1", "node1"), ("rsc1", "node2"), ("rsc3", "node3"), ("rsc3", "node4")],
+            involved(["node1", "node4"])
+        )
+        self.assertListEqual([("rsc2", "node2"), ("rsc2", "node3")], involved(["node3"], only_inuse=True))
+        self.assertListEqual(
+            [("rsc2", "node2"), ("rsc2", "node3")], involved(["node2"], only_diskless_inuse=True))
+        self.assertListEqual([("rsc2", "node2"), ("rsc2", "node3")], involved(["node2"], min_replicas=2))
+        self.assertEqual(6, len(rsc_resp.resources))
+
+    class _PropsLinstor(object):
+        def __init__(self, rest_api_version):
+            self.rest_api_version = rest_api_version
+            self.requests = []
+
+        def api_version_smaller(self, version):
+            return tuple(map(int, self.rest_api_version.split('.'))) < tuple(map(int, version.split('.')))
+
+        def _rest_request(self, apicall, method, path, body=None):
+            self.requests.append((method, path, body))
+            return []
+
+        def controller_set_prop(self, key, value):
+            return self._rest_request(apiconsts.API_SET_CTRL_PROP, "POST", "/v1/controller/properties",
+                                      {"override_props": {key: value}})
+
+        def controller_del_prop(self, key):
+            return self._rest_request(apiconsts.API_SET_CTRL_PROP, "POST", "/v1/controller/properties",
+                                      {"delete_props": [key]})
+
+    def _modify_ctrl_props(self, rest_api_version, mod_props, del_props):
+        lapi = self._PropsLinstor(rest_api_version)
+        cmds = ControllerCommands()
+        cmds._linstor = lapi
+        cmds._modify_props(argparse.Namespace(parallel=None), mod_props, del_props)
+        return lapi.requests
+
+    def test_controller_modify_props(self):
+        self.assertListEqual(
+            [("POST", "/v1/controller/properties", {"override_props": {"A": "1", "B": "2"}, "delete_props": ["C"]})],
+            self._modify_ctrl_props("1.26.0", {"A": "1", "B": "2"}, ["C"])
+        )
+        self.assertListEqual([], self._modify_ctrl_props("1.26.0", {}, []))
+        self.assertListEqual(
+            [
+                ("POST", "/v1/controller/properties", {"override_props": {"A": "1"}}),
+                ("POST", "/v1/controller/properties", {"delete_props": ["C"]})
+            ],
+            self._modify_ctrl_props("1.0.4", {"A": "1"}, ["C"])
+        )
+
+    def test_filter_by_name_regex(self):
+        names = ["rsc1", "rsc2", "RSC10", "other"]
+        self.assertListEqual(names, Commands.filter_by_name_regex(names, None))
+        self.assertListEqual(["rsc1", "rsc2"], Commands.filter_by_name_regex(names, "rsc[0-9]"))
+        self.assertListEqual(["rsc1", "rsc2", "RSC10"], Commands.filter_by_name_regex(names, "rsc.*"))
+        self.assertRaises(ArgumentError, Commands.filter_by_name_regex, names, "rsc[")
+
+    def test_bulk_modify(self):
+        def reply(ret_code, message):
+            return linstor.responses.ApiCallResponse({"ret_code": ret_code, "message": message})
+
+        replies = {
+            "rsc1": [reply(apiconsts.MASK_SUCCESS, "rsc1 modified")],
+            "rsc2": [reply(apiconsts.MASK_ERROR, "satellite offline")],
+            "rsc3": [reply(apiconsts.MASK_ERROR, "satellite offline")]
+        }
+        args = argparse.Namespace(machine_readable=False, parallel=None, no_color=True, warn_as_error=False)
+        cmds = Commands()
+        cmds._linstor = object()
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            rc = cmds.bulk_modify(args, sorted(replies), lambda lapi, name: replies[name], "resource definitions")
+
+        self.assertNotEqual(0, rc)
+        self.assertNotIn("rsc1 modified", out.getvalue())
+        self.assertEqual(1, out.getvalue().count("satellite offline"))
+        self.assertIn("Reported 2 times by:", out.getvalue())
+        self.assertIn("Modified 1 of 3 resource definitions.", out.getvalue())
+
+    class _RscGrpLinstor(object):
+        def __init__(self):
+            self.vlm_grp_queries = []
+
+        def resource_group_list_raise(self, filter_by_resource_groups=None, filter_by_props=None):
+            return linstor.responses.ResourceGroupResponse([
+                {"name": "rg1", "select_filter": {"place_count": 2}},
+                {"name": "rg2", "select_filter": {"place_count": 3}}
+            ])
+
+        def volume_group_list_raise(self, resource_grp_name):
+            self.vlm_grp_queries.append(resource_grp_name)
+            numbers = {"rg1": [0, 1], "rg2": []}[resource_grp_name]
+            return linstor.responses.VolumeGroupResponse([{"volume_number": x} for x in numbers])
+
+    def _list_rsc_grps(self, no_volume_groups):
+        lapi = self._RscGrpLinstor()
+        cmds = ResourceGroupCommands()
+        cmds._linstor = lapi
+        args = argparse.Namespace(
+            disable_config=True, from_file=None, resource_groups=[], props=None, no_volume_groups=no_volume_groups,
+            machine_readable=False, curl=False, no_utf8=True, no_color=True, pastable=True, show_props=[],
+            groupby=None, warn_as_error=False)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.assertEqual(0, cmds.list(args))
+        rows = [[x.strip() for x in line.strip("|").split("|")] for line in out.getvalue().splitlines()]
+        return lapi.vlm_grp_queries, {row[0]: row[2] for row in rows if row[0].startswith("rg")}
+
+    def test_list_rsc_grps_volume_groups(self):
+        queries, vlm_nrs = self._list_rsc_grps(False)
+        self.assertListEqual(["rg1", "rg2"], queries)
+        self.assertDictEqual({"rg1": "0,1", "rg2": ""}, vlm_nrs)
+
+        queries, vlm_nrs = self._list_rsc_grps(True)
+        self.assertListEqual([], queries)
+        self.assertDictEqual({"rg1": "", "rg2": ""}, vlm_nrs)
+
+    def test_clone_targets(self):
+        def targets(source=None, clone_names=None, pairs=None, count=None, template=None, external_name=None):
+            return ResourceDefinitionCommands._clone_targets(argparse.Namespace(
+                source_resource=source, clone_name=clone_names or [], pairs=pairs, count=count,
+                name_template=template, external_name=external_name))
+
+        self.assertEqual([("golden", None)], targets("golden", external_name="Golden Clone"))
+        self.assertEqual([("golden", "c1"), ("golden", "c2")], targets("golden", ["c1", "c2"]))
+        self.assertEqual(
+            [("rsc1", "a"), ("golden", "vdi-01"), ("golden", "vdi-02")],
+            targets("golden", pairs=["rsc1:a"], count=2, template="vdi-{n:02d}")
+        )
+        self.assertRaises(ArgumentError, targets)
+        self.assertRaises(ArgumentError, targets, pairs=["rsc1"])
+        self.assertRaises(ArgumentError, targets, "golden", count=2, template="vdi")
+        self.assertRaises(ArgumentError, targets, "golden", count=2, template="vdi-{x}")
+        self.assertRaises(ArgumentError, targets, count=2, template="vdi-{n}")
+        self.assertRaises(ArgumentError, targets, "golden", ["c1", "c2"], external_name="x")
+
+    def test_read_spawn_manifest(self):
+        rows = ResourceGroupCommands.read_spawn_manifest(io.StringIO(
+            "Name,sizes,props\n"
+            "pvc-1,1G 2G,Aux/team=a Aux/tier=gold\n"
+            "pvc-2,,\n"
+        ))
+        self.assertEqual(["pvc-1", "pvc-2"], [x.name for x in rows])
+        self.assertEqual((["1G", "2G"], {"Aux/team": "a", "Aux/tier": "gold"}), (rows[0].sizes, rows[0].props))
+        self.assertEqual(([], {}), (rows[1].sizes, rows[1].props))
+
+        for manifest in ["sizes\n1G\n", "name,size\npvc-1,1G\n", "name\npvc-1\nPVC-1\n", "name\n\"\"\n",
+                         "name,props\npvc-1,Aux/team\n"]:
+            self.assertRaises(LinstorClientError, ResourceGroupCommands.read_spawn_manifest, io.StringIO(manifest))
+
+    def test_spawn_retries(self):
+        class Lapi(object):
+            def __init__(self):
+                self.calls = []
+
+            def resource_group_spawn(self, rsc_grp_name, rsc_dfn_name, **kwargs):
+                self.calls.append("spawn " + rsc_dfn_name)
+                if len(self.calls) == 1:
+                    raise linstor.LinstorTimeoutError("timed out")
+                return [linstor.responses.ApiCallResponse(
+                    {"ret_code": apiconsts.FAIL_EXISTS_RSC_DFN, "message": "exists"})]
+
+            def resource_dfn_modify(self, name, props, delete_props):
+                self.calls.append("modify " + name)
+                raise linstor.LinstorNetworkError("connection refused")
+
+        cmds = ResourceGroupCommands()
+        cmds.SPAWN_RETRY_DELAY = 0
+        args = argparse.Namespace(
+            resource_group_name="rg", retries=1, partial=False, definition_only=False, external_name=None,
+            place_count=None, storage_pool=None, do_not_place_with=None, do_not_place_with_regex=None,
+            replicas_on_same=None, replicas_on_different=None, diskless_on_remaining=None, layer_list=None,
+            providers=None, diskless_storage_pool=None, x_replicas_on_different=None, peer_slots=None,
+            volume_passphrase=None)
+        lapi = Lapi()
+        replies, attempts = cmds._spawn_row(lapi, args, RateLimiter(None), SpawnRow("pvc-1", [], {"a": "b"}), [])
+        self.assertEqual(["spawn pvc-1", "spawn pvc-1", "modify pvc-1", "modify pvc-1"], lapi.calls)
+        self.assertEqual(3, attempts)
+        self.assertEqual(["connection refused"], [x.message for x in replies if x.is_error()])
+
+    def test_parse_size_expr(self):
+        self.assertEqual(20 * 1024 * 1024, VolumeDefinitionCommands.parse_size_expr("20GiB")(1024))
+        self.assertEqual(20 * 1024 * 1024, VolumeDefinitionCommands.parse_size_expr("20")(1024))
+        self.assertEqual(1024 + 5 * 1024 * 1024, VolumeDefinitionCommands.parse_size_expr("+5GiB")(1024))
+        self.assertEqual(1100, VolumeDefinitionCommands.parse_size_expr("+10%")(1000))
+        self.assertEqual(1004, VolumeDefinitionCommands.parse_size_expr("+0.25%")(1001))
+        self.assertEqual(1024 + 10 * 1024 * 1024, VolumeDefinitionCommands.parse_size_expr("+10")(1024))
+        for size_expr in ["", "+", "-5GiB", "5XiB", "10%", "+10%%"]:
+            self.assertRaises(ArgumentError, VolumeDefinitionCommands.parse_size_expr, size_expr)
+
+    def test_space_shortfalls(self):
+        def pool(node, name, provisioning, free):
+            return linstor.responses.StoragePool({
+                "storage_pool_name": name, "node_name": node, "provider_kind": "LVM", "free_capacity": free,
+                "total_capacity": 2 * free, "static_traits": {"Provisioning": provisioning}})
+
+        def resource(name, node, storage_pool):
+            return linstor.responses.Resource({"name": name, "node_name": node, "volumes": [
+                {"volume_number": 0, "storage_pool_name": storage_pool}]})
+
+        pools = [pool("n1", "thick", "Fat", 300), pool("n2", "thick", "Fat", 100), pool("n1", "thin", "Thin", 0)]
+        resources = [resource("rsc1", "n1", "thick"), resource("rsc1", "n2", "thick"), resource("RSC2", "n1", "thick"),
+                     resource("rsc2", "n2", "thin"), resource("rsc3", "n2", "thick")]
+        targets = [("rsc1", 0, 1000, 1100), ("rsc2", 0, 1000, 1200), ("rsc3", 0, 1000, 500)]
+        self.assertEqual([], VolumeDefinitionCommands.space_shortfalls(targets, resources, pools))
+        targets[0] = ("rsc1", 0, 1000, 1150)
+        self.assertEqual([("n1", "thick", 350, 300), ("n2", "thick", 150, 100)],
+                         VolumeDefinitionCommands.space_shortfalls(targets, resources, pools))
+
 
 if __name__ == '__main__':
     unittest.main()
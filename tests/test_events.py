@@ -0,0 +1,147 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stderr
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import linstor_client_main
+from linstor_client.commands import EventsCommands
+from linstor_client.events import event_matches, event_record, parse_sse
+
+
+def _event(event_id, rsc, node, may_promote, retry=None):
+    data = {"resource_name": rsc, "node_name": node, "may_promote": may_promote}
+    lines = ["id: " + event_id, "event: drbd-promotion", "data: " + json.dumps(data)]
+    if retry is not None:
+        lines.insert(1, "retry: {r}".format(r=retry))
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+STREAM = b"".join([
+    b": keep alive\n\n",
+    _event("1", "rsc1", "n1", True),
+    _event("2", "rsc2", "n1", True),
+    _event("3", "rsc1", "n2", False, retry=10)
+])
+
+RECONNECT_STREAM = _event("4", "rsc1", "n1", False)
+
+
+class _SseStandIn(BaseHTTPRequestHandler):
+    """
+    Serves the controller version and a promotion event stream that is closed after a few events, a reconnect
+    with Last-Event-ID gets the following event.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("Last-Event-ID")))
+        if self.path == "/v1/controller/version":
+            body = json.dumps({"version": "1.20.0", "rest_api_version": "1.19.0"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path != "/v1/events/drbd/promotion":
+            body = json.dumps([{"ret_code": -4611686018427387904, "message": "no such stream"}]).encode()
+            self.send_response(404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(RECONNECT_STREAM if self.headers.get("Last-Event-ID") else self.server.stream)
+        self.wfile.flush()
+        if self.server.quiet:
+            # keeps the stream open without sending anything
+            time.sleep(self.server.quiet)
+        self.close_connection = True
+
+
+class TestEvents(unittest.TestCase):
+    def test_parse_sse(self):
+        lines = io.BytesIO(b": comment\ndata: first\ndata: second\n\nevent: x\r\nid: 7\r\ndata:{}\r\n\r\nid: 8\n\n")
+        events = list(parse_sse(lines))
+        self.assertEqual(2, len(events))
+        self.assertEqual(("message", "first\nsecond", None, None), tuple(events[0]))
+        self.assertEqual(("x", "{}", "7", None), tuple(events[1]))
+
+    def test_event_matches(self):
+        record = event_record("drbd-promotion", next(parse_sse(STREAM.splitlines(True)[2:])))
+        self.assertEqual("rsc1", record["data"]["resource_name"])
+        self.assertTrue(event_matches(record))
+        self.assertTrue(event_matches(record, resources=["RSC1"], nodes=["n1"]))
+        self.assertFalse(event_matches(record, resources=["rsc2"]))
+        self.assertFalse(event_matches(record, nodes=["n2"]))
+
+        node_record = {"stream": "nodes", "data": {"node": {"name": "n2"}}}
+        self.assertTrue(event_matches(node_record, nodes=["n2"]))
+        self.assertFalse(event_matches(node_record, resources=["rsc1"]))
+
+    def _start_server(self, stream=STREAM, quiet=0):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _SseStandIn)
+        server.requests = []
+        server.stream = stream
+        server.quiet = quiet
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def _events(self, server, *args):
+        fd, output = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, output)
+        rc = linstor_client_main.LinStorCLI().parse_and_execute([
+            "--disable-config", "--controllers", "linstor://127.0.0.1:{p}".format(p=server.server_address[1]),
+            "events", "-s", "drbd-promotion", "--output", output
+        ] + list(args))
+        self.assertEqual(0, rc)
+
+        with open(output) as events_file:
+            return [json.loads(line) for line in events_file]
+
+    def test_subscribe(self):
+        server = self._start_server()
+        records = self._events(server, "-r", "rsc1", "--count", "3")
+        self.assertEqual(["1", "3", "4"], [x["id"] for x in records])
+        self.assertEqual({"drbd-promotion"}, {x["stream"] for x in records})
+        self.assertFalse(records[1]["data"]["may_promote"])
+
+        streams = [x for x in server.requests if x[0] == "/v1/events/drbd/promotion"]
+        self.assertEqual([None, "3"], [x[1] for x in streams[:2]])
+
+    def test_quiet_stream(self):
+        server = self._start_server(stream=_event("1", "rsc1", "n1", True), quiet=5)
+        timeout = EventsCommands.STREAM_READ_TIMEOUT
+        EventsCommands.STREAM_READ_TIMEOUT = 0.2
+        self.addCleanup(setattr, EventsCommands, "STREAM_READ_TIMEOUT", timeout)
+
+        err = io.StringIO()
+        start = time.time()
+        with redirect_stderr(err):
+            records = self._events(server, "--count", "2")
+        self.assertEqual(["1", "4"], [x["id"] for x in records])
+        self.assertLess(time.time() - start, 2)
+        self.assertEqual("", err.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
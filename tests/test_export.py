@@ -0,0 +1,90 @@
+import contextlib
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from linstor_client.commands import Commands
+from linstor_client.export import JsonStream, load_export, open_input, write_export, write_export_file
+from linstor_client.utils import LinstorClientError
+
+
+class TestExport(unittest.TestCase):
+    SECTIONS = [("nodes", [{"name": "node1"}]), ("controller_props", {"a": "b"})]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_write_export(self):
+        out = io.StringIO()
+        write_export(out, {"created": "now"}, self.SECTIONS)
+        data = json.loads(out.getvalue())
+        self.assertEqual("now", data["created"])
+        self.assertListEqual(["nodes", "controller_props"], data["sections"])
+        self.assertDictEqual({"nodes": [{"name": "node1"}], "controller_props": {"a": "b"}}, data["data"])
+
+    def test_compressed_roundtrip(self):
+        for name in ["export.json", "export.json.gz", "export.json.bz2", "export.json.xz"]:
+            path = os.path.join(self.tmp_dir, name)
+            write_export_file(path, {}, self.SECTIONS)
+            self.assertListEqual([name], [x for x in os.listdir(self.tmp_dir) if x == name])
+            self.assertEqual({"a": "b"}, load_export(path)["data"]["controller_props"])
+        self.assertListEqual([], [x for x in os.listdir(self.tmp_dir) if x.endswith(".tmp")])
+
+    def test_load_invalid(self):
+        path = os.path.join(self.tmp_dir, "nodes.json")
+        with open(path, "w") as f:
+            json.dump([{"name": "node1"}], f)
+        self.assertRaises(LinstorClientError, load_export, path)
+        self.assertRaises(LinstorClientError, load_export, os.path.join(self.tmp_dir, "missing.json"))
+
+    def test_load_from_file(self):
+        out = io.StringIO()
+        write_export(out, {}, self.SECTIONS)
+        self.assertListEqual([{"name": "node1"}], Commands.load_from_file(io.StringIO(out.getvalue()), "nodes"))
+        self.assertRaises(LinstorClientError, Commands.load_from_file, io.StringIO(out.getvalue()), "resources")
+        self.assertListEqual([{"name": "node1"}], Commands.load_from_file(io.StringIO('[{"name": "node1"}]'), "nodes"))
+
+        self.assertRaises(LinstorClientError, Commands.load_from_file, io.StringIO('[{"name": "node1"}'), "nodes")
+
+    def test_json_stream(self):
+        data = [{"name": "node{i}".format(i=i), "nr": 12345 * i, "list": [1.5, None, True, "x" * i]} for i in range(20)]
+        text = json.dumps(data, indent=2)
+        for chunk_size in [1, 3, 64]:
+            self.assertListEqual(data, list(JsonStream(io.StringIO(text), chunk_size)))
+        self.assertListEqual([1234567], list(JsonStream(io.StringIO("[1234567]"), 2)))
+        # numbers split right after "." or "e"
+        self.assertListEqual([1.25, 3e+5, True], list(JsonStream(io.StringIO("[1.25,3e+5,true]"), 2)))
+        self.assertListEqual([1.5], list(JsonStream(io.StringIO("[1.5]"), 2)))
+        self.assertListEqual([12.5, -1E3], list(JsonStream(io.StringIO("[12.5, -1E3]"), 3)))
+        self.assertListEqual([], list(JsonStream(io.StringIO(" [ ] \n"), 1)))
+        self.assertDictEqual({"a": [1]}, JsonStream(io.StringIO('{"a": [1]}'), 2).load())
+
+        for invalid in ['[1 2]', '[1,]', '[1] 2', '{"a": 1}']:
+            with self.assertRaises(ValueError):
+                list(JsonStream(io.StringIO(invalid), 2))
+
+    def test_open_input(self):
+        path = os.path.join(self.tmp_dir, "nodes")
+        with gzip.open(path, "wt") as f:
+            json.dump([{"name": "node1"}], f)
+        with open_input(path) as stream:
+            self.assertListEqual([{"name": "node1"}], JsonStream(stream).load())
+
+    def test_machine_readable_items(self):
+        data = [{"name": "node1", "props": {"a": "b"}}, {"name": "node2"}]
+        for items in [data, []]:
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                Commands._print_machine_readable_items(iter(items))
+            self.assertEqual(Commands._to_json([items]) + "\n", out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
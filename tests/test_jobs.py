@@ -0,0 +1,143 @@
+import argparse
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import linstor
+
+from linstor_client.commands import Commands
+from linstor_client.jobs import KEEP_FINISHED_SECONDS, KIND_NODE_DELETE, KIND_RSC_CREATE, KIND_RSC_DELETE, \
+    KIND_RSC_DFN_DELETE, KIND_SNAPSHOT_CREATE, KIND_VLM_DFN_DELETE, LIST_NODES, LIST_RESOURCES, LIST_RSC_DFNS, \
+    LIST_SNAPSHOTS, STATE_DONE, STATE_FAILED, STATE_PENDING, Job, Journal, check_job, journal_path, list_filters, \
+    update_jobs
+
+
+def _resource(name, node, device_path="/dev/drbd1000", reports=None):
+    return {
+        "name": name, "node_name": node, "flags": [], "props": {},
+        "volumes": [{"volume_number": 0, "device_path": device_path, "reports": reports or []}]
+    }
+
+
+def _lists(resources=(), rsc_dfns=(), snapshots=(), nodes=()):
+    return {
+        LIST_RESOURCES: linstor.responses.ResourceResponse(list(resources)).resources,
+        LIST_RSC_DFNS: linstor.responses.ResourceDefinitionResponse(list(rsc_dfns)).resource_definitions,
+        LIST_SNAPSHOTS: linstor.responses.SnapshotResponse(list(snapshots)).snapshots,
+        LIST_NODES: linstor.responses.NodeListResponse(list(nodes)).nodes
+    }
+
+
+class TestJobs(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_list_filters(self):
+        jobs = [
+            Job(KIND_RSC_CREATE, resource="rsc2", node="n1"),
+            Job(KIND_RSC_DELETE, resource="rsc1", node="n2"),
+            Job(KIND_RSC_CREATE, resource="rsc1", node="n1"),
+            Job(KIND_NODE_DELETE, node="n3"),
+            Job(KIND_VLM_DFN_DELETE, resource="rsc3", volume=0)
+        ]
+        self.assertEqual(
+            {LIST_RESOURCES: ["rsc1", "rsc2"], LIST_NODES: ["n3"], LIST_RSC_DFNS: ["rsc3"]},
+            list_filters(jobs))
+
+    def test_resource_jobs(self):
+        create = Job(KIND_RSC_CREATE, resource="rsc1", node="n1")
+        auto_place = Job(KIND_RSC_CREATE, resource="rsc1")
+        delete = Job(KIND_RSC_DELETE, resource="rsc1", node="N2")
+
+        lists = _lists([_resource("rsc1", "n1", device_path=None), _resource("rsc1", "n2")])
+        self.assertEqual((STATE_PENDING, None), check_job(create, lists))
+        self.assertEqual((STATE_PENDING, None), check_job(auto_place, lists))
+        self.assertEqual((STATE_PENDING, None), check_job(delete, lists))
+
+        lists = _lists([_resource("rsc1", "n1")])
+        self.assertEqual((STATE_DONE, None), check_job(create, lists))
+        self.assertEqual((STATE_DONE, None), check_job(auto_place, lists))
+        self.assertEqual((STATE_DONE, None), check_job(delete, lists))
+
+        error = {"ret_code": linstor.consts.MASK_ERROR | 1, "message": "lvcreate failed"}
+        lists = _lists([_resource("rsc1", "n1", device_path=None, reports=[error])])
+        self.assertEqual((STATE_FAILED, "lvcreate failed"), check_job(create, lists))
+        self.assertEqual(STATE_FAILED, check_job(Job(KIND_RSC_CREATE, resource="rsc9"), lists)[0])
+
+    def test_definition_and_snapshot_jobs(self):
+        rd_delete = Job(KIND_RSC_DFN_DELETE, resource="rsc1")
+        vd_delete = Job(KIND_VLM_DFN_DELETE, resource="rsc1", volume=1)
+        snapshot = Job(KIND_SNAPSHOT_CREATE, resource="rsc1", snapshot="snap1")
+
+        lists = _lists(
+            rsc_dfns=[{"name": "rsc1", "volume_definitions": [{"volume_number": 0}, {"volume_number": 1}]}],
+            snapshots=[{"name": "snap1", "resource_name": "rsc1", "flags": []}])
+        self.assertEqual(STATE_PENDING, check_job(rd_delete, lists)[0])
+        self.assertEqual(STATE_PENDING, check_job(vd_delete, lists)[0])
+        self.assertEqual(STATE_PENDING, check_job(snapshot, lists)[0])
+
+        lists = _lists(
+            rsc_dfns=[{"name": "rsc1", "volume_definitions": [{"volume_number": 0}]}],
+            snapshots=[{"name": "snap1", "resource_name": "rsc1", "flags": ["SUCCESSFUL"]}])
+        self.assertEqual(STATE_PENDING, check_job(rd_delete, lists)[0])
+        self.assertEqual(STATE_DONE, check_job(vd_delete, lists)[0])
+        self.assertEqual(STATE_DONE, check_job(snapshot, lists)[0])
+
+        lists = _lists(snapshots=[{"name": "snap1", "resource_name": "rsc1", "flags": ["FAILED_DEPLOYMENT"]}])
+        self.assertEqual(STATE_DONE, check_job(rd_delete, lists)[0])
+        self.assertEqual(STATE_FAILED, check_job(snapshot, lists)[0])
+
+    def test_update_jobs(self):
+        jobs = [Job(KIND_NODE_DELETE, node="n1"), Job(KIND_NODE_DELETE, node="n2")]
+        finished = update_jobs(jobs, _lists(nodes=[{"name": "n2", "type": "SATELLITE"}]), now=50.0)
+        self.assertEqual([jobs[0]], finished)
+        self.assertEqual(STATE_DONE, jobs[0].state)
+        self.assertEqual(50.0, jobs[0].finished)
+        self.assertTrue(jobs[1].pending)
+        self.assertEqual([], update_jobs(jobs[:1], _lists()))
+
+    def test_journal(self):
+        journal = Journal(os.path.join(self.tmp_dir, "ctrl", "jobs.json"))
+        self.assertEqual([], journal.load())
+
+        old = Job(KIND_RSC_DFN_DELETE, resource="rsc1", submitted=10.0)
+        old.finish(STATE_DONE, now=20.0)
+        pending = Job(KIND_RSC_CREATE, resource="rsc2", node="n1")
+        journal.add([old, pending])
+        snapshot = Job(KIND_SNAPSHOT_CREATE, resource="rsc3", snapshot="s1")
+        journal.add([snapshot])
+        loaded = journal.load()
+        self.assertEqual([old.id, pending.id], [x.id for x in loaded[:2]])
+        self.assertEqual(("rsc2", "n1", STATE_PENDING), (loaded[1].resource, loaded[1].node, loaded[1].state))
+        self.assertEqual("rsc3:s1", loaded[2].object_name)
+
+        loaded[1].finish(STATE_FAILED, "resource not found")
+        journal.update([loaded[1]], now=20.0 + KEEP_FINISHED_SECONDS)
+        loaded = journal.load()
+        self.assertEqual([pending.id, snapshot.id], [x.id for x in loaded])
+        self.assertEqual((STATE_FAILED, "resource not found"), (loaded[0].state, loaded[0].message))
+
+    def test_record_jobs(self):
+        class Lapi(object):
+            def controller_host(self):
+                return "linstor://ctrl1"
+
+        def reply(ret_code):
+            return [linstor.ApiCallResponse({"ret_code": ret_code, "message": "m"})]
+
+        cmds = Commands()
+        cmds._linstor = Lapi()
+        accepted = [Job(KIND_RSC_DFN_DELETE, resource="a"), Job(KIND_RSC_DFN_DELETE, resource="c")]
+        with mock.patch.dict(os.environ, {"XDG_STATE_HOME": self.tmp_dir}):
+            cmds.record_jobs(argparse.Namespace(curl=False), [
+                (accepted[0], reply(0)),
+                (Job(KIND_RSC_DFN_DELETE, resource="b"), reply(linstor.consts.MASK_ERROR)),
+                (accepted[1], reply(0))
+            ])
+            path = journal_path("linstor://ctrl1")
+        self.assertEqual([x.id for x in accepted], [x.id for x in Journal(path).load()])
@@ -0,0 +1,104 @@
+import contextlib
+import io
+import unittest
+
+import linstor
+import linstor_client_main
+
+from linstor_client.export import EXPORT_FORMAT
+from linstor_client.offline import OfflineLinstor
+from linstor_client.utils import LinstorClientError
+
+
+def _storage_pool(name, node, kind, free, props=None):
+    return {
+        "storage_pool_name": name, "node_name": node, "provider_kind": kind, "free_capacity": free,
+        "total_capacity": free * 2, "props": props or {}
+    }
+
+
+EXPORT = {
+    "format": EXPORT_FORMAT,
+    "version": 1,
+    "data": {
+        "controller_version": {"version": "1.20.0", "git_hash": "abc", "build_time": "", "rest_api_version": "1.19.0"},
+        "controller_props": {"MaxOversubscriptionRatio": "2"},
+        "nodes": [
+            {"name": "alpha", "type": "SATELLITE", "props": {"Aux/site": "a"}},
+            {"name": "beta", "type": "SATELLITE", "props": {"Aux/site": "b"}}
+        ],
+        "storage_pool_definitions": [{"storage_pool_name": "thin", "props": {"MaxOversubscriptionRatio": "3"}}],
+        "storage_pools": [
+            _storage_pool("thick", "alpha", "LVM", 100),
+            _storage_pool("thick", "beta", "LVM", 50),
+            _storage_pool("thin", "alpha", "LVM_THIN", 10),
+            _storage_pool("thin", "beta", "LVM_THIN", 20, {"MaxOversubscriptionRatio": "4"}),
+            _storage_pool("DfltDisklessStorPool", "beta", "DISKLESS", 0)
+        ],
+        "resource_groups": [{"name": "rg1", "select_filter": {"place_count": 1, "storage_pool": "thick"}}],
+        "volume_groups": {"rg1": [{"volume_number": 0}]},
+        "resource_definitions": [{"name": "rsc1", "volume_definitions": [{"volume_number": 0}]}],
+        "resources": [
+            {"name": "rsc1", "node_name": "alpha", "volumes": [{"storage_pool_name": "thick"}]},
+            {"name": "rsc1", "node_name": "beta", "volumes": [{"storage_pool_name": "thin"}]}
+        ]
+    }
+}
+
+
+class TestOffline(unittest.TestCase):
+    def setUp(self):
+        self.lapi = OfflineLinstor(EXPORT, "test.json")
+        self.lapi.connect()
+
+    def test_filters(self):
+        self.assertListEqual(["alpha", "beta"], [x.name for x in self.lapi.node_list_raise().nodes])
+        self.assertListEqual(["beta"], [x.name for x in self.lapi.node_list_raise(filter_by_nodes=["BETA"]).nodes])
+        self.assertListEqual(
+            ["alpha"], [x.name for x in self.lapi.node_list_raise(filter_by_props=["Aux/site=a"]).nodes])
+
+        storage_pools = self.lapi.storage_pool_list_raise(filter_by_nodes=["beta"], filter_by_stor_pools=["thin"])
+        self.assertListEqual([("thin", "beta")], [(x.name, x.node_name) for x in storage_pools.storage_pools])
+
+        resources = self.lapi.volume_list_raise(filter_by_stor_pools=["thin"]).resources
+        self.assertListEqual(["beta"], [x.node_name for x in resources])
+        resources = self.lapi.resource_list_raise(filter_by_nodes=["alpha"], filter_by_resources=["RSC1"]).resources
+        self.assertListEqual(["alpha"], [x.node_name for x in resources])
+
+    def test_pooled_connection(self):
+        cli = linstor_client_main.LinStorCLI()
+        cli._linstorapi = self.lapi
+        pooled = cli._offline_linstorapi_factory()()
+        self.assertEqual("offline://test.json", pooled.controller_host())
+
+    def test_routing(self):
+        self.assertFalse(self.lapi.api_version_smaller("1.19.0"))
+        self.assertListEqual([0], [x.number for x in self.lapi.volume_group_list_raise("rg1").volume_groups])
+        rsc_dfn = self.lapi.resource_dfn_list_raise(query_volume_definitions=False).resource_definitions[0]
+        self.assertListEqual([], rsc_dfn.volume_definitions)
+        rsc_dfn = self.lapi.resource_dfn_list_raise().resource_definitions[0]
+        self.assertEqual(1, len(rsc_dfn.volume_definitions))
+
+        # not part of the snapshot
+        with self.assertRaises(linstor.LinstorApiCallError):
+            self.lapi.snapshot_dfn_list_raise()
+
+    def test_refuse_modifications(self):
+        with self.assertRaises(LinstorClientError):
+            self.lapi.node_create("gamma", "SATELLITE", "10.0.0.3")
+
+    def test_query_max_volume_size(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            candidates = self.lapi.storage_pool_dfn_max_vlm_sizes(2)[0].candidates
+        self.assertDictEqual(
+            {"thick": (50, False), "thin": (30, True)},
+            {x.storage_pool: (x.max_volume_size, x.all_thin) for x in candidates}
+        )
+
+        with contextlib.redirect_stderr(io.StringIO()):
+            candidates = self.lapi.resource_group_qmvs("rg1")[0].candidates
+        self.assertListEqual([("thick", 100)], [(x.storage_pool, x.max_volume_size) for x in candidates])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import threading
+import time
+import unittest
+
+from linstor_client.parallel import ConnectionPool, RateLimiter
+
+
+class FakeLinstor(object):
+    def __init__(self, name):
+        self.name = name
+        self.curl = False
+        self.disconnected = False
+        self.in_use = threading.Lock()
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+
+    def factory(self):
+        lapi = FakeLinstor("clone" + str(len(self.created)))
+        self.created.append(lapi)
+        return lapi
+
+    @staticmethod
+    def exclusive_call(result):
+        def call(lapi):
+            # a connection must never be used by two threads at the same time
+            if not lapi.in_use.acquire(False):
+                raise AssertionError("connection used concurrently")
+            try:
+                time.sleep(0.01)
+                return result
+            finally:
+                lapi.in_use.release()
+        return call
+
+    def test_results_in_call_order(self):
+        pool = ConnectionPool(FakeLinstor("primary"), self.factory, size=4)
+        results = pool.run([self.exclusive_call(i) for i in range(20)])
+        self.assertListEqual(list(range(20)), results)
+        self.assertLessEqual(len(self.created), 3)
+
+    def test_max_workers(self):
+        pool = ConnectionPool(FakeLinstor("primary"), self.factory, size=4)
+        pool.run([self.exclusive_call(i) for i in range(10)], max_workers=2)
+        self.assertLessEqual(len(self.created), 1)
+
+        pool.run([self.exclusive_call(i) for i in range(20)], max_workers=12)
+        self.assertGreater(len(self.created), 3)
+        self.assertLessEqual(len(self.created), 11)
+        # connections beyond the pool size are closed after the run
+        self.assertLessEqual(len([x for x in self.created if not x.disconnected]), 3)
+
+    def test_connection_limit(self):
+        pool = ConnectionPool(FakeLinstor("primary"), self.factory, size=4)
+        results = []
+        # more threads than allowed connections, the surplus threads wait for an idle connection
+        threads = [
+            threading.Thread(target=lambda i=i: results.append(pool._call(self.exclusive_call(i), 3)))
+            for i in range(9)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertListEqual(list(range(9)), sorted(results))
+        self.assertEqual(2, len(self.created))
+
+    def test_serial_in_curl_mode(self):
+        primary = FakeLinstor("primary")
+        primary.curl = True
+        pool = ConnectionPool(primary, self.factory, size=4)
+        self.assertListEqual(["primary"] * 3, pool.run([lambda lapi: lapi.name] * 3))
+        self.assertListEqual([], self.created)
+
+    def test_exception_is_raised(self):
+        def fail(_):
+            raise ValueError("failed")
+
+        pool = ConnectionPool(FakeLinstor("primary"), self.factory, size=4)
+        self.assertRaises(ValueError, pool.run, [self.exclusive_call(1), fail])
+
+    def test_close(self):
+        primary = FakeLinstor("primary")
+        pool = ConnectionPool(primary, self.factory, size=4)
+        pool.run([self.exclusive_call(i) for i in range(8)])
+        pool.close()
+        self.assertTrue(all(x.disconnected for x in self.created))
+        self.assertFalse(primary.disconnected)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_spacing(self):
+        now = [100.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+
+        limiter = RateLimiter(4, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            limiter.acquire()
+        self.assertEqual([0.25, 0.5], sleeps)
+
+        now[0] = 101.0  # idle time is not saved up for bursts
+        limiter.acquire()
+        limiter.acquire()
+        self.assertEqual([0.25, 0.5, 0.25], sleeps)
+
+    def test_unlimited(self):
+        limiter = RateLimiter(None, sleep=lambda x: self.fail("must not sleep"))
+        limiter.acquire()
+        limiter.acquire()
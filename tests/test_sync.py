@@ -0,0 +1,72 @@
+import unittest
+
+import linstor
+
+from linstor_client.sync import SyncTracker
+
+
+def _resource(name, node, disk_state, repl_states=None, flags=None, drbd=True):
+    return {
+        "name": name, "node_name": node, "flags": flags or [], "props": {},
+        "volumes": [{
+            "volume_number": 0,
+            "layer_data_list": [{"type": "DRBD"}] if drbd else [{"type": "STORAGE"}],
+            "state": {"disk_state": disk_state, "replication_states": repl_states or {}}
+        }]
+    }
+
+
+def _syncing(done):
+    return {"n1": {"replication_state": "SyncTarget", "done_percentage": done}}
+
+
+def _resources(*raw):
+    return linstor.responses.ResourceResponse(list(raw)).resources
+
+
+class TestSync(unittest.TestCase):
+    def test_synced(self):
+        tracker = SyncTracker(["rsc1", "RSC2", "rsc3", "rsc4"])
+        tracker.update(_resources(
+            _resource("rsc1", "n1", "UpToDate", {"n2": {"replication_state": "Established"}}),
+            _resource("rsc1", "n2", "Diskless", flags=["DISKLESS", "DRBD_DISKLESS"]),
+            _resource("rsc2", "n1", "UpToDate"),
+            _resource("rsc2", "n2", "Inconsistent", _syncing(10.0)),
+            _resource("rsc3", "n1", None, drbd=False)
+        ))
+        # rsc4 has no resources, nothing to wait for
+        self.assertEqual(["RSC2"], tracker.pending)
+        self.assertEqual(3, tracker.synced_count)
+
+        tracker.update(_resources(
+            _resource("rsc2", "n1", "UpToDate"),
+            _resource("rsc2", "n2", "Diskless")  # unintentionally diskless
+        ))
+        self.assertEqual(["RSC2"], tracker.pending)
+
+        tracker.update(_resources(_resource("rsc2", "n1", "UpToDate"), _resource("rsc2", "n2", "UpToDate")))
+        self.assertEqual([], tracker.pending)
+
+    def test_eta(self):
+        tracker = SyncTracker(["rsc1", "rsc2"])
+        tracker.update(_resources(
+            _resource("rsc1", "n2", "Inconsistent", _syncing(10.0)),
+            _resource("rsc2", "n2", "Inconsistent", _syncing(50.0))
+        ), now=100.0)
+        self.assertIsNone(tracker.eta())
+        self.assertEqual("0/2 synced", tracker.status().split(",")[0])
+
+        tracker.update(_resources(
+            _resource("rsc1", "n2", "Inconsistent", _syncing(20.0)),
+            _resource("rsc2", "n2", "Inconsistent", _syncing(90.0))
+        ), now=110.0)
+        # rsc1: 10% in 10s, 80% left
+        self.assertAlmostEqual(80.0, tracker.eta())
+        slowest = tracker.slowest()
+        self.assertEqual(("rsc1", "n2", 0, "n1"), slowest[0][0])
+        self.assertIn("ETA 1m20s", tracker.status())
+        self.assertIn("rsc1/0 n2->n1 20.0%", tracker.status())
+
+
+if __name__ == '__main__':
+    unittest.main()
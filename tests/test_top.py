@@ -0,0 +1,106 @@
+import unittest
+
+import linstor
+
+from linstor_client.commands.top_cmds import TopCommands
+from linstor_client.top import KIND_CONNECTION, KIND_IN_USE, KIND_POOL, KIND_SYNC, TopModel, TopRow, TopScreen, \
+    format_row
+
+
+def _resource(name, node, in_use=False, repl_states=None, connections=None):
+    return {
+        "name": name, "node_name": node, "flags": [], "props": {},
+        "state": {"in_use": in_use},
+        "layer_object": {"type": "DRBD", "drbd": {"connections": connections or {}}},
+        "volumes": [{
+            "volume_number": 0, "storage_pool_name": "pool", "layer_data_list": [], "reports": [],
+            "state": {"disk_state": "UpToDate", "replication_states": repl_states or {}}
+        }]
+    }
+
+
+class _Window(object):
+    def __init__(self, height, width):
+        self._size = (height, width)
+        self.written = []
+
+    def getmaxyx(self):
+        return self._size
+
+    def move(self, row, col):
+        pass
+
+    def clrtoeol(self):
+        pass
+
+    def addnstr(self, row, col, text, length, attr):
+        self.written.append((row, text, attr))
+
+    def noutrefresh(self):
+        pass
+
+
+class TestTop(unittest.TestCase):
+    def test_resource_rows(self):
+        rsc_resp = linstor.responses.ResourceResponse([
+            _resource("rsc1", "n1", in_use=True, repl_states={
+                "n2": {"replication_state": "SyncSource", "done_percentage": 42.5},
+                "n3": {"replication_state": "Established"}
+            }),
+            _resource("rsc1", "n2", in_use=True, connections={"n3": {"connected": False, "message": "Connecting"}}),
+            _resource("rsc2", "n1")
+        ])
+        rows = TopCommands.resource_rows(rsc_resp)
+        self.assertEqual(
+            {KIND_SYNC: 1, KIND_IN_USE: 2, KIND_CONNECTION: 1},
+            {k: len([x for x in rows.values() if x.kind == k]) for k in (KIND_SYNC, KIND_IN_USE, KIND_CONNECTION)}
+        )
+        sync = rows[(KIND_SYNC, "rsc1", "n1", 0, "n2")]
+        self.assertEqual(42.5, sync.value)
+        self.assertEqual("rsc1/0", sync.name)
+        self.assertEqual("n3: Connecting", rows[(KIND_CONNECTION, "rsc1", "n2", "n3")].detail)
+
+    def test_model(self):
+        rows = {
+            ("a",): TopRow(KIND_SYNC, "rsc1/0", "n1", "n2: SyncTarget(10.00%)", 10.0),
+            ("b",): TopRow(KIND_SYNC, "rsc2/0", "n2", "n1: SyncTarget(90.00%)", 90.0),
+            ("c",): TopRow(KIND_POOL, "pool", "n1", "1 GiB of 2 GiB used", 50.0)
+        }
+        model = TopModel(sort="value", reverse=True)
+        self.assertTrue(model.update(rows))
+        self.assertEqual([("b",), ("c",), ("a",)], [key for key, _ in model.visible()])
+        self.assertEqual({("a",), ("b",), ("c",)}, model.changed)
+
+        self.assertFalse(model.update(dict(rows)))
+        self.assertEqual(set(), model.changed)
+
+        rows[("a",)] = rows[("a",)]._replace(value=20.0)
+        self.assertTrue(model.update(dict(rows)))
+        self.assertEqual({("a",)}, model.changed)
+
+        model.select(filter_text="N2", kinds=[KIND_SYNC])
+        self.assertEqual([("b",), ("a",)], [key for key, _ in model.visible()])
+        model.select(filter_text="rsc1/")
+        self.assertEqual([("a",)], [key for key, _ in model.visible()])
+
+    def test_screen(self):
+        window = _Window(4, 40)
+        screen = TopScreen(window, header_attr=1, changed_attr=2)
+        lines = [("status", True, False), ("row1", False, False), ("row2", False, True), ("row3", False, False),
+                 ("row4", False, False)]
+        screen.draw(lines)
+        self.assertEqual([(0, "status", 1), (1, "row1", 0), (2, "row2", 2), (3, "row3", 0)], window.written)
+
+        window.written = []
+        screen.draw([("status", True, False), ("row1", False, False), ("row2", False, False), ("row3", False, False)])
+        self.assertEqual([(2, "row2", 0)], window.written)
+
+    def test_format_row(self):
+        line = format_row(TopRow(KIND_POOL, "pool", "n1", "used", 12.345), 80)
+        self.assertTrue(line.startswith("Pool   pool"))
+        self.assertIn("   12.3 used", line)
+        self.assertLessEqual(len(format_row(None, 30)), 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import argparse
+import unittest
+
+import linstor
+
+from linstor_client.commands import TransactionCommands, TransactionOperation, TransactionStage, TransactionState
+from linstor_client.consts import ExitCode
+
+
+class _StateService(object):
+    def __init__(self, state):
+        self.states = [state]
+
+    def get_state(self):
+        return self.states[-1]
+
+    def pop_state(self):
+        self.states.pop()
+
+
+class _Lapi(object):
+    def __init__(self, failing=()):
+        self.calls = []
+        self._failing = failing
+
+    def call(self, name):
+        self.calls.append(name)
+        ret_code = linstor.consts.MASK_ERROR if name in self._failing else 0
+        return [linstor.ApiCallResponse({"ret_code": ret_code, "message": name})]
+
+
+def _operation(stage, obj_name, verb="create"):
+    return TransactionOperation(stage, verb, "resource definition", obj_name,
+                                lambda lapi: lapi.call("{v} {n}".format(v=verb, n=obj_name)))
+
+
+class TestTransaction(unittest.TestCase):
+    def _commit(self, operations, lapi):
+        state = TransactionState(False)
+        cmds = TransactionCommands(_StateService(state))
+        cmds._linstor = lapi
+        for operation in operations:
+            self.assertEqual(ExitCode.OK, state.queue(operation))
+        args = argparse.Namespace(parallel=None, machine_readable=True, output_version="v1", curl=False)
+        return cmds.commit(args)
+
+    def test_commit_order(self):
+        lapi = _Lapi()
+        rc = self._commit([
+            _operation(TransactionStage.RESOURCES, "rsc1"),
+            _operation(TransactionStage.RESOURCE_DEFINITION_PROPS, "rsc1", "set-a"),
+            _operation(TransactionStage.RESOURCE_DEFINITIONS, "rsc1"),
+            _operation(TransactionStage.RESOURCE_DEFINITION_PROPS, "rsc1", "set-b")
+        ], lapi)
+        self.assertEqual(ExitCode.OK, rc)
+        self.assertEqual(["create rsc1", "set-a rsc1", "set-b rsc1", "create rsc1"], lapi.calls)
+
+    def test_groups(self):
+        def vd_create(name, vlmnr=None):
+            return TransactionOperation(
+                TransactionStage.VOLUME_DEFINITIONS, "create", "volume definition",
+                name if vlmnr is None else "{r}/{v}".format(r=name, v=vlmnr), None, resource_definition=name)
+
+        operations = [
+            vd_create("rsc1"),
+            vd_create("rsc2", 0),
+            vd_create("RSC1", 1),
+            TransactionOperation(TransactionStage.NODE_PROPS, "set-property", "node", "rsc1", None)
+        ]
+        groups = TransactionCommands._groups(operations)
+        self.assertEqual([[operations[0], operations[2]], [operations[1]], [operations[3]]], groups)
+
+    def test_failed_stage_skips_later_stages(self):
+        lapi = _Lapi(failing=["create rsc2"])
+        rc = self._commit([
+            _operation(TransactionStage.RESOURCE_DEFINITIONS, "rsc1"),
+            _operation(TransactionStage.RESOURCE_DEFINITIONS, "rsc2"),
+            _operation(TransactionStage.VOLUME_DEFINITIONS, "rsc1")
+        ], lapi)
+        self.assertEqual(ExitCode.API_ERROR, rc)
+        self.assertEqual(["create rsc1", "create rsc2"], lapi.calls)
@@ -0,0 +1,75 @@
+import unittest
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from linstor_client.consts import Color
+from linstor_client.tree import TreeNode
+
+
+class TestTree(unittest.TestCase):
+    @staticmethod
+    def _build_tree():
+        root = TreeNode("node1", "node", Color.RED)
+        for sp_name in ["pool1", "pool2"]:
+            sp = TreeNode(sp_name, "storage pool", Color.PINK)
+            root.add_child(sp)
+        rsc = TreeNode("rsc1", "resource", Color.BLUE)
+        rsc.add_child(TreeNode("volume0", "size: 1 GiB", Color.DARKGREEN))
+        root.find_child("pool1").add_child(rsc)
+        return root
+
+    def _render(self, tree, max_depth=None):
+        out = StringIO()
+        tree.print_node(no_utf8=True, no_color=True, max_depth=max_depth, outstream=out)
+        return out.getvalue()
+
+    def test_find_child(self):
+        root = self._build_tree()
+        self.assertEqual("pool2", root.find_child("pool2").name)
+        self.assertIsNone(root.find_child("pool3"))
+
+        root.add_child(TreeNode("pool1", "duplicate", Color.PINK))
+        self.assertEqual("storage pool", root.find_child("pool1").description)
+
+    def test_print(self):
+        self.assertEqual(
+            "node1 (node)\n"
+            "   |\n"
+            "   |---pool1 (storage pool)\n"
+            "   |   |\n"
+            "   |   +---rsc1 (resource)\n"
+            "   |       |\n"
+            "   |       +---volume0 (size: 1 GiB)\n"
+            "   |\n"
+            "   +---pool2 (storage pool)\n",
+            self._render(self._build_tree())
+        )
+
+    def test_print_depth(self):
+        self.assertEqual(
+            "node1 (node)\n"
+            "   |\n"
+            "   |---pool1 (storage pool)\n"
+            "   |\n"
+            "   +---pool2 (storage pool)\n",
+            self._render(self._build_tree(), max_depth=1)
+        )
+        self.assertEqual("node1 (node)\n", self._render(self._build_tree(), max_depth=0))
+
+    def test_to_data_depth(self):
+        data = self._build_tree().to_data(max_depth=1)
+        self.assertEqual(2, len(data['children']))
+        self.assertListEqual([], data['children'][0]['children'])
+
+    def test_wide_tree(self):
+        root = TreeNode("node1", "node", Color.RED)
+        for i in range(5000):
+            root.add_child(TreeNode("rsc" + str(i), "resource", Color.BLUE))
+        self.assertEqual("rsc4999", root.find_child("rsc4999").name)
+        self.assertEqual(1 + 2 * 5000, len(self._render(root).splitlines()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from linstor import ApiCallResponse
+from linstor.sharedconsts import MASK_ERROR, MASK_WARN
+from linstor_client.consts import ExitCode
+from linstor_client.utils import Progress, ReportAggregator
+
+
+class TestReportAggregator(unittest.TestCase):
+    @staticmethod
+    def _report(ret_code, message, report_ids=None):
+        return ApiCallResponse({"ret_code": ret_code, "message": message, "error_report_ids": report_ids or []})
+
+    def test_group_identical_reports(self):
+        aggr = ReportAggregator()
+        for node in ["node1", "node2", "node3"]:
+            aggr.add(self._report(MASK_ERROR, "Satellite offline", [node + "-ERR"]), node + "/pool1")
+        aggr.add(self._report(MASK_WARN, "Low space"), "node1/pool2")
+        self.assertEqual(2, len(aggr))
+
+        out = StringIO()
+        rc = aggr.print_reports(no_color=True, warn_as_error=False, outstream=out)
+        self.assertEqual(ExitCode.API_ERROR, rc)
+        output = out.getvalue()
+        self.assertEqual(1, output.count("Satellite offline"))
+        self.assertIn("Reported 3 times by:\n    node1/pool1, node2/pool1, node3/pool1\n", output)
+        self.assertIn("linstor error-reports show node1-ERR node2-ERR node3-ERR\n", output)
+        self.assertEqual(1, output.count("Reported"))
+
+    def test_empty(self):
+        out = StringIO()
+        self.assertEqual(ExitCode.OK, ReportAggregator().print_reports(True, False, outstream=out))
+        self.assertEqual("", out.getvalue())
+
+
+class TestProgress(unittest.TestCase):
+    class _Tty(StringIO):
+        def isatty(self):
+            return True
+
+    def test_progress_on_tty(self):
+        out = self._Tty()
+        progress = Progress("nodes", 2, outstream=out)
+        progress.step()
+        progress.step()
+        progress.finish()
+        self.assertEqual("\rnodes: 1/2\rnodes: 2/2\n", out.getvalue())
+
+    def test_no_progress_without_tty(self):
+        out = StringIO()
+        progress = Progress("nodes", 2, outstream=out)
+        progress.step()
+        progress.finish()
+        self.assertEqual("", out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import io
+import unittest
+
+from linstor_client.table import Table
+from linstor_client.watch import TableSnapshot, TableWatch
+
+
+def _table(rows):
+    tbl = Table()
+    tbl.add_column("Node")
+    tbl.add_column("Resource")
+    tbl.add_column("State")
+    for row in rows:
+        tbl.add_row(list(row))
+    return tbl.show() + "\n"
+
+
+class _Stream(io.StringIO):
+    def isatty(self):
+        return False
+
+
+class TestWatch(unittest.TestCase):
+    def test_snapshot_keys(self):
+        snapshot = TableSnapshot(_table([("n1", "rsc1", "UpToDate"), ("n2", "rsc1", "Inconsistent")]), 2)
+        self.assertEqual([("n1", "rsc1"), ("n2", "rsc1")], snapshot.order)
+        self.assertEqual(("n2", "rsc1", "Inconsistent"), snapshot.rows[("n2", "rsc1")][0])
+
+    def test_snapshot_changes(self):
+        previous = TableSnapshot(_table([("n1", "rsc1", "UpToDate"), ("n2", "rsc1", "Inconsistent")]), 2)
+        current = TableSnapshot(_table([("n2", "rsc1", "UpToDate"), ("n3", "rsc1", "UpToDate")]), 2)
+        self.assertEqual({("n2", "rsc1"), ("n3", "rsc1")}, current.changed_keys(previous))
+        self.assertEqual([("n1", "rsc1")], current.removed_keys(previous))
+        self.assertFalse(current.same_layout(previous))
+
+        unchanged = TableSnapshot(_table([("n2", "rsc1", "Outdated"), ("n3", "rsc1", "UpToDate")]), 2)
+        self.assertTrue(unchanged.same_layout(current))
+
+    def test_snapshot_multi_line_rows(self):
+        text = "\n".join([
+            "+----------------------+",
+            "| Node | Rsc  | State  |",
+            "|======================|",
+            "| n1   | rsc1 | Ok     |",
+            "|      |      | extra  |",
+            "| n1   | rsc1 | Ok     |",
+            "+----------------------+",
+            "INFO: trailing message"
+        ])
+        snapshot = TableSnapshot(text, 2)
+        self.assertEqual([("n1", "rsc1"), ("n1", "rsc1", 2)], snapshot.order)
+        self.assertEqual([3, 4], snapshot.rows[("n1", "rsc1")][1])
+        self.assertEqual(("n1", "rsc1", "Ok", "", "", "extra"), snapshot.rows[("n1", "rsc1")][0])
+
+    def test_changes_only(self):
+        out = _Stream()
+        watch = TableWatch("Every 2s", 2, colors=False, outstream=out)
+        watch.update(_table([("n1", "rsc1", "UpToDate"), ("n2", "rsc1", "Inconsistent")]))
+        self.assertIn("Inconsistent", out.getvalue())
+
+        out.seek(0)
+        out.truncate()
+        watch.update(_table([("n1", "rsc1", "UpToDate"), ("n2", "rsc1", "UpToDate")]))
+        lines = out.getvalue().splitlines()
+        self.assertEqual(1, len(lines))
+        self.assertIn(" ~ ", lines[0])
+        self.assertIn("n2", lines[0])
+
+        out.seek(0)
+        out.truncate()
+        watch.update(_table([("n2", "rsc1", "UpToDate")]))
+        lines = out.getvalue().splitlines()
+        self.assertEqual(1, len(lines))
+        self.assertIn(" - ", lines[0])
+        self.assertIn("n1", lines[0])
+
+
+if __name__ == '__main__':
+    unittest.main()